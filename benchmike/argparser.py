@@ -1,34 +1,206 @@
 """Custom command-line argument parser for benchmike
     Procedures:
+    add_sweep_arguments
+    get_options
     parse
+    parse_batch
+    parse_compare
+    parse_concurrency
+    parse_scaling
+    parse_selftest
     validate_args
+    validate_batch_args
+    validate_compare_args
+    validate_concurrency_args
+    validate_scaling_args
+    validate_selftest_args
+    validate_sweep_args
 """
 from argparse import ArgumentParser
-from os.path import isfile
+from importlib.util import find_spec
+from os.path import isfile, splitext
 
 from benchmike import exceptions as err
+from benchmike.benchmark import (BenchmarkOptions, GC_MODES,
+                                 DEFAULT_GC_MODE, DEFAULT_INPUT_MAX_SIZE,
+                                 available_cpus, reset_peak_rss)
+from benchmike.bigoestimator import (CRITERIA, DEFAULT_CRITERION,
+                                     DEFAULT_BOOTSTRAP, DEFAULT_LEVEL)
+from benchmike.compare import (DEFAULT_MAX_SLOWDOWN, DEFAULT_ALPHA,
+                               MIN_COMPARE_REPEAT)
+from benchmike.concurrency import DEFAULT_MAX_CONCURRENCY, get_levels
+from benchmike.inputs import DEFAULT_INPUT_DIR, DEFAULT_SEED
+from benchmike.measurement import STATISTICS, DEFAULT_STATISTIC
+from benchmike.profiler import (PROFILERS, DEFAULT_PROFILE_SIZES,
+                                DEFAULT_INTERVAL)
+from benchmike.results import FORMATS
+from benchmike.schedulers import SCHEDULES, DEFAULT_SCHEDULE, DEFAULT_FACTOR
+from benchmike.timers import CLOCKS, DEFAULT_CLOCK, DEFAULT_EXTRA_CLOCKS
 
 DEFAULT_TIMEOUT = 30
 DEFAULT_TIME_FILE = 'time_source.py'
 DEFAULT_SIZE_FILE = 'size_source.py'
+DEFAULT_MEMORY_FILE = 'memory_source.py'
 DEFAULT_STEP = 100
 DEFAULT_INIT_SIZE = 100
 DEFAULT_STEPS_COUNT = 100
+DEFAULT_REPEAT = 1
+DEFAULT_MAX_REPEAT = 100
+DEFAULT_WARMUP = 0
+DEFAULT_JOBS = 1
+DEFAULT_EVIDENCE = 10.0
+DEFAULT_CACHE_FILE = 'benchmike_cache.db'
+DEFAULT_CACHE_MAX_AGE = 30
+DEFAULT_CACHE_MAX_SIZE = 100
+DEFAULT_CHECKPOINT_FILE = 'benchmike_checkpoint.jsonl'
+DEFAULT_REPORT_FILE = 'batch_report.csv'
+PLOT_FORMATS = ('.png', '.svg', '.pdf')
+DEFAULT_RESULT_FILE = 'benchmike_result'
+DEFAULT_CONCURRENCY_SIZE = 1000
+DEFAULT_CONCURRENCY_REPORT_FILE = 'concurrency_report.csv'
+DEFAULT_GRID_COUNT = 10
+DEFAULT_SCALING_REPORT_FILE = 'scaling_report.csv'
+DEFAULT_HEATMAP_FILE = 'scaling_heatmap.png'
+MIN_SCALING_LEVELS = 2
+DEFAULT_SELFTEST_TIMEOUT = 60
+DEFAULT_SELFTEST_REPORT_FILE = 'benchmike_selftest.jsonl'
 
 
-def parse():
-    """Parse args using argparse and return them as dict"""
-    parser = ArgumentParser(
-        description="BenchMike - tool for estimating time complexity of code")
-    parser.add_argument(dest='code',
-                        type=str,
-                        help='path to .py file with code to be processed')
+def add_sweep_arguments(parser):
+    """Add arguments controlling how sizes are chosen and measured"""
     parser.add_argument('-t',
                         dest='timeout',
                         type=int,
                         help='timeout in seconds',
                         default=DEFAULT_TIMEOUT,
                         required=False)
+    parser.add_argument('--step',
+                        dest='step',
+                        type=int,
+                        help='step for calculations',
+                        default=DEFAULT_STEP,
+                        required=False)
+    parser.add_argument('--start',
+                        dest='start',
+                        type=int,
+                        help='initial size of problem',
+                        default=DEFAULT_INIT_SIZE,
+                        required=False)
+    parser.add_argument('--count',
+                        dest='count',
+                        type=int,
+                        help='number of steps',
+                        default=DEFAULT_STEPS_COUNT,
+                        required=False)
+    parser.add_argument('-r', '--repeat',
+                        dest='repeat',
+                        type=int,
+                        help='number of trials for every size',
+                        default=DEFAULT_REPEAT,
+                        required=False)
+    parser.add_argument('--max-rse',
+                        dest='max_rse',
+                        type=float,
+                        help='repeat trials until relative standard error '
+                             'of run time is below this value',
+                        default=None,
+                        required=False)
+    parser.add_argument('--max-repeat',
+                        dest='max_repeat',
+                        type=int,
+                        help='max number of trials for every size when '
+                             '--max-rse is used',
+                        default=DEFAULT_MAX_REPEAT,
+                        required=False)
+    parser.add_argument('--statistic',
+                        dest='statistic',
+                        type=str,
+                        choices=STATISTICS,
+                        help='statistic of trials used for estimation',
+                        default=DEFAULT_STATISTIC,
+                        required=False)
+    parser.add_argument('--clock',
+                        dest='clock',
+                        type=str,
+                        choices=sorted(CLOCKS),
+                        help='primary clock used for run time',
+                        default=DEFAULT_CLOCK,
+                        required=False)
+    parser.add_argument('--clocks',
+                        dest='extra_clocks',
+                        type=str,
+                        nargs='*',
+                        choices=sorted(CLOCKS),
+                        help='additional clocks recorded for every trial',
+                        default=list(DEFAULT_EXTRA_CLOCKS),
+                        required=False)
+    parser.add_argument('--no-calibrate',
+                        dest='calibrate',
+                        action='store_false',
+                        help='do not repeat short run() calls in inner loop')
+    parser.add_argument('--warmup',
+                        dest='warmup',
+                        type=int,
+                        help='number of discarded trials before measured '
+                             'ones for every size',
+                        default=DEFAULT_WARMUP,
+                        required=False)
+    parser.add_argument('--gc',
+                        dest='gc_mode',
+                        type=str,
+                        choices=GC_MODES,
+                        help='leave garbage collector enabled, disable it '
+                             'while run() is timed or collect garbage '
+                             'before every trial',
+                        default=DEFAULT_GC_MODE,
+                        required=False)
+    parser.add_argument('--no-floor',
+                        dest='subtract_floor',
+                        action='store_false',
+                        help='do not subtract harness floor from run time')
+    parser.add_argument('-j', '--jobs',
+                        dest='jobs',
+                        type=int,
+                        help='number of parallel workers, each pinned to '
+                             'its own CPU, at most number of CPUs',
+                        default=DEFAULT_JOBS,
+                        required=False)
+    parser.add_argument('--schedule',
+                        dest='schedule',
+                        type=str,
+                        choices=SCHEDULES,
+                        help='strategy of choosing problem sizes',
+                        default=DEFAULT_SCHEDULE,
+                        required=False)
+    parser.add_argument('--factor',
+                        dest='factor',
+                        type=float,
+                        help='size growth factor for geometric and adaptive '
+                             'schedules',
+                        default=DEFAULT_FACTOR,
+                        required=False)
+    parser.add_argument('--early-stop',
+                        dest='early_stop',
+                        action='store_true',
+                        help='stop benchmark as soon as the best '
+                             'complexity leads significantly')
+    parser.add_argument('--evidence',
+                        dest='evidence',
+                        type=float,
+                        help='AIC lead of the best complexity required to '
+                             'stop early',
+                        default=DEFAULT_EVIDENCE,
+                        required=False)
+
+
+def parse(argv=None):
+    """Parse args using argparse and return them as Namespace"""
+    parser = ArgumentParser(
+        description="BenchMike - tool for estimating time complexity of code")
+    parser.add_argument(dest='code',
+                        type=str,
+                        help='path to .py file with code to be processed')
+    add_sweep_arguments(parser)
     parser.add_argument('--timefile',
                         dest='timefile',
                         type=str,
@@ -41,6 +213,312 @@ def parse():
                         help='file where max_size(time) will be saved',
                         default=DEFAULT_SIZE_FILE,
                         required=False)
+    parser.add_argument('--persistent',
+                        dest='persistent',
+                        action='store_true',
+                        help='measure all sizes in one long-lived worker '
+                             'process instead of one process per size')
+    parser.add_argument('--memory',
+                        dest='memory',
+                        action='store_true',
+                        help='estimate space complexity as well')
+    parser.add_argument('--tracemalloc',
+                        dest='trace_memory',
+                        action='store_true',
+                        help='trace peak of allocated memory instead of '
+                             'using peak RSS, slows down the code')
+    parser.add_argument('--counters',
+                        dest='counters',
+                        action='store_true',
+                        help='record perf_event_open counters, context '
+                             'switches and allocated blocks per trial and '
+                             'estimate their complexity as well')
+    parser.add_argument('--input-dir',
+                        dest='input_dir',
+                        type=str,
+                        help='directory where inputs made by '
+                             'make_input(size, seed) are cached',
+                        default=DEFAULT_INPUT_DIR,
+                        required=False)
+    parser.add_argument('--input-max-size',
+                        dest='input_max_size',
+                        type=float,
+                        help='max size of cached inputs in megabytes, least '
+                             'recently used ones are removed above it',
+                        default=DEFAULT_INPUT_MAX_SIZE,
+                        required=False)
+    parser.add_argument('--seed',
+                        dest='seed',
+                        type=int,
+                        help='seed passed to make_input(size, seed)',
+                        default=DEFAULT_SEED,
+                        required=False)
+    parser.add_argument('--copy-input',
+                        dest='copy_input',
+                        action='store_true',
+                        help='give every trial its own copy of input, for '
+                             'code modifying it')
+    parser.add_argument('--memoryfile',
+                        dest='memoryfile',
+                        type=str,
+                        help='file where max_size(memory) will be saved',
+                        default=DEFAULT_MEMORY_FILE,
+                        required=False)
+    parser.add_argument('--cache',
+                        dest='cache',
+                        action='store_true',
+                        help='reuse measurements of unchanged code and '
+                             'settings from cache file and store new ones '
+                             'there')
+    parser.add_argument('--cache-file',
+                        dest='cache_file',
+                        type=str,
+                        help='file of measurement cache',
+                        default=DEFAULT_CACHE_FILE,
+                        required=False)
+    parser.add_argument('--cache-max-age',
+                        dest='cache_max_age',
+                        type=float,
+                        help='days after which cached results are evicted',
+                        default=DEFAULT_CACHE_MAX_AGE,
+                        required=False)
+    parser.add_argument('--cache-max-size',
+                        dest='cache_max_size',
+                        type=float,
+                        help='max size of cached results in megabytes',
+                        default=DEFAULT_CACHE_MAX_SIZE,
+                        required=False)
+    parser.add_argument('--checkpoint',
+                        dest='checkpoint',
+                        type=str,
+                        nargs='?',
+                        const=DEFAULT_CHECKPOINT_FILE,
+                        help='save measurements to this file as they are '
+                             'taken, {} if no file is given'.format(
+                            DEFAULT_CHECKPOINT_FILE),
+                        default=None,
+                        required=False)
+    parser.add_argument('--resume',
+                        dest='resume',
+                        action='store_true',
+                        help='continue interrupted benchmark from '
+                             'checkpoint, requires --checkpoint')
+    parser.add_argument('--headless',
+                        dest='headless',
+                        action='store_true',
+                        help='do not plot results, matplotlib is not '
+                             'imported at all')
+    parser.add_argument('--plotfile',
+                        dest='plotfile',
+                        type=str,
+                        help='file where plot will be saved instead of '
+                             'showing it, one of {}'.format(
+                            ', '.join(PLOT_FORMATS)),
+                        default=None,
+                        required=False)
+    parser.add_argument('--format',
+                        dest='output_format',
+                        type=str,
+                        choices=FORMATS,
+                        help='export structured result in this format',
+                        default=None,
+                        required=False)
+    parser.add_argument('--output',
+                        dest='output',
+                        type=str,
+                        help='file where structured result is saved, '
+                             'appended to for jsonl and csv formats, '
+                             'default is {}.<format>'.format(
+                            DEFAULT_RESULT_FILE),
+                        default=None,
+                        required=False)
+    parser.add_argument('--criterion',
+                        dest='criterion',
+                        type=str,
+                        choices=CRITERIA,
+                        help='information criterion used to choose '
+                             'complexity',
+                        default=DEFAULT_CRITERION,
+                        required=False)
+    parser.add_argument('--two-term',
+                        dest='two_term',
+                        action='store_true',
+                        help='also compare complexities with two terms, '
+                             'O(n^2 + n) and O(n * log n + n)',
+                        required=False)
+    parser.add_argument('--bootstrap',
+                        dest='bootstrap',
+                        type=int,
+                        help='number of bootstrap replicates giving '
+                             'probabilities of complexities, 0 disables it',
+                        default=DEFAULT_BOOTSTRAP,
+                        required=False)
+    parser.add_argument('--level',
+                        dest='level',
+                        type=float,
+                        help='confidence level of prediction bands',
+                        default=DEFAULT_LEVEL,
+                        required=False)
+    parser.add_argument('--profile',
+                        dest='profiler',
+                        type=str,
+                        choices=PROFILERS,
+                        help='profile the largest sizes after benchmark, '
+                             'cprofile saves .pstats files, sampling saves '
+                             'collapsed stacks for flame graphs',
+                        default=None,
+                        required=False)
+    parser.add_argument('--profile-sizes',
+                        dest='profile_sizes',
+                        type=int,
+                        choices=(1, 2),
+                        help='number of profiled sizes, with two shares of '
+                             'functions are compared',
+                        default=DEFAULT_PROFILE_SIZES,
+                        required=False)
+    parser.add_argument('--profile-interval',
+                        dest='profile_interval',
+                        type=float,
+                        help='CPU time in seconds between samples of '
+                             'sampling profiler',
+                        default=DEFAULT_INTERVAL,
+                        required=False)
+    args = parser.parse_args(argv)
+    if args.output_format and not args.output:
+        args.output = '{}.{}'.format(DEFAULT_RESULT_FILE, args.output_format)
+    return args
+
+def parse_batch(argv):
+    """Parse args of batch mode and return them as Namespace"""
+    parser = ArgumentParser(
+        prog='benchmike batch',
+        description="BenchMike batch mode - estimate time complexity of "
+                    "many functions within one time budget")
+    parser.add_argument(dest='paths',
+                        type=str,
+                        nargs='+',
+                        help='.py files, directories or glob patterns with '
+                             'code to be processed')
+    add_sweep_arguments(parser)
+    parser.add_argument('--report',
+                        dest='report',
+                        type=str,
+                        help='file where consolidated report will be saved',
+                        default=DEFAULT_REPORT_FILE,
+                        required=False)
+    return parser.parse_args(argv)
+
+
+def parse_compare(argv):
+    """Parse args of compare mode and return them as Namespace"""
+    parser = ArgumentParser(
+        prog='benchmike compare',
+        description="BenchMike compare mode - benchmark code at sizes of "
+                    "baseline sweep and exit with non-zero status when it "
+                    "regressed")
+    parser.add_argument(dest='code',
+                        type=str,
+                        help='path to .py file with code to be processed')
+    parser.add_argument(dest='baseline',
+                        type=str,
+                        help='JSON Lines result file, its last result is '
+                             'the baseline')
+    parser.add_argument('-t',
+                        dest='timeout',
+                        type=int,
+                        help='timeout in seconds, timeout of baseline by '
+                             'default',
+                        default=None,
+                        required=False)
+    parser.add_argument('-r', '--repeat',
+                        dest='repeat',
+                        type=int,
+                        help='number of trials for every size, at least '
+                             '{}, the same as in baseline but not less by '
+                             'default'.format(MIN_COMPARE_REPEAT),
+                        default=None,
+                        required=False)
+    parser.add_argument('-j', '--jobs',
+                        dest='jobs',
+                        type=int,
+                        help='number of parallel workers, at most number '
+                             'of CPUs',
+                        default=DEFAULT_JOBS,
+                        required=False)
+    parser.add_argument('--max-slowdown',
+                        dest='max_slowdown',
+                        type=float,
+                        help='ratio of current to baseline time regarded as '
+                             'regression',
+                        default=DEFAULT_MAX_SLOWDOWN,
+                        required=False)
+    parser.add_argument('--alpha',
+                        dest='alpha',
+                        type=float,
+                        help='significance level of per-size slowdown',
+                        default=DEFAULT_ALPHA,
+                        required=False)
+    parser.add_argument('--allow-complexity-change',
+                        dest='allow_complexity_change',
+                        action='store_true',
+                        help='do not fail when complexity class changed')
+    return parser.parse_args(argv)
+
+
+def parse_concurrency(argv):
+    """Parse args of concurrency mode and return them as Namespace"""
+    parser = ArgumentParser(
+        prog='benchmike concurrency',
+        description="BenchMike concurrency mode - measure throughput and "
+                    "latency of coroutine run(size) as number of concurrent "
+                    "tasks grows")
+    parser.add_argument(dest='code',
+                        type=str,
+                        help='path to .py file with code to be processed')
+    parser.add_argument('-t',
+                        dest='timeout',
+                        type=int,
+                        help='timeout in seconds',
+                        default=DEFAULT_TIMEOUT,
+                        required=False)
+    parser.add_argument('--size',
+                        dest='size',
+                        type=int,
+                        help='problem size passed to every run() call',
+                        default=DEFAULT_CONCURRENCY_SIZE,
+                        required=False)
+    parser.add_argument('--max-concurrency',
+                        dest='max_concurrency',
+                        type=int,
+                        help='largest number of concurrent run() tasks, '
+                             'levels are doubled from 1 up to it',
+                        default=DEFAULT_MAX_CONCURRENCY,
+                        required=False)
+    parser.add_argument('--report',
+                        dest='report',
+                        type=str,
+                        help='file where report will be saved',
+                        default=DEFAULT_CONCURRENCY_REPORT_FILE,
+                        required=False)
+    return parser.parse_args(argv)
+
+
+def parse_scaling(argv):
+    """Parse args of scaling mode and return them as Namespace"""
+    parser = ArgumentParser(
+        prog='benchmike scaling',
+        description="BenchMike scaling mode - measure run(size, workers) "
+                    "over grid of sizes and worker counts and estimate "
+                    "parallel speedup")
+    parser.add_argument(dest='code',
+                        type=str,
+                        help='path to .py file with code to be processed')
+    parser.add_argument('-t',
+                        dest='timeout',
+                        type=int,
+                        help='timeout in seconds',
+                        default=DEFAULT_TIMEOUT,
+                        required=False)
     parser.add_argument('--step',
                         dest='step',
                         type=int,
@@ -56,28 +534,213 @@ def parse():
     parser.add_argument('--count',
                         dest='count',
                         type=int,
-                        help='number of steps',
-                        default=DEFAULT_STEPS_COUNT,
+                        help='number of sizes',
+                        default=DEFAULT_GRID_COUNT,
+                        required=False)
+    parser.add_argument('--workers',
+                        dest='workers',
+                        type=int,
+                        nargs='+',
+                        help='worker counts passed to run(), at least two, '
+                             'powers of two up to number of available CPUs '
+                             'but at least 1 and 2 by default',
+                        default=get_levels(max(len(available_cpus()),
+                                               MIN_SCALING_LEVELS)),
+                        required=False)
+    parser.add_argument('-r', '--repeat',
+                        dest='repeat',
+                        type=int,
+                        help='number of trials for every cell of grid',
+                        default=DEFAULT_REPEAT,
+                        required=False)
+    parser.add_argument('--statistic',
+                        dest='statistic',
+                        type=str,
+                        choices=STATISTICS,
+                        help='statistic of trials used for estimation',
+                        default=DEFAULT_STATISTIC,
+                        required=False)
+    parser.add_argument('--warmup',
+                        dest='warmup',
+                        type=int,
+                        help='number of discarded trials before measured '
+                             'ones for every cell of grid',
+                        default=DEFAULT_WARMUP,
+                        required=False)
+    parser.add_argument('--report',
+                        dest='report',
+                        type=str,
+                        help='file where report will be saved',
+                        default=DEFAULT_SCALING_REPORT_FILE,
+                        required=False)
+    parser.add_argument('--heatmap',
+                        dest='heatmap',
+                        type=str,
+                        help='file where heat map of speedup will be saved, '
+                             'one of {}'.format(', '.join(PLOT_FORMATS)),
+                        default=DEFAULT_HEATMAP_FILE,
+                        required=False)
+    return parser.parse_args(argv)
+
+
+def parse_selftest(argv):
+    """Parse args of selftest mode and return them as Namespace"""
+    parser = ArgumentParser(
+        prog='benchmike selftest',
+        description="BenchMike selftest - measure harness overhead and check "
+                    "classification of reference kernels")
+    parser.add_argument('-t',
+                        dest='timeout',
+                        type=int,
+                        help='timeout in seconds',
+                        default=DEFAULT_SELFTEST_TIMEOUT,
+                        required=False)
+    parser.add_argument('--report',
+                        dest='report',
+                        type=str,
+                        help='JSON Lines file the report is appended to',
+                        default=DEFAULT_SELFTEST_REPORT_FILE,
                         required=False)
-    args = vars(parser.parse_args())
-    return args.get('code'), args.get('timeout'), args.get(
-        'timefile'), args.get('sizefile'), args.get('step'), args.get(
-        'start'), args.get('count')
+    return parser.parse_args(argv)
+
+
+def get_options(args, **options):
+    """Return BenchmarkOptions with fields taken from attributes of args of
+    the same names, options override them"""
+    fields = {field: getattr(args, field)
+              for field in BenchmarkOptions._fields if hasattr(args, field)}
+    fields.update(options)
+    return BenchmarkOptions(**fields)
+
+
+def validate_sweep_args(args):
+    """Validate values of arguments shared by all modes"""
+    if args.timeout < 0:
+        raise err.InvalidArgumentError('Timeout is a negative number')
+    if args.repeat < 1 or args.max_repeat < args.repeat:
+        raise err.InvalidArgumentError('Invalid number of repeats')
+    if args.max_rse is not None and args.max_rse <= 0:
+        raise err.InvalidArgumentError('Max RSE is not a positive number')
+    if args.warmup < 0:
+        raise err.InvalidArgumentError('Warm-up is a negative number')
+    if args.jobs < 1:
+        raise err.InvalidArgumentError('Number of jobs is not positive')
+    if args.jobs > len(available_cpus()):
+        raise err.InvalidArgumentError(
+            'Number of jobs is greater than number of available CPUs')
+    if args.factor <= 1:
+        raise err.InvalidArgumentError('Growth factor is not greater than 1')
+    if args.evidence <= 0:
+        raise err.InvalidArgumentError('Evidence is not a positive number')
 
 
-def validate_args(code_path, timeout, timefile_path, sizefile_path, *args):
+def validate_args(args):
     """Validate values/types of arguments"""
-    if not isfile(code_path):
+    if not isfile(args.code):
         raise err.InvalidArgumentError('Invalid code path')
-    if timeout < 0:
-        raise err.InvalidArgumentError('Timeout is a negative number')
-    if timefile_path != DEFAULT_TIME_FILE and not isfile(
-            timefile_path):
+    if args.timefile != DEFAULT_TIME_FILE and not isfile(args.timefile):
+        raise err.InvalidArgumentError('Invalid path for result file')
+    if args.sizefile != DEFAULT_SIZE_FILE and not isfile(args.sizefile):
         raise err.InvalidArgumentError('Invalid path for result file')
-    if sizefile_path != DEFAULT_SIZE_FILE and not isfile(
-            sizefile_path):
+    if args.memoryfile != DEFAULT_MEMORY_FILE and not isfile(
+            args.memoryfile):
         raise err.InvalidArgumentError('Invalid path for result file')
+    validate_sweep_args(args)
+    if args.memory and not args.trace_memory and (
+            args.persistent or args.jobs > 1) and not reset_peak_rss():
+        raise err.InvalidArgumentError(
+            'Peak RSS can not be measured per trial in reused worker '
+            'processes on this system, use --tracemalloc')
+    if args.resume and args.checkpoint is None:
+        raise err.InvalidArgumentError('Resume requires checkpoint file')
+    if args.cache_max_age < 0 or args.cache_max_size < 0:
+        raise err.InvalidArgumentError('Cache limit is a negative number')
+    if args.input_max_size < 0:
+        raise err.InvalidArgumentError('Input cache limit is a negative '
+                                       'number')
+    if args.plotfile is not None and \
+            splitext(args.plotfile)[1] not in PLOT_FORMATS:
+        raise err.InvalidArgumentError('Unsupported plot file format')
+    if args.output is not None and args.output_format is None:
+        raise err.InvalidArgumentError('Output file given without format')
+    if args.bootstrap < 0:
+        raise err.InvalidArgumentError('Bootstrap is a negative number')
+    if not 0 < args.level < 1:
+        raise err.InvalidArgumentError('Level is not between 0 and 1')
+    if args.output_format == 'parquet' and find_spec('pyarrow') is None:
+        raise err.InvalidArgumentError('Parquet format requires pyarrow')
+    if args.profile_interval <= 0:
+        raise err.InvalidArgumentError('Profile interval is not positive')
+
+
+def validate_batch_args(args):
+    """Validate values/types of batch mode arguments"""
+    if not args.paths:
+        raise err.InvalidArgumentError('No code paths given')
+    validate_sweep_args(args)
+
+
+def validate_compare_args(args):
+    """Validate values/types of compare mode arguments"""
+    if not isfile(args.code):
+        raise err.InvalidArgumentError('Invalid code path')
+    if not isfile(args.baseline):
+        raise err.InvalidArgumentError('Invalid baseline path')
+    if args.timeout is not None and args.timeout < 0:
+        raise err.InvalidArgumentError('Timeout is a negative number')
+    if args.repeat is not None and args.repeat < MIN_COMPARE_REPEAT:
+        raise err.InvalidArgumentError(
+            'Compare mode needs at least {} trials for every size'.format(
+                MIN_COMPARE_REPEAT))
+    if args.jobs < 1:
+        raise err.InvalidArgumentError('Number of jobs is not positive')
+    if args.jobs > len(available_cpus()):
+        raise err.InvalidArgumentError(
+            'Number of jobs is greater than number of available CPUs')
+    if args.max_slowdown <= 0:
+        raise err.InvalidArgumentError('Max slowdown is not positive')
+    if not 0 < args.alpha < 1:
+        raise err.InvalidArgumentError('Alpha is not between 0 and 1')
+
+
+def validate_concurrency_args(args):
+    """Validate values/types of concurrency mode arguments"""
+    if not isfile(args.code):
+        raise err.InvalidArgumentError('Invalid code path')
+    if args.timeout < 1:
+        raise err.InvalidArgumentError('Timeout is not positive')
+    if args.size < 0:
+        raise err.InvalidArgumentError('Size is a negative number')
+    if args.max_concurrency < 1:
+        raise err.InvalidArgumentError('Max concurrency is not positive')
+
+
+def validate_scaling_args(args):
+    """Validate values/types of scaling mode arguments"""
+    if not isfile(args.code):
+        raise err.InvalidArgumentError('Invalid code path')
+    if args.timeout < 0:
+        raise err.InvalidArgumentError('Timeout is a negative number')
+    if args.count < 1 or args.step < 0:
+        raise err.InvalidArgumentError('Invalid sizes of problem')
+    if min(args.workers) < 1:
+        raise err.InvalidArgumentError('Worker count is not positive')
+    if len(set(args.workers)) < MIN_SCALING_LEVELS:
+        raise err.InvalidArgumentError(
+            'Speedup needs at least {} different worker counts, e.g. '
+            '--workers 1 2'.format(MIN_SCALING_LEVELS))
+    if args.repeat < 1:
+        raise err.InvalidArgumentError('Invalid number of repeats')
+    if args.warmup < 0:
+        raise err.InvalidArgumentError('Warm-up is a negative number')
+    if splitext(args.heatmap)[1] not in PLOT_FORMATS:
+        raise err.InvalidArgumentError('Unsupported heat map file format')
+
 
+def validate_selftest_args(args):
+    """Validate values/types of selftest mode arguments"""
+    if args.timeout < 1:
+        raise err.InvalidArgumentError('Timeout is not positive')
 
 if __name__ == "__main__":
     print("This is benchmike argparser")
@@ -0,0 +1,342 @@
+"""Module for benchmarking many functions in one run, targets are found in
+directories, glob patterns or modules exposing many (set_up, run) pairs
+    Classes:
+    Target
+    TargetRun
+    BatchBenchmark
+
+    Procedures:
+    target
+    decorator_arguments
+    discover_targets
+"""
+import ast
+import csv
+from glob import glob
+from math import ceil
+from multiprocessing.connection import wait
+from os.path import basename, isdir, join
+from time import perf_counter
+
+from benchmike import bigoestimator as bigoes
+from benchmike import exceptions as err
+from benchmike import measurement as mm
+from benchmike.benchmark import (BenchmarkOptions, CodeBenchmark, Worker,
+                                 available_cpus, WORKER_GRACE_PERIOD)
+from benchmike.customlogger import CustomLogger, LOGGER_NAME
+from benchmike.schedulers import get_scheduler
+
+TARGET_ATTRIBUTE = '__benchmike_target__'
+TARGET_DECORATOR = 'target'
+RUN_PREFIX = 'run_'
+SET_UP_PREFIX = 'set_up_'
+MIN_TARGET_TIMEOUT = 1
+REPORT_FIELDS = ('target', 'path', 'points', 'verdict', 'coefficients',
+                 'error')
+
+
+def target(name=None, set_up=None):
+    """Decorator registering function as benchmark target run(size),
+    set_up is function or name of function called before it"""
+
+    def register(function):
+        setattr(function, TARGET_ATTRIBUTE, (name, set_up))
+        return function
+
+    return register
+
+
+class Target:
+    """Pair of set up and run functions defined in file"""
+
+    def __init__(self, name, path, set_up_name, run_name):
+        self.name = name
+        self.path = path
+        self.set_up_name = set_up_name
+        self.run_name = run_name
+
+    def __repr__(self):
+        return 'Target({}, {}, {}, {})'.format(
+            self.name, self.path, self.set_up_name, self.run_name)
+
+
+def find_files(spec):
+    """Return sorted list of .py files in directory, matching glob pattern or
+    spec itself if it is a path of file"""
+    if isdir(spec):
+        return sorted(path for path in glob(join(spec, '*.py'))
+                      if not basename(path).startswith('_'))
+    if any(char in spec for char in '*?['):
+        return sorted(glob(spec, recursive=True))
+    return [spec]
+
+
+def decorator_arguments(decorator):
+    """Return tuple (name, set_up) given to target decorator node, None if
+    node is not target decorator. Only literal names and names of functions
+    are understood, anything else is None"""
+    call = decorator if isinstance(decorator, ast.Call) else None
+    function = call.func if call is not None else decorator
+    if not (isinstance(function, ast.Name) and
+            function.id == TARGET_DECORATOR or
+            isinstance(function, ast.Attribute) and
+            function.attr == TARGET_DECORATOR):
+        return None
+    arguments = dict(zip(('name', 'set_up'), call.args if call else ()))
+    arguments.update((keyword.arg, keyword.value)
+                     for keyword in (call.keywords if call else ()))
+    values = []
+    for key in ('name', 'set_up'):
+        node = arguments.get(key)
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            values.append(node.value)
+        elif isinstance(node, ast.Name):
+            values.append(node.id)
+        else:
+            values.append(None)
+    return tuple(values)
+
+
+def find_targets(path):
+    """Return targets defined in file: functions registered with target
+    decorator, otherwise run_<name> functions with optional set_up_<name>,
+    otherwise set_up and run pair. File is parsed, not executed, so only
+    functions defined at its top level are found"""
+    with open(path) as file:
+        tree = ast.parse(file.read(), path)
+    functions = [node for node in tree.body if isinstance(
+        node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    names = {function.name for function in functions}
+    targets = []
+    for function in functions:
+        for decorator in function.decorator_list:
+            arguments = decorator_arguments(decorator)
+            if arguments is not None:
+                label, set_up = arguments
+                targets.append(Target(
+                    label or '{}:{}'.format(path, function.name), path,
+                    set_up, function.name))
+    if targets:
+        return targets
+    for function in functions:
+        if function.name.startswith(RUN_PREFIX):
+            suffix = function.name[len(RUN_PREFIX):]
+            set_up = SET_UP_PREFIX + suffix
+            if set_up not in names:
+                set_up = 'set_up' if 'set_up' in names else None
+            targets.append(Target('{}:{}'.format(path, suffix), path, set_up,
+                                  function.name))
+    if not targets and 'run' in names:
+        targets.append(Target(path, path, 'set_up', 'run'))
+    return targets
+
+
+def discover_targets(specs):
+    """Return targets from all files given by list of paths, directories and
+    glob patterns"""
+    targets = []
+    for spec in specs:
+        for path in find_files(spec):
+            targets.extend(find_targets(path))
+    return targets
+
+
+class TargetRun:
+    """Sweep of single target in persistent worker pinned to CPU of batch
+    pool, sizes are sent one at a time until scheduler, online estimator or
+    budget of target ends it"""
+
+    def __init__(self, index, benchmark, scheduler, estimator, cpu, budget):
+        self.index = index
+        self.benchmark = benchmark
+        self.scheduler = scheduler
+        self.estimator = estimator
+        self.cpu = cpu
+        self.worker = Worker(benchmark, cpu)
+        self.deadline = perf_counter() + budget
+
+    def send_next(self):
+        """Send next size to worker, returns False if sweep is over"""
+        time_left = self.deadline - perf_counter()
+        if time_left <= 0:
+            return False
+        size = self.scheduler.next_size(self.benchmark.measurements,
+                                        time_left)
+        if size is None:
+            return False
+        # alarm takes whole seconds, zero would disable it
+        self.worker.send(size, ceil(time_left))
+        return True
+
+    def receive(self):
+        """Save measurement of size sent last, returns False if sweep is
+        over, raises BenchmarkRuntimeError if target failed"""
+        try:
+            data_point = self.benchmark.unpack_result(self.worker.receive(0))
+        except err.FunTimeoutError:
+            return False
+        except err.FunctionsNotFoundError as ex:
+            raise err.BenchmarkRuntimeError(ex.message)
+        except RuntimeError as ex:
+            raise err.BenchmarkRuntimeError(
+                "Caught other type of runtime error: {}".format(ex))
+        self.benchmark.measurements.append(data_point[1])
+        return not self.benchmark.stop_early(self.estimator, data_point[1])
+
+    def result(self):
+        """Return measurements of target sorted by size"""
+        return sorted(self.benchmark.measurements,
+                      key=lambda measurement: measurement.size)
+
+
+class BatchBenchmark:
+    """Class running benchmarks of many targets within global time budget.
+    Targets are measured in a single pool of jobs persistent workers, each
+    pinned to its own CPU, worker of finished target is replaced by worker
+    of the next one. Every started target gets equal share of the remaining
+    budget"""
+
+    logger = CustomLogger(LOGGER_NAME)
+
+    def __init__(self, targets, timeout, jobs=1, options=None, step=100,
+                 start=100, count=100, schedule='linear', factor=2.0,
+                 statistic=mm.DEFAULT_STATISTIC, early_stop=False,
+                 evidence=bigoes.EVIDENCE_LEAD):
+        self.targets = targets
+        self.timeout = timeout
+        self.jobs = min(jobs, len(available_cpus()))
+        # targets are measured in the pool of persistent workers
+        self.options = (options or BenchmarkOptions())._replace(
+            persistent=True)
+        self.sweep = step, start, count
+        self.schedule = schedule
+        self.factor = factor
+        self.statistic = statistic
+        self.early_stop = early_stop
+        self.evidence = evidence
+        self.results = {}
+
+    def start_target(self, index, cpu, budget):
+        """Start sweep of target on cpu, returns TargetRun or None if target
+        could not be started or has nothing to measure"""
+        bench_target = self.targets[index]
+        step, start, count = self.sweep
+        try:
+            benchmark = CodeBenchmark(bench_target.path, budget,
+                                      self.options,
+                                      set_up_name=bench_target.set_up_name,
+                                      run_name=bench_target.run_name)
+        except Exception as ex:
+            self.finish(index, err.BenchmarkRuntimeError(repr(ex)))
+            return None
+        scheduler = get_scheduler(self.schedule, start, step, count,
+                                  self.factor, self.statistic)
+        estimator = bigoes.OnlineComplexityEstimator(
+            self.statistic, self.evidence) if self.early_stop else None
+        target_run = TargetRun(index, benchmark, scheduler, estimator, cpu,
+                               budget)
+        self.logger.log("Started target {} with {:.2f} s on cpu {}".format(
+            bench_target.name, budget, cpu))
+        return self.advance(target_run, False)
+
+    def advance(self, target_run, received=True):
+        """Collect result of target_run if it was received and send next
+        size, returns target_run or None if its sweep is over"""
+        try:
+            if (not received or target_run.receive()) and \
+                    target_run.send_next():
+                return target_run
+            result = target_run.result()
+        except err.BenchmarkRuntimeError as ex:
+            result = ex
+        target_run.worker.stop()
+        self.finish(target_run.index, result)
+        return None
+
+    def run(self):
+        """Benchmark all targets, returns dict target name -> measurements or
+        exception"""
+        deadline = perf_counter() + self.timeout
+        pending = list(range(len(self.targets)))
+        cpus = available_cpus()[:self.jobs]
+        running = {}
+        try:
+            while pending or running:
+                while pending and cpus:
+                    time_left = deadline - perf_counter()
+                    share = time_left * self.jobs / (len(pending) +
+                                                     len(running))
+                    budget = min(share, time_left)
+                    if budget < MIN_TARGET_TIMEOUT:
+                        for index in pending:
+                            self.finish(index, err.FunTimeoutError(
+                                "Global time budget exceeded"))
+                        pending = []
+                        break
+                    cpu = cpus.pop(0)
+                    target_run = self.start_target(pending.pop(0), cpu,
+                                                   budget)
+                    if target_run is None:
+                        cpus.append(cpu)
+                    else:
+                        running[target_run.worker.connection] = target_run
+                if not running:
+                    break
+                ready = wait(list(running), max(deadline - perf_counter(),
+                                                0) + WORKER_GRACE_PERIOD)
+                if not ready:
+                    break
+                for connection in ready:
+                    target_run = running.pop(connection)
+                    if self.advance(target_run) is None:
+                        cpus.append(target_run.cpu)
+                    else:
+                        running[target_run.worker.connection] = target_run
+        finally:
+            for target_run in running.values():
+                target_run.worker.stop(force=True)
+                measurements = target_run.result()
+                self.finish(target_run.index, measurements or
+                            err.FunTimeoutError("Global time budget exceeded"))
+        return self.results
+
+    def finish(self, index, result):
+        """Save result of target"""
+        name = self.targets[index].name
+        self.results[name] = result
+        self.logger.log("Finished target {}: {}".format(name, result))
+
+    def report(self):
+        """Return list of dicts with verdict for every target"""
+        rows = []
+        for bench_target in self.targets:
+            row = dict.fromkeys(REPORT_FIELDS, '')
+            row.update(target=bench_target.name, path=bench_target.path)
+            result = self.results.get(bench_target.name)
+            if isinstance(result, Exception):
+                row['error'] = getattr(result, 'message', repr(result))
+            elif result:
+                row['points'] = len(result)
+                verdict = bigoes.ComplexityEstimator(
+                    mm.to_points(result, self.statistic)).verdict()
+                if verdict is None:
+                    row['error'] = 'Not enough data points'
+                else:
+                    row.update(verdict=verdict[0].describe(verdict[1]),
+                               coefficients=' '.join(
+                                   str(value) for value in verdict[1]))
+            rows.append(row)
+        return rows
+
+    def save_report(self, filename):
+        """Print consolidated report and save it as CSV file"""
+        rows = self.report()
+        print("Batch report, {} targets".format(len(rows)))
+        for row in rows:
+            print("{}: {}".format(row['target'], row['verdict'] or
+                                  row['error']))
+        with open(filename, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print("Successfully written to {}".format(filename))
@@ -1,111 +1,860 @@
 """Module for running function evaluations in separate processes and measuring
 time
     Classes:
+    BenchmarkOptions
     CodeBenchmark
-"""
+    GcMonitor
+    Worker
 
-from multiprocessing import Process, Queue
+    Procedures:
+    available_cpus
+    no_run
+    new_event_loop
+    read_peak_rss
+    reset_peak_rss
+    run_on_loop
+"""
+import gc
+import json
+import marshal
+import os
+import sys
+import tracemalloc
+from collections import namedtuple
+from contextlib import nullcontext
+from hashlib import sha256
+from inspect import iscoroutinefunction
+from math import ceil, log
+from multiprocessing import Pipe, Process, Queue
+from multiprocessing.connection import wait
+from resource import getrusage, RUSAGE_SELF
 from signal import signal, alarm, SIGALRM
-from time import time
+from statistics import median
+from time import perf_counter, perf_counter_ns
 
 from benchmike import exceptions as err
+from benchmike.checkpoint import Checkpoint
 from benchmike.customlogger import CustomLogger, LOGGER_NAME
+from benchmike.environment import get_fingerprint
+from benchmike.inputs import (InputCache, DEFAULT_INPUT_DIR, DEFAULT_SEED,
+                              MAKE_INPUT_NAME)
+from benchmike.measurement import Measurement
+from benchmike.profiler import (profile_run, MIN_PROFILE_TIME,
+                                PROFILE_SLOWDOWN)
+from benchmike.schedulers import LinearScheduler
+from benchmike.timers import Timer, MAX_INNER_LOOP
+
+CODE_MODULE_NAME = '__benchmike__'
+WORKER_GRACE_PERIOD = 1
+PARALLEL_CHECK_SIZES = 3
+PARALLEL_TOLERANCE = 1.2
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+# enable leaves garbage collector as it is, disable turns it off while run()
+# is timed, collect does full collection before every trial
+GC_MODES = ('enable', 'disable', 'collect')
+DEFAULT_GC_MODE = 'enable'
+# megabytes
+DEFAULT_INPUT_MAX_SIZE = 1024
+FLOOR_SAMPLES = 5
+# writing 5 resets peak RSS (VmHWM) of the process, Linux 4.0 and later
+CLEAR_REFS_PATH = '/proc/self/clear_refs'
+STATUS_PATH = '/proc/self/status'
+# settings of CodeBenchmark: persistent measures sizes in one worker process
+# restarted only after timeout or crash, jobs > 1 spreads them over that many
+# persistent workers pinned to own CPUs (capped at available CPUs). Every size
+# is measured at least repeat times, with max_rse until relative standard
+# error of run time drops below it or max_repeat trials are made, first
+# warmup trials are discarded. clock is primary clock of Timer, calibrate
+# repeats too short run calls in inner loop. gc_mode is one of GC_MODES,
+# subtract_floor subtracts harness floor from run_time. trace_memory records
+# tracemalloc_peak, counters records perf event counters. Inputs made by
+# make_input(size, seed) are cached in input_dir up to input_max_size
+# megabytes, copy_input gives every trial its own copy. Measurements are
+# flushed to checkpoint path if given, resume continues from them.
+BenchmarkOptions = namedtuple(
+    'BenchmarkOptions',
+    ['persistent', 'repeat', 'max_rse', 'max_repeat', 'clock',
+     'extra_clocks', 'calibrate', 'jobs', 'trace_memory', 'warmup',
+     'gc_mode', 'subtract_floor', 'counters', 'input_dir', 'seed',
+     'copy_input', 'checkpoint', 'resume', 'input_max_size'],
+    defaults=(False, 1, None, 100, 'perf_counter', ('process_time',), True,
+              1, False, 0, DEFAULT_GC_MODE, True, False, DEFAULT_INPUT_DIR,
+              DEFAULT_SEED, False, None, False, DEFAULT_INPUT_MAX_SIZE))
+
+
+def no_set_up(size):
+    """Set up used for code without set_up function"""
+
+
+def no_run(size, *args):
+    """Empty run used for measuring harness floor"""
+
+
+def reset_peak_rss():
+    """Reset peak RSS of this process to its current RSS, returns False if
+    it is not supported"""
+    try:
+        with open(CLEAR_REFS_PATH, 'w') as file:
+            file.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def read_peak_rss():
+    """Return peak RSS of this process in bytes since the last
+    reset_peak_rss, None if it is not known"""
+    try:
+        with open(STATUS_PATH) as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def available_cpus():
+    """Return sorted list of CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def new_event_loop():
+    """Return new event loop, uvloop one if uvloop is installed"""
+    try:
+        import uvloop
+    except ImportError:
+        import asyncio
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+
+def run_on_loop(function, loop):
+    """Return function itself if it is synchronous, for coroutine function
+    return synchronous function running it to completion on loop, all
+    arguments are passed to coroutine function"""
+    if not iscoroutinefunction(function):
+        return function
+
+    def run_until_complete(*args, **kwargs):
+        return loop.run_until_complete(function(*args, **kwargs))
+
+    return run_until_complete
+
+
+class GcMonitor:
+    """Counts garbage collections, objects collected by them and time in
+    seconds they took using gc.callbacks, active within with statement"""
+
+    def __init__(self):
+        self.collections = 0
+        self.collected = 0
+        self.time = 0.0
+        self.start_ns = None
+
+    def __enter__(self):
+        gc.callbacks.append(self.callback)
+        return self
+
+    def __exit__(self, *exc_info):
+        gc.callbacks.remove(self.callback)
+
+    def callback(self, phase, info):
+        """Called by garbage collector at start and stop of collection"""
+        if phase == 'start':
+            self.start_ns = perf_counter_ns()
+        elif self.start_ns is not None:
+            self.time += (perf_counter_ns() - self.start_ns) / 1e9
+            self.collections += 1
+            self.collected += info['collected']
+            self.start_ns = None
+
+    def reset(self):
+        """Forget collections seen so far"""
+        self.collections = self.collected = 0
+        self.time = 0.0
 
 
 class CodeBenchmark:
-    """Class for measuring time of execution of function evaluation"""
+    """Class for measuring time of execution of function evaluation at
+    growing sizes within timeout, settings are given as BenchmarkOptions.
+    Sizes already measured for the same code, settings and environment are
+    taken from cache if it is given"""
 
     logger = CustomLogger(LOGGER_NAME)
 
-    def __init__(self, path, timeout):
+    def __init__(self, path, timeout, options=None, cache=None,
+                 set_up_name='set_up', run_name='run'):
+        options = options or BenchmarkOptions()
+        self.options = options
         self.measurements = []
         self.timeout = timeout
+        self.persistent = options.persistent
+        self.repeat = options.repeat
+        self.max_rse = options.max_rse
+        self.max_repeat = options.max_repeat
+        self.timer = Timer(options.clock, options.extra_clocks)
+        self.calibrate = options.calibrate
+        # more workers than CPUs would share cores and slow each other down
+        self.jobs = min(options.jobs, len(available_cpus()))
+        self.reuses_processes = self.persistent or self.jobs > 1
+        self.trace_memory = options.trace_memory
+        self.cache = cache
+        self.checkpoint_path = options.checkpoint
+        self.checkpoint = None
+        self.resume = options.resume
+        # size -> (measurement, time budget used until it was taken)
+        self.resumed = {}
+        self.warmup = options.warmup
+        self.gc_mode = options.gc_mode
+        self.gc_monitor = GcMonitor()
+        self.spans = []
+        self.subtract_floor = options.subtract_floor
+        self.call_floor = self.measure_call_floor() \
+            if options.subtract_floor else 0.0
+        self.counters = self.open_counters() if options.counters \
+            else None
+        self.set_up_name = set_up_name
+        self.run_name = run_name
         self.queue = Queue()
+        self.worker = None
         with open(path) as file:
             self.code = compile(file.read(), path, 'exec')
+        self.code_hash = sha256(marshal.dumps(self.code)).hexdigest()
+        self.fingerprint = get_fingerprint()
+        self.inputs = InputCache(options.input_dir, self.code_hash,
+                                 options.seed,
+                                 options.input_max_size * 1024 * 1024)
+        self.copy_input = options.copy_input
         self.logger.log(
-            "Started with path {}, timeout {}".format(path, timeout))
+            "Started with path {}, timeout {}, persistent {}".format(
+                path, timeout, self.persistent))
 
-    def run_benchmark(self, step, start, count):
+    def run_benchmark(self, step, start, count, scheduler=None,
+                      estimator=None):
         """Runs benchmark, saves data points to self.measurements, returns
-        measurements"""
-        size = start
-        passes_to_make = count
+        measurements sorted by size, sizes are chosen by scheduler, linear
+        one with given start, step and count by default. Online estimator is
+        updated after every measurement and stops benchmark as soon as its
+        verdict is significant"""
+        if scheduler is None:
+            scheduler = LinearScheduler(start, step, count)
+        resumed_time = self.open_checkpoint()
+        if self.jobs > 1:
+            return self.run_parallel(scheduler, estimator, resumed_time)
+        # resumed sizes are replayed with budget used as it was when they
+        # were taken, so scheduler and estimator rebuild the same state
+        time_elapsed = 0.0
         pass_count = 0
-        time_left = time_elapsed = 0.0
-        while time_elapsed < self.timeout and pass_count < passes_to_make:
-            try:
-                time_left = int(self.timeout - time_elapsed)
-                if time_left == 0:
+        time_left = 0.0
+        finished = False
+        try:
+            while time_elapsed < self.timeout:
+                try:
+                    time_left = int(self.timeout - time_elapsed)
+                    if time_left == 0:
+                        break
+                    size = scheduler.next_size(self.measurements,
+                                               self.timeout - time_elapsed)
+                    if size is None:
+                        break
+                    if size in self.resumed:
+                        measurement, taken = self.resumed.pop(size)
+                        time_elapsed = max(time_elapsed, taken)
+                        data_point = size, measurement, 0.0
+                    else:
+                        # schedule left the resumed one, charge all of it
+                        time_elapsed = max(time_elapsed, resumed_time)
+                        time_left = int(self.timeout - time_elapsed)
+                        if time_left <= 0:
+                            break
+                        data_point = self.cached_measurement(size,
+                                                             time_elapsed)
+                    if data_point is None:
+                        data_point = self.make_measurement(size, time_left)
+                        time_elapsed += data_point[2]
+                        self.store_measurement(data_point[1], time_elapsed)
+                    self.measurements.append(data_point[1])
+                    pass_count += 1
+                    if self.stop_early(estimator, data_point[1]):
+                        break
+                except err.FunTimeoutError:
+                    print("Finished benchmarking")
+                    self.logger.log(
+                        "Benchmark timeouted at {} passes".format(pass_count))
                     break
-                data_point = self.make_measurement(size, time_left)
-                time_elapsed += data_point[2]
-                self.measurements.append((data_point[0], data_point[1]))
-                size += step
-                pass_count += 1
-            except err.FunTimeoutError:
-                print("Finished benchmarking")
-                self.logger.log(
-                    "Benchmark timeouted at {} passes".format(pass_count))
-                break
-            except err.FunctionsNotFoundError as ex:
-                raise err.BenchmarkRuntimeError(ex.message)
-            except RuntimeError:
-                raise err.BenchmarkRuntimeError(
-                    "Caught other type of runtime error")
-            except Exception as ex:
-                raise err.BenchmarkRuntimeError(repr(ex))
+                except err.FunctionsNotFoundError as ex:
+                    raise err.BenchmarkRuntimeError(ex.message)
+                except RuntimeError as ex:
+                    raise err.BenchmarkRuntimeError(
+                        "Caught other type of runtime error: {}".format(ex))
+                except Exception as ex:
+                    raise err.BenchmarkRuntimeError(repr(ex))
+            finished = True
+        finally:
+            if self.worker is not None:
+                self.worker.stop()
+                self.worker = None
+            self.close_checkpoint(finished)
+        self.measurements.sort(key=lambda measurement: measurement.size)
         self.logger.log(
             "Finished benchmarking with {} passes and {} s left".format(
                 pass_count, time_left))
         return self.measurements
 
+    def run_parallel(self, scheduler, estimator=None, time_elapsed=0.0):
+        """Runs benchmark of sizes from scheduler in parallel workers, saves
+        data points to self.measurements in size order, returns
+        measurements, time_elapsed is budget already used"""
+        cpus = available_cpus()
+        workers = [Worker(self, cpu) for cpu in cpus[:self.jobs]]
+        idle = list(workers)
+        busy = {}
+        results = {}
+        deadline = perf_counter() + self.timeout - time_elapsed
+        timed_out = exhausted = finished = False
+        try:
+            while not exhausted or busy:
+                time_left = int(deadline - perf_counter())
+                while (idle and not exhausted and not timed_out and
+                       time_left > 0):
+                    size = scheduler.next_size(list(results.values()),
+                                               deadline - perf_counter())
+                    if size is None:
+                        exhausted = True
+                        break
+                    data_point = self.cached_measurement(
+                        size, self.timeout - (deadline - perf_counter()))
+                    if data_point is not None:
+                        results[size] = data_point[1]
+                        exhausted = self.stop_early(estimator, data_point[1])
+                        continue
+                    worker = idle.pop()
+                    worker.send(size, time_left)
+                    busy[worker.connection] = worker
+                if timed_out or time_left <= 0:
+                    exhausted = True
+                if not busy:
+                    break
+                ready = wait(list(busy), max(deadline - perf_counter(), 0) +
+                             WORKER_GRACE_PERIOD)
+                if not ready:
+                    timed_out = True
+                    break
+                for connection in ready:
+                    worker = busy.pop(connection)
+                    try:
+                        data_point = self.unpack_result(worker.receive(0))
+                        results[data_point[0]] = data_point[1]
+                        self.store_measurement(
+                            data_point[1],
+                            self.timeout - (deadline - perf_counter()))
+                        if self.stop_early(estimator, data_point[1]):
+                            exhausted = True
+                    except err.FunTimeoutError:
+                        timed_out = True
+                    except err.FunctionsNotFoundError as ex:
+                        raise err.BenchmarkRuntimeError(ex.message)
+                    except RuntimeError as ex:
+                        raise err.BenchmarkRuntimeError(
+                            "Caught other type of runtime error: "
+                            "{}".format(ex))
+                    idle.append(worker)
+            finished = True
+        finally:
+            for worker in workers:
+                worker.stop(force=worker.connection in busy)
+            self.close_checkpoint(finished)
+        if timed_out:
+            print("Finished benchmarking")
+            self.logger.log("Benchmark timeouted at {} passes".format(
+                len(results)))
+        self.measurements.extend(results[size] for size in sorted(results))
+        self.check_parallel(deadline, cpus[0])
+        self.logger.log(
+            "Finished parallel benchmarking with {} passes in {} jobs".format(
+                len(results), self.jobs))
+        return self.measurements
+
+    def run_grid(self, sizes, workers):
+        """Runs benchmark of run(size, workers) for every size and every
+        worker count, sizes are measured in order with all worker counts
+        until time budget is used, returns dict (size, workers) ->
+        measurement"""
+        grid = {}
+        time_elapsed = 0.0
+        try:
+            for size in sizes:
+                for count in workers:
+                    time_left = int(self.timeout - time_elapsed)
+                    if time_left <= 0:
+                        raise err.FunTimeoutError(
+                            "Global time budget exceeded")
+                    data_point = self.make_measurement(size, time_left,
+                                                       (count,))
+                    time_elapsed += data_point[2]
+                    grid[size, count] = data_point[1]
+        except err.FunTimeoutError:
+            print("Finished benchmarking")
+            self.logger.log("Grid benchmark timeouted at {} cells".format(
+                len(grid)))
+        except err.FunctionsNotFoundError as ex:
+            raise err.BenchmarkRuntimeError(ex.message)
+        except RuntimeError as ex:
+            raise err.BenchmarkRuntimeError(
+                "Caught other type of runtime error: {}".format(ex))
+        finally:
+            if self.worker is not None:
+                self.worker.stop()
+                self.worker = None
+        return grid
+
+    def run_profiles(self, sizes, profiler, interval, prefix):
+        """Profile run(size) of every measured size in separate process,
+        after the benchmark and outside of its time budget. Timeout of each
+        profile is PROFILE_SLOWDOWN times the longest trial of the size.
+        Returns dict size -> dict function -> share of self time, sizes
+        which timed out are skipped"""
+        measured = {measurement.size: measurement
+                    for measurement in self.measurements}
+        profiles = {}
+        for size in sizes:
+            trial_time = max(
+                trial.get('set_up_time', 0.0) + trial['run_time']
+                for trial in measured[size].trials)
+            timeout = ceil(PROFILE_SLOWDOWN * trial_time + MIN_PROFILE_TIME)
+            process = Process(target=self.profile_code,
+                              args=(size, timeout, profiler, interval,
+                                    prefix))
+            process.start()
+            result = self.queue.get()
+            process.join()
+            if isinstance(result[1], err.FunTimeoutError):
+                self.logger.log("Profile of size {} timeouted".format(size))
+                continue
+            if isinstance(result[1], Exception):
+                raise err.BenchmarkRuntimeError(
+                    "Profiling failed: {}".format(result[1]))
+            profiles[size] = result[1]
+        return profiles
+
+    def check_parallel(self, deadline, cpu):
+        """Re-measure a few sizes in single worker and warn if parallel
+        results differ systematically, e.g. due to memory bandwidth
+        contention"""
+        if not self.measurements:
+            return
+        last = len(self.measurements) - 1
+        indices = sorted({last * i // max(PARALLEL_CHECK_SIZES - 1, 1)
+                          for i in range(PARALLEL_CHECK_SIZES)})
+        worker = Worker(self, cpu)
+        ratios = []
+        try:
+            for index in indices:
+                time_left = int(deadline - perf_counter())
+                if time_left <= 0:
+                    break
+                parallel = self.measurements[index]
+                worker.send(parallel.size, time_left)
+                result = worker.receive(time_left + WORKER_GRACE_PERIOD)
+                if isinstance(result[1], Exception):
+                    break
+                serial = result[1].median()
+                if serial > 0:
+                    ratios.append(parallel.median() / serial)
+        finally:
+            worker.stop()
+        if not ratios:
+            self.logger.log("Not enough time left to check parallel results")
+            return
+        ratio = median(ratios)
+        self.logger.log("Parallel to serial run time ratio {}".format(ratio))
+        if abs(log(ratio)) > log(PARALLEL_TOLERANCE):
+            print("Warning: parallel run times differ from serial ones by "
+                  "factor {:.2f}, consider running with fewer jobs".format(
+                      ratio))
+
+    def cache_key(self):
+        """Return tuple (code hash, settings, environment fingerprint)
+        identifying measurements in cache"""
+        settings = json.dumps([self.repeat, self.max_rse, self.max_repeat,
+                               self.timer.names, self.calibrate, self.jobs,
+                               self.trace_memory, self.warmup,
+                               self.gc_mode, self.subtract_floor,
+                               self.counters is not None,
+                               self.inputs.seed, self.copy_input,
+                               self.persistent, self.set_up_name,
+                               self.run_name,
+                               os.path.abspath(self.inputs.directory)])
+        return self.code_hash, settings, self.fingerprint
+
+    def cached_measurement(self, size, time_elapsed):
+        """Return tuple (size, measurement, 0.0) from resumed checkpoint or
+        cache, None if size was not measured before"""
+        if size in self.resumed:
+            return size, self.resumed.pop(size)[0], 0.0
+        if self.cache is None:
+            return None
+        measurement = self.cache.get(self.cache_key(), size)
+        if measurement is None:
+            return None
+        self.logger.log("Size {} taken from cache".format(size))
+        if self.checkpoint is not None:
+            self.checkpoint.save(measurement, time_elapsed)
+        return size, measurement, 0.0
+
+    def store_measurement(self, measurement, time_elapsed):
+        """Save measurement in cache and checkpoint if they are used"""
+        if self.cache is not None:
+            self.cache.put(self.cache_key(), measurement)
+        if self.checkpoint is not None:
+            self.checkpoint.save(measurement, time_elapsed)
+
+    def open_checkpoint(self):
+        """Open checkpoint if it is used, returns time budget used by resumed
+        benchmark"""
+        if self.checkpoint_path is None:
+            return 0.0
+        self.checkpoint = Checkpoint(self.checkpoint_path, self.cache_key())
+        entries = self.checkpoint.open(self.resume)
+        self.resumed = {measurement.size: (measurement, time_elapsed)
+                        for measurement, time_elapsed in entries}
+        if not entries:
+            return 0.0
+        time_elapsed = max(entry[1] for entry in entries)
+        print("Resuming benchmark with {} sizes measured and {:.1f} s "
+              "used".format(len(entries), time_elapsed))
+        return time_elapsed
+
+    def close_checkpoint(self, finished):
+        """Close checkpoint, it is removed if benchmark was finished"""
+        if self.checkpoint is not None:
+            self.checkpoint.close(finished)
+
+    def stop_early(self, estimator, measurement):
+        """Update online estimator with measurement, check if benchmark can
+        be finished"""
+        if estimator is None:
+            return False
+        estimator.add_measurement(measurement)
+        if estimator.is_significant():
+            print("Finished benchmarking, verdict is significant")
+            self.logger.log("Benchmark stopped early at {} passes".format(
+                estimator.count))
+            return True
+        return False
+
     @staticmethod
     def signal_handler(signum, frame):
         """Signal handler for run_code"""
         raise err.FunTimeoutError("Timeout error: process was too slow")
 
-    def run_code(self, size, timeout):
+    def load_code(self):
+        """Execute benchmarked code and return namespace with its globals"""
+        namespace = {'__name__': CODE_MODULE_NAME}
+        start_ns = perf_counter_ns()
+        exec(self.code, namespace)
+        self.logger.span('exec', start_ns, perf_counter_ns())
+        return namespace
+
+    def enough_trials(self, measurement):
+        """Check whether measurement has required number of trials"""
+        if measurement.repeats < self.repeat:
+            return False
+        if self.max_rse is None or measurement.repeats >= self.max_repeat:
+            return True
+        return measurement.relative_standard_error() <= self.max_rse
+
+    def time_run(self, run, size, number=1, args=()):
+        """Call run(size, *args) number times, returns readings of clocks at
+        start and end"""
+        start = self.timer.start()
+        for _ in range(number):
+            run(size, *args)
+        end = self.timer.stop()
+        return start, end
+
+    def measure_call_floor(self):
+        """Return time in seconds of single call of empty run in inner loop
+        long enough for the resolution of clocks, cost of reading clocks
+        excluded"""
+        number = 1
+        while number < MAX_INNER_LOOP and self.timer.needs_calibration(
+                self.timer.seconds(*self.time_run(no_run, 0, number))):
+            number *= 10
+        call_time = min(self.timer.seconds(*self.time_run(no_run, 0, number),
+                                           number)
+                        for _ in range(FLOOR_SAMPLES))
+        return max(call_time - self.timer.overhead / number, 0.0)
+
+    def open_counters(self):
+        """Return Counters of perf events which can be opened on this
+        machine, reports the ones which can not"""
+        from benchmike.counters import Counters, available_events
+        names, error = available_events()
+        if error is not None:
+            print("Some hardware counters are not available: {}".format(
+                error))
+            self.logger.log("Perf events available: {}, error {}".format(
+                names, error))
+        return Counters(names)
+
+    def harness_floor(self, number=1):
+        """Return cost of harness included in run_time of single call when
+        run is called number times in inner loop"""
+        if not self.subtract_floor:
+            return 0.0
+        return self.timer.overhead / number + self.call_floor
+
+    def run_trial(self, set_up, run, size, number=1, args=()):
+        """Run set_up(size) once and run(size, *args) number times, returns
+        dict of metrics per single run call, set_up metrics are per trial,
+        times are in seconds"""
+        if self.gc_mode == 'collect':
+            gc.collect()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_memory = tracemalloc.get_traced_memory()[0]
+        rss_reset = reset_peak_rss()
+        self.gc_monitor.reset()
+        set_up_start_ns = perf_counter_ns()
+        set_up(size)
+        set_up_end_ns = perf_counter_ns()
+        set_up_gc_time = self.gc_monitor.time
+        set_up_collections = self.gc_monitor.collections
+        set_up_collected = self.gc_monitor.collected
+        gc_enabled = gc.isenabled()
+        if self.gc_mode == 'disable':
+            gc.disable()
+        try:
+            if self.counters is not None:
+                counters_start = self.counters.read()
+            run_start_ns = perf_counter_ns()
+            start, end = self.time_run(run, size, number, args)
+            run_end_ns = perf_counter_ns()
+            if self.counters is not None:
+                counters_end = self.counters.read()
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.spans.append(('set_up', set_up_start_ns, set_up_end_ns, 1))
+        self.spans.append(('run', run_start_ns, run_end_ns, number))
+        trial = self.timer.elapsed(start, end, number)
+        raw_run_time = self.timer.seconds(start, end, number)
+        floor = self.harness_floor(number)
+        trial.update(run_time=max(raw_run_time - floor,
+                                  self.timer.resolution / number),
+                     raw_run_time=raw_run_time,
+                     harness_floor=floor,
+                     set_up_time=(set_up_end_ns - set_up_start_ns) / 1e9,
+                     number=number,
+                     set_up_gc_time=set_up_gc_time,
+                     gc_time=(self.gc_monitor.time - set_up_gc_time) / number,
+                     set_up_gc_collections=set_up_collections,
+                     set_up_gc_collected=set_up_collected,
+                     gc_collections=(self.gc_monitor.collections -
+                                     set_up_collections) / number,
+                     gc_collected=(self.gc_monitor.collected -
+                                   set_up_collected) / number)
+        if rss_reset:
+            trial['peak_rss'] = read_peak_rss()
+        elif not self.reuses_processes:
+            trial['peak_rss'] = getrusage(RUSAGE_SELF).ru_maxrss * RSS_UNIT
+        if self.trace_memory:
+            trial['tracemalloc_peak'] = (tracemalloc.get_traced_memory()[1] -
+                                         traced_memory)
+        if self.counters is not None:
+            trial.update(self.counters.deltas(counters_start, counters_end,
+                                              number))
+        return trial
+
+    def get_functions(self, namespace):
+        """Return tuple (set_up, run) of benchmarked functions found in
+        namespace, None for missing ones, set_up is optional for code with
+        make_input"""
+        set_up = namespace.get(self.set_up_name) if self.set_up_name else \
+            no_set_up
+        if set_up is None and callable(namespace.get(MAKE_INPUT_NAME)):
+            set_up = no_set_up
+        return set_up, namespace.get(self.run_name)
+
+    def prepare_input(self, namespace, size):
+        """Return path of cached input of size made by make_input from
+        namespace, None if code does not define it"""
+        make_input = namespace.get(MAKE_INPUT_NAME)
+        if not callable(make_input):
+            return None
+        start_ns = perf_counter_ns()
+        path = self.inputs.get(make_input, size)
+        self.logger.span('make_input', start_ns, perf_counter_ns(),
+                         size=size)
+        return path
+
+    def input_args(self, path, args, data=None):
+        """Return arguments of run after size: input loaded from path or
+        given as data, fresh copy of it with copy_input on, followed by
+        args"""
+        if path is None:
+            return args
+        if self.copy_input or data is None:
+            data = self.inputs.load(path, self.copy_input)
+        return (data,) + args
+
+    def measure(self, namespace, size, timeout, args=()):
+        """Evaluate set_up(size) and run(size, *args) from namespace,
+        returns tuple (size, measurement, full_time) or (size, exception,
+        full_time). Spans of trials are logged when measuring is over"""
+        set_up, run = self.get_functions(namespace)
+        whole_start_time = perf_counter()
+        if not callable(set_up) or not callable(run):
+            self.logger.log("File doesn't contain required methods")
+            return (size, err.FunctionsNotFoundError(
+                "Could not find {}() or {}() methods in input file".format(
+                    self.set_up_name, self.run_name)),
+                    perf_counter() - whole_start_time)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        measurement = Measurement(size)
+        number = 1
+        warmup = self.warmup
+        loop = new_event_loop() if any(
+            iscoroutinefunction(function)
+            for function in (set_up, run)) else None
+        set_up = run_on_loop(set_up, loop)
+        run = run_on_loop(run, loop)
+        self.spans = []
+        start_ns = perf_counter_ns()
+        alarm(timeout)
+        try:
+            path = self.prepare_input(namespace, size)
+            data = None if path is None or self.copy_input else \
+                self.inputs.load(path)
+            with self.gc_monitor, self.counters or nullcontext():
+                while not self.enough_trials(measurement):
+                    trial = self.run_trial(set_up, run, size, number,
+                                           self.input_args(path, args, data))
+                    if (self.calibrate and number < MAX_INNER_LOOP and
+                            self.timer.needs_calibration(
+                                trial['raw_run_time'] * number)):
+                        number *= 10
+                        continue
+                    if warmup:
+                        warmup -= 1
+                        continue
+                    measurement.add_trial(**trial)
+            alarm(0)
+            return size, measurement, perf_counter() - whole_start_time
+        except err.FunTimeoutError as ex:
+            return size, ex, perf_counter() - whole_start_time
+        except Exception as ex:
+            return size, RuntimeError(ex), perf_counter() - whole_start_time
+        finally:
+            alarm(0)
+            if loop is not None:
+                loop.close()
+            self.log_spans(start_ns, size)
+
+    def log_spans(self, start_ns, size):
+        """Log spans of trials collected by run_trial and span of whole
+        measurement of size which started at start_ns"""
+        for name, span_start_ns, span_end_ns, number in self.spans:
+            self.logger.span(name, span_start_ns, span_end_ns, size=size,
+                             number=number)
+        self.logger.span('measure', start_ns, perf_counter_ns(), size=size,
+                         trials=len(self.spans) // 2)
+        self.spans = []
+
+    def run_code(self, size, timeout, args=()):
         """This runs code in separate thread to measure time, requires
         set_up(size) and run(size) methods in code to be executed"""
         signal(SIGALRM, CodeBenchmark.signal_handler)
-        exec(self.code, globals())
+        self.queue.put(self.measure(self.load_code(), size, timeout, args))
+
+    def profile_code(self, size, timeout, profiler, interval, prefix):
+        """Runs in separate process, profiles run(size) after set_up(size)
+        and puts tuple (size, shares of functions, full_time) or (size,
+        exception, full_time) to queue"""
+        signal(SIGALRM, CodeBenchmark.signal_handler)
+        namespace = self.load_code()
+        whole_start_time = perf_counter()
+        set_up, run = self.get_functions(namespace)
+        if not callable(set_up) or not callable(run):
+            self.queue.put((size, err.FunctionsNotFoundError(
+                "Could not find {}() or {}() methods in input file".format(
+                    self.set_up_name, self.run_name)),
+                            perf_counter() - whole_start_time))
+            return
+        loop = new_event_loop() if any(
+            iscoroutinefunction(function)
+            for function in (set_up, run)) else None
         alarm(timeout)
-        whole_start_time = time()
         try:
-            exec('set_up(size)')
-            run_start_time = time()
-            exec('run(size)')
-            whole_end_time = run_end_time = time()
-            self.queue.put((size, run_end_time - run_start_time,
-                            whole_end_time - whole_start_time))
-
+            path = self.prepare_input(namespace, size)
+            args = self.input_args(path, ())
+            run_on_loop(set_up, loop)(size)
+            shares, number, filename = profile_run(
+                run_on_loop(run, loop), size, profiler, interval, prefix,
+                getattr(run, '__code__', None), args)
+            alarm(0)
+            self.logger.log("Profiled {} calls of size {}".format(number,
+                                                                  size))
+            print("Successfully written to {}".format(filename))
+            result = shares
         except err.FunTimeoutError as ex:
-            self.queue.put((size, ex, time() - whole_start_time))
-        except TypeError:
-            self.queue.put(
-                (size, err.FunctionsNotFoundError(
-                    "Could not find set_up() or run() methods in input file"),
-                 time() - whole_start_time))
-            self.logger.log("File doesn't contain required methods")
+            result = ex
         except Exception as ex:
-            self.queue.put((size, RuntimeError(ex), time() - whole_start_time))
+            result = RuntimeError(repr(ex))
+        finally:
+            alarm(0)
+            if loop is not None:
+                loop.close()
+        self.queue.put((size, result, perf_counter() - whole_start_time))
 
-    def make_measurement(self, size, timeout):
-        """This will return tuple (size, run_time, full_time) or rethrow
-        exception"""
+    def run_worker(self, connection, cpu=None):
+        """Persistent worker loop, loads code once and measures sizes received
+        through connection until None is received"""
+        if cpu is not None and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, {cpu})
+        signal(SIGALRM, CodeBenchmark.signal_handler)
+        namespace = self.load_code()
+        while True:
+            request = connection.recv()
+            if request is None:
+                break
+            connection.send(self.measure(namespace, *request))
+        connection.close()
 
-        @self.logger.log_fun
+    def make_measurement(self, size, timeout, args=()):
+        """This will return tuple (size, measurement, full_time) or rethrow
+        exception, args are passed to run after size"""
+
+        @self.logger.timed('round_trip')
         def run_process():
+            start_ns = perf_counter_ns()
             p = Process(target=self.run_code,
-                        args=(size, timeout))
+                        args=(size, timeout, args))
             p.start()
+            self.logger.span('spawn', start_ns, perf_counter_ns(), size=size)
             run_result = self.queue.get()
             p.join()
             return run_result
 
-        result = run_process()
+        @self.logger.timed('round_trip')
+        def run_in_worker():
+            if self.worker is None:
+                self.worker = Worker(self)
+            self.worker.send(size, timeout, args)
+            return self.worker.receive(timeout + WORKER_GRACE_PERIOD)
+
+        result = run_in_worker() if self.persistent else run_process()
+        return self.unpack_result(result)
 
+    @staticmethod
+    def unpack_result(result):
+        """Return result tuple or raise exception sent by worker"""
         if isinstance(result[1], err.FunTimeoutError):
             raise result[1]
         elif isinstance(result[1], err.FunctionsNotFoundError):
@@ -116,3 +865,76 @@ class CodeBenchmark:
             return result
         else:
             raise Exception("Queue returned empty value")
+
+
+class Worker:
+    """Persistent process measuring sizes sent through a pipe, optionally
+    pinned to single CPU, restarted lazily after a timeout or a crash"""
+
+    def __init__(self, benchmark, cpu=None):
+        self.benchmark = benchmark
+        self.cpu = cpu
+        self.process = None
+        self.connection = None
+        self.size = None
+        self.start_time = None
+
+    def start(self):
+        """Start worker process"""
+        start_ns = perf_counter_ns()
+        self.connection, worker_connection = Pipe()
+        self.process = Process(target=self.benchmark.run_worker,
+                               args=(worker_connection, self.cpu))
+        self.process.start()
+        worker_connection.close()
+        self.benchmark.logger.span('spawn', start_ns, perf_counter_ns(),
+                                   worker=self.process.pid)
+        self.benchmark.logger.log("Started worker {} on cpu {}".format(
+            self.process.pid, self.cpu))
+
+    def stop(self, force=False):
+        """Stop worker process if it is running, force kills it without
+        waiting for current measurement"""
+        if self.process is None:
+            return
+        if not force:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+            self.process.join(WORKER_GRACE_PERIOD)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+        self.benchmark.logger.log("Stopped worker {}".format(
+            self.process.pid))
+        self.process = self.connection = None
+
+    def send(self, size, timeout, args=()):
+        """Order measurement of size, starts process if needed, args are
+        passed to run after size"""
+        if self.process is None:
+            self.start()
+        self.size = size
+        self.start_time = perf_counter()
+        self.connection.send((size, timeout, args))
+
+    def receive(self, timeout):
+        """Wait at most timeout seconds for result of last measurement,
+        returns tuple (size, measurement, full_time) or (size, exception,
+        full_time), process is stopped after timeout or error"""
+        try:
+            if not self.connection.poll(timeout):
+                self.stop(force=True)
+                return (self.size, err.FunTimeoutError(
+                    "Timeout error: worker did not respond"),
+                        perf_counter() - self.start_time)
+            result = self.connection.recv()
+        except (EOFError, OSError):
+            self.stop(force=True)
+            return (self.size, RuntimeError("Worker process crashed"),
+                    perf_counter() - self.start_time)
+        if isinstance(result[1], Exception):
+            self.stop(force=True)
+        return result
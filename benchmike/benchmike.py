@@ -3,60 +3,395 @@
     BenchMike
 
     Procedures:
+    get_startup_time
     main
 """
+import os
+import sys
+from os.path import abspath, splitext
+from time import perf_counter
+
+# taken before the other benchmike modules are imported, start up time is
+# measured from it where start of the process is not known
+IMPORT_START = perf_counter()
+
+# modules of other modes, cache and counters are imported when they are used
 from benchmike import argparser as parser
 from benchmike import benchmark as mark
+from benchmike import complexities as cp
+from benchmike import environment as env
 from benchmike import exceptions as err
+from benchmike import measurement as mm
+from benchmike import results as rs
+from benchmike import schedulers as sch
 
 from benchmike import bigoestimator as bigoes
 
+REGRESSION_EXIT_CODE = 1
+SELFTEST_FAILURE_EXIT_CODE = 1
+# benchmark could not be run or finished, distinct from failed checks
+ERROR_EXIT_CODE = 2
+# start time of process in clock ticks since boot is 22nd field of stat,
+# 20th after command
+STAT_PATH = '/proc/self/stat'
+UPTIME_PATH = '/proc/uptime'
+STARTTIME_FIELD = 19
+# arguments of run saved with result, compare mode measures with them again
+SETTINGS = ('timeout', 'step', 'start', 'count', 'repeat', 'max_rse',
+            'max_repeat', 'clock', 'extra_clocks', 'calibrate', 'warmup',
+            'gc_mode', 'subtract_floor', 'jobs', 'schedule', 'factor',
+            'early_stop', 'trace_memory', 'counters', 'seed', 'copy_input',
+            'criterion', 'two_term', 'bootstrap')
+
 
 class BenchMike:
     """Main class, binds benchmarking class and benchmark data processing
     classes, allows performing multiple benchmarking runs"""
 
-    def __init__(self):
+    def __init__(self, startup_time=None):
         self.args = None
+        self.startup_time = startup_time
         self.benchmarker = None
         self.estimator = None
         self.plotter = None
         self.generator = None
+        self.memory_estimator = None
+        self.memory_generator = None
+        self.counter_estimators = {}
+        self.batch = None
+        self.result = None
+        self.comparison = None
+        self.concurrency = None
+        self.scaling = None
+        self.selftest = None
 
-    def run(self, code, timeout=30, timefile='time_source.py',
-            sizefile='size_source.py', step=100, start=100, count=100):
-        """ Main method of BenchMike, allows multiple benchmarking runs
+    def run(self, args):
+        """ Main method of BenchMike, allows multiple benchmarking runs,
+        args are parsed by argparser.parse, returns BenchmarkResult which is
+        also exported to output file if output_format is given. With
+        profiler given the largest sizes are profiled and profiles are saved
+        next to output file, with two_term complexities with two terms are
+        compared too
         """
-        self.args = code, timeout, timefile, sizefile, step, start, count
-        self.benchmarker = mark.CodeBenchmark(code, timeout)
-        data_points = self.benchmarker.run_benchmark(step, start, count)
+        self.args = args
+        complexities = cp.get_complexities(args.two_term)
+        store = None
+        if args.cache:
+            from benchmike import cache as ch
+            store = ch.MeasurementCache(
+                args.cache_file, args.cache_max_age * 24 * 3600,
+                args.cache_max_size * 1024 * 1024)
+            print("Using measurement cache {}".format(
+                abspath(args.cache_file)))
+        self.benchmarker = mark.CodeBenchmark(
+            args.code, args.timeout, parser.get_options(args), store)
+        scheduler = sch.get_scheduler(args.schedule, args.start, args.step,
+                                      args.count, args.factor,
+                                      args.statistic)
+        online = bigoes.OnlineComplexityEstimator(
+            args.statistic, args.evidence,
+            complexities=complexities) if args.early_stop else None
+        try:
+            measurements = self.benchmarker.run_benchmark(
+                args.step, args.start, args.count, scheduler, online)
+        finally:
+            if store is not None:
+                store.close()
+        data_points = mm.to_points(measurements, args.statistic)
+        breakdown = mm.time_breakdown(measurements)
+        print("Time spent in set_up {:.3f} s, run {:.3f} s, garbage "
+              "collection {:.3f} s".format(breakdown['set_up'],
+                                           breakdown['run'], breakdown['gc']))
+
+        # one pool of processes is shared by bootstraps of time, memory and
+        # every counter
+        pool = bigoes.bootstrap_pool(args.bootstrap)
+        try:
+            self.estimate(args, measurements, data_points, complexities,
+                          pool)
+        finally:
+            if pool is not None:
+                pool.terminate()
+        if args.profiler is not None:
+            self.profile(measurements, args.statistic, args.profiler,
+                         args.profile_sizes, args.profile_interval,
+                         splitext(args.output)[0] if args.output
+                         else parser.DEFAULT_RESULT_FILE)
+        if args.output_format is not None:
+            self.result.export(args.output or '{}.{}'.format(
+                parser.DEFAULT_RESULT_FILE, args.output_format),
+                args.output_format)
+        return self.result
 
-        self.estimator = bigoes.ComplexityEstimator(data_points)
-        complexity, a, b = self.estimator.estimate_complexity()
+    def estimate(self, args, measurements, data_points, complexities=None,
+                 pool=None):
+        """Estimate time complexity, plot it, save generated functions and
+        make result, estimate space and counter complexities if asked, all
+        of them choose from complexities, bootstraps run in pool if it is
+        given"""
+        self.estimator = bigoes.ComplexityEstimator(
+            data_points, criterion=args.criterion,
+            complexities=complexities)
+        complexity, coefficients = self.estimator.estimate_complexity(
+            args.bootstrap, pool=pool)
         factors = self.estimator.factors
 
-        self.plotter = bigoes.EstimationPlotter(data_points)
-        self.plotter.plot_fitted(factors, 2)
+        if not args.headless:
+            self.plotter = bigoes.EstimationPlotter(data_points,
+                                                    args.plotfile)
+            self.plotter.plot_fitted(factors, 2)
+
+        self.generator = bigoes.CodeGenerator(complexity, coefficients,
+                                              self.estimator.samples,
+                                              args.level)
+        self.generator.save_execution_time_fun(args.timefile)
+        self.generator.save_max_input_size_fun(args.sizefile)
+
+        settings = {name: getattr(args, name) for name in SETTINGS}
+        settings['extra_clocks'] = list(args.extra_clocks)
+        self.result = rs.BenchmarkResult(
+            args.code, self.benchmarker.code_hash,
+            self.benchmarker.fingerprint, env.get_environment(), settings,
+            measurements, args.statistic)
+        self.result.startup_time = self.startup_time
+        self.result.add_estimate('time', self.estimator)
+        if args.memory:
+            self.estimate_memory(measurements, args.statistic,
+                                 args.trace_memory, args.memoryfile,
+                                 args.criterion, args.bootstrap, args.level,
+                                 complexities, pool)
+            self.result.add_estimate('space', self.memory_estimator)
+        if args.counters:
+            self.estimate_counters(measurements, args.statistic,
+                                   args.criterion, args.bootstrap,
+                                   complexities, pool)
+
+    def profile(self, measurements, statistic, profiler, count, interval,
+                prefix):
+        """Profile the largest measured sizes, save profiles as
+        <prefix>_profile_<size> files and print comparison of hot functions
+        across sizes"""
+        from benchmike import profiler as pr
+        sizes = pr.choose_sizes([measurement.size
+                                 for measurement in measurements], count)
+        profiles = self.benchmarker.run_profiles(
+            sizes, profiler, interval, prefix + '_profile')
+        if not profiles:
+            print("No size was profiled in time")
+            return
+        times = {measurement.size: measurement.get(statistic)
+                 for measurement in measurements}
+        comparison = pr.ProfileComparison(profiles, times)
+        comparison.compare()
+        comparison.print_report()
+        self.result.profile = dict(comparison.to_dict(), profiler=profiler)
+
+    def estimate_memory(self, measurements, statistic, trace_memory,
+                        memoryfile, criterion='bic', bootstrap=200,
+                        level=0.95, complexities=None, pool=None):
+        """Estimate space complexity and save max_size_for_memory(bytes)"""
+        metric = 'tracemalloc_peak' if trace_memory else 'peak_rss'
+        if not all(measurement.values(metric)
+                   for measurement in measurements):
+            raise err.BenchmarkRuntimeError(
+                "Peak RSS can not be measured per trial in reused worker "
+                "processes on this system, use --tracemalloc")
+        memory_points = mm.to_points(measurements, statistic, metric)
+        self.memory_estimator = bigoes.ComplexityEstimator(
+            memory_points, 'space', criterion, complexities=complexities)
+        complexity, coefficients = self.memory_estimator.estimate_complexity(
+            bootstrap, pool=pool)
+        self.memory_generator = bigoes.CodeGenerator(
+            complexity, coefficients, self.memory_estimator.samples, level)
+        self.memory_generator.save_max_memory_size_fun(memoryfile)
 
-        self.generator = bigoes.CodeGenerator(complexity, (a, b))
-        self.generator.save_execution_time_fun(timefile)
-        self.generator.save_max_input_size_fun(sizefile)
+    def estimate_counters(self, measurements, statistic, criterion='bic',
+                          bootstrap=200, complexities=None, pool=None):
+        """Estimate complexity of every counter recorded for all sizes and
+        add it to result, counters with the same value at every size, e.g.
+        no page faults at all, are reported as constant without fitting"""
+        from benchmike import counters as cn
+        self.counter_estimators = {}
+        for metric in cn.COUNTERS:
+            if not all(measurement.values(metric)
+                       for measurement in measurements):
+                continue
+            points = mm.to_points(measurements, statistic, metric)
+            values = {value for size, value in points}
+            if len(values) == 1:
+                value = values.pop()
+                print("{} is constant: {}".format(metric, value))
+                self.result.add_constant(metric, value)
+                continue
+            estimator = bigoes.ComplexityEstimator(
+                points, metric, criterion, complexities=complexities)
+            estimator.estimate_complexity(bootstrap, pool=pool)
+            self.counter_estimators[metric] = estimator
+            self.result.add_estimate(metric, estimator)
+
+    def run_batch(self, args):
+        """Benchmark every target found in paths within one time budget and
+        save consolidated report, args are parsed by argparser.parse_batch"""
+        from benchmike import batch as bt
+        self.args = args
+        targets = bt.discover_targets(args.paths)
+        if not targets:
+            raise err.FunctionsNotFoundError(
+                "Could not find any benchmark targets in given paths")
+        self.batch = bt.BatchBenchmark(
+            targets, args.timeout, args.jobs,
+            parser.get_options(args, jobs=1), args.step, args.start,
+            args.count, args.schedule, args.factor, args.statistic,
+            args.early_stop, args.evidence)
+        results = self.batch.run()
+        self.batch.save_report(args.report)
+        return results
+
+    def run_compare(self, args):
+        """Benchmark code at sizes of baseline with its settings and compare
+        results, args are parsed by argparser.parse_compare, returns list of
+        regressions"""
+        from benchmike import compare as cmp
+        self.args = args
+        previous = rs.load(args.baseline)
+        settings = previous.settings
+        sizes = [measurement.size for measurement in previous.measurements]
+        repeat = args.repeat or max(settings['repeat'],
+                                    cmp.MIN_COMPARE_REPEAT)
+        options = mark.BenchmarkOptions(
+            repeat=repeat, max_rse=settings['max_rse'],
+            max_repeat=max(settings['max_repeat'], repeat),
+            clock=settings['clock'], extra_clocks=settings['extra_clocks'],
+            calibrate=settings['calibrate'], jobs=args.jobs,
+            trace_memory=settings['trace_memory'],
+            warmup=settings.get('warmup', 0),
+            gc_mode=settings.get('gc_mode', mark.DEFAULT_GC_MODE),
+            subtract_floor=settings.get('subtract_floor', False),
+            seed=settings.get('seed', mark.DEFAULT_SEED),
+            copy_input=settings.get('copy_input', False))
+        self.benchmarker = mark.CodeBenchmark(
+            args.code, args.timeout if args.timeout is not None
+            else settings['timeout'], options)
+        measurements = self.benchmarker.run_benchmark(
+            0, min(sizes), len(sizes), sch.FixedScheduler(sizes))
+        self.comparison = cmp.Comparison(
+            previous, measurements, complexities=cp.get_complexities(
+                settings.get('two_term', False)))
+        return self.comparison.print_report(args.max_slowdown, args.alpha,
+                                            args.allow_complexity_change)
+
+    def run_concurrency(self, args):
+        """Measure throughput and latency of coroutine run(size) at growing
+        concurrency and save report, args are parsed by
+        argparser.parse_concurrency, returns list of rows"""
+        from benchmike import concurrency as cc
+        self.args = args
+        self.concurrency = cc.ConcurrencyBenchmark(
+            args.code, args.timeout, args.size,
+            cc.get_levels(args.max_concurrency))
+        rows = self.concurrency.run()
+        self.concurrency.save_report(args.report)
+        return rows
+
+    def run_scaling(self, args):
+        """Measure run(size, workers) over grid of sizes and worker counts,
+        save report with optimal worker count for every size and heat map of
+        speedup, args are parsed by argparser.parse_scaling, returns list of
+        report rows"""
+        from benchmike import scaling as sc
+        self.args = args
+        cpus = len(mark.available_cpus())
+        if max(args.workers) > cpus:
+            print("Number of available CPUs is {}, larger worker counts "
+                  "share them and speedup beyond it can not be "
+                  "measured".format(cpus))
+        self.benchmarker = mark.CodeBenchmark(args.code, args.timeout,
+                                              parser.get_options(args))
+        grid = self.benchmarker.run_grid(
+            [args.start + args.step * i for i in range(args.count)],
+            sorted(set(args.workers)))
+        self.scaling = sc.ScalingEstimator(grid, args.statistic)
+        rows = self.scaling.estimate()
+        if not rows:
+            raise err.BenchmarkRuntimeError(
+                "Not enough data points to estimate speedup")
+        self.scaling.save_report(args.report)
+        sc.HeatmapPlotter(self.scaling, args.heatmap).plot()
+        return rows
+
+    def run_selftest(self, args):
+        """Measure harness overhead and check classification of reference
+        kernels, args are parsed by argparser.parse_selftest, returns True if
+        all of them passed"""
+        from benchmike import selftest as st
+        self.args = args
+        self.selftest = st.SelfTest(args.timeout)
+        passed = self.selftest.run()
+        self.selftest.save_report(args.report)
+        return passed
+
+
+def get_startup_time():
+    """Return wall time in seconds from start of the process, including
+    start of interpreter and imports, where /proc is not available time
+    since import of this module"""
+    try:
+        with open(STAT_PATH) as file:
+            # fields after command, which may contain spaces and parentheses
+            fields = file.read().rsplit(')', 1)[1].split()
+        with open(UPTIME_PATH) as file:
+            uptime = float(file.read().split()[0])
+        return uptime - int(fields[STARTTIME_FIELD]) / os.sysconf(
+            'SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return perf_counter() - IMPORT_START
 
 
 def main():
     """Main procedure of benchmike module"""
+    startup_time = get_startup_time()
+    mark.CodeBenchmark.logger.clear_log()
+    mark.CodeBenchmark.logger.log("Startup took {:.3f} s".format(
+        startup_time))
     try:
+        if sys.argv[1:2] == ['batch']:
+            args = parser.parse_batch(sys.argv[2:])
+            parser.validate_batch_args(args)
+            BenchMike().run_batch(args)
+            return
+        if sys.argv[1:2] == ['compare']:
+            args = parser.parse_compare(sys.argv[2:])
+            parser.validate_compare_args(args)
+            if BenchMike().run_compare(args):
+                sys.exit(REGRESSION_EXIT_CODE)
+            return
+        if sys.argv[1:2] == ['concurrency']:
+            args = parser.parse_concurrency(sys.argv[2:])
+            parser.validate_concurrency_args(args)
+            BenchMike().run_concurrency(args)
+            return
+        if sys.argv[1:2] == ['selftest']:
+            args = parser.parse_selftest(sys.argv[2:])
+            parser.validate_selftest_args(args)
+            if not BenchMike().run_selftest(args):
+                sys.exit(SELFTEST_FAILURE_EXIT_CODE)
+            return
+        if sys.argv[1:2] == ['scaling']:
+            args = parser.parse_scaling(sys.argv[2:])
+            parser.validate_scaling_args(args)
+            BenchMike().run_scaling(args)
+            return
         args = parser.parse()
-        parser.validate_args(*args)
-        benchmike = BenchMike()
-        benchmike.run(*args)
+        parser.validate_args(args)
+        benchmike = BenchMike(startup_time)
+        benchmike.run(args)
     except err.BenchmarkRuntimeError as ex:
         print(ex.message)
         print("An error occurred while benchmarking, exit")
-        return
+        sys.exit(ERROR_EXIT_CODE)
     except Exception as e:
         print("Some other exception: " + repr(e))
-        return
+        sys.exit(ERROR_EXIT_CODE)
 
 
 if __name__ == '__main__':
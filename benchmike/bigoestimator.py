@@ -1,113 +1,472 @@
 """Module for estimating code time complexity based on TOE measurements and
-presenting them in RiGCzd form"""
-import matplotlib.pyplot as plt
-import numpy as np
+presenting them in RiGCzd form, numpy and matplotlib are imported only when
+they are needed, so headless runs never load matplotlib"""
+import os
+from collections import namedtuple
 from inspect import getsourcelines
+from math import exp, inf, log
+from multiprocessing import Pool
 
 from benchmike import complexities as cp
+from benchmike import exceptions as err
 from benchmike.customlogger import CustomLogger, LOGGER_NAME
+from benchmike.measurement import DEFAULT_STATISTIC
+
+CRITERIA = ('aic', 'bic')
+DEFAULT_CRITERION = 'bic'
+# residuals below this fraction of mean time are rounding errors, flooring
+# them keeps criteria finite and lets the simplest exact fit win
+RELATIVE_PRECISION = 1e-9
+MIN_VARIANCE = 1e-300
+# times below this fraction of mean time are weighted as if they were that
+# long, so zero readings do not get infinite weight
+WEIGHT_FLOOR = 0.01
+DEFAULT_BOOTSTRAP = 200
+DEFAULT_LEVEL = 0.95
+# bootstrap replicates fitted by one pool task
+BOOTSTRAP_CHUNK = 25
+# AIC difference regarded as decisive evidence for the leading model
+EVIDENCE_LEAD = 10.0
+MIN_ONLINE_POINTS = 8
+# number of consecutive points the same model has to lead decisively
+EVIDENCE_PATIENCE = 3
+
+
+Prediction = namedtuple('Prediction', ['estimate', 'low', 'high'])
+
+
+def bootstrap_pool(replicates, jobs=None):
+    """Return Pool of jobs processes (all CPUs by default) to be shared by
+    bootstraps of replicates, None if one process is enough"""
+    jobs = min(jobs or os.cpu_count() or 1,
+               -(-replicates // BOOTSTRAP_CHUNK))
+    return Pool(jobs) if jobs > 1 else None
+
+
+def bootstrap_replicates(size_time_list, quantity, criterion, weighted,
+                         complexities, target, seed, count):
+    """Fit count resamples of data points, returns list of tuples
+    (description of best complexity, coefficients of target complexity or
+    None), runs in pool worker"""
+    import numpy as np
+    generator = np.random.default_rng(seed)
+    replicates = []
+    for _ in range(count):
+        picked = generator.integers(0, len(size_time_list),
+                                    len(size_time_list))
+        results = ComplexityEstimator(
+            [size_time_list[i] for i in picked], quantity, criterion,
+            weighted, complexities).fit()
+        fitted = [(complexity.get_description(), regression[0])
+                  for complexity, regression in results
+                  if len(regression[1])]
+        coefficients = [tuple(float(value) for value in regression)
+                        for description, regression in fitted
+                        if description == target]
+        replicates.append((fitted[0][0] if fitted else None,
+                           coefficients[0] if coefficients else None))
+    return replicates
 
 
 class ComplexityEstimator:
     """Class responsible for estimating time complexity of code and generating
-    result files"""
-    complexities = {
-        'O(log n) - logarithmic': cp.Logarithmic,
-        'O(n) - linear': cp.Linear,
-        'O(n * log n - linearithmic': cp.Linearithmic,
-        'O(n^2) - quadratic': cp.Quadratic,
-        'O(n^k) - polynomial': cp.Polynomial,
-        'O(2^n) - superpolynomial': cp.SuperPolynomial,
-    }
+    result files, every given complexity (registered ones by default) is
+    fitted and the one with the lowest information criterion wins, so extra
+    parameters have to pay for themselves. Timing noise grows with time, so
+    by default residuals are relative (weighted by 1 / t^2), which also
+    makes goodness of fit comparable between data sets. Bootstrap of data
+    points gives probability of every complexity and spread of coefficients
+    of the verdict"""
     logger = CustomLogger(LOGGER_NAME)
 
-    def __init__(self, size_time_list):
+    def __init__(self, size_time_list, quantity='time',
+                 criterion=DEFAULT_CRITERION, weighted=True,
+                 complexities=None):
         self.size_time_list = size_time_list
+        # description -> complexity, registered ones by default
+        self.complexities = complexities or cp.REGISTRY
+        self.quantity = quantity
+        self.criterion = criterion
+        self.weighted = weighted
         self.factors = None
-
-    def estimate_complexity(self):
-        """Returns estimated complexity and coefficients to generated
-        time(size) function"""
-
-        zipped = list(map(list, zip(*self.size_time_list)))
-        sizes = zipped[0]
-        times = zipped[1]
-        fitted = []
-
-        for key in self.complexities:
-            complexity = self.complexities[key]
-
-            # due to overflow error when converting int to float
-            if sizes[len(
-                    sizes) - 1] > 1000 and complexity == cp.SuperPolynomial:
+        self.results = None
+        self.scores = {}
+        self.min_variance = MIN_VARIANCE
+        self.probabilities = None
+        self.samples = []
+
+    def fit(self):
+        """Fit all complexities to data points, returns list of tuples
+        (complexity, regression) sorted from best fit to least by information
+        criterion, regression is tuple (coefficients, residuals) where
+        residuals hold residual sum of squares of times and are empty if the
+        fit is underdetermined. Criterion of every fit is kept in scores"""
+        import numpy as np
+        sizes, times = (np.array(values, dtype=float)
+                        for values in zip(*self.size_time_list))
+        weights = self.get_weights(times)
+        self.min_variance = max(RELATIVE_PRECISION ** 2 * float(
+            np.mean(weights * times ** 2)), MIN_VARIANCE)
+        fitted = self.fit_batched(sizes, times, weights)
+        fitted.extend((complexity, complexity.fit(sizes, times, weights))
+                      for complexity in self.complexities.values()
+                      if not complexity.batched)
+
+        results = []
+        self.scores = {}
+        for complexity, coefficients in fitted:
+            if coefficients is None:
+                results.append((complexity, (np.array([]), np.array([]))))
+                continue
+            with np.errstate(over='ignore', invalid='ignore'):
+                predicted = complexity.get_time_array(sizes, *coefficients)
+                rss = float(np.sum(weights * (times - predicted) ** 2))
+            if not np.isfinite(rss):
+                results.append((complexity, (coefficients, np.array([]))))
                 continue
+            self.scores[complexity] = self.score(rss, len(sizes),
+                                                 complexity.parameters)
+            results.append((complexity, (coefficients, np.array([rss]))))
+        return sorted(results, key=lambda result: self.scores.get(
+            result[0], inf))
+
+    def get_weights(self, times):
+        """Return weights of residuals, 1 / t^2 normalized to mean 1 if
+        weighted, ones otherwise or if any value is not positive, relative
+        residuals are meaningless then"""
+        import numpy as np
+        if not self.weighted or np.min(times) <= 0:
+            return np.ones_like(times)
+        floor = WEIGHT_FLOOR * max(float(np.mean(np.abs(times))),
+                                   np.finfo(float).tiny)
+        weights = 1 / np.maximum(np.abs(times), floor) ** 2
+        return weights / np.mean(weights)
+
+    def fit_batched(self, sizes, times, weights):
+        """Fit all single term complexities a_1 * T(N) + a_0 in one batched
+        weighted least squares solve, returns list of tuples (complexity,
+        coefficients), coefficients are None if the fit is
+        underdetermined"""
+        import numpy as np
+        models = [complexity for complexity in self.complexities.values()
+                  if complexity.batched]
+        features = np.stack([self.get_features(complexity, sizes)
+                             for complexity in models])
+        design = np.stack([features[:, :, 0], np.ones_like(features[:, :, 0])],
+                          axis=2)
+        values = np.stack([complexity.get_t_array(times)
+                           for complexity in models])
+        root = np.sqrt(weights)
+        solution = (np.linalg.pinv(design * root[np.newaxis, :, np.newaxis]) @
+                    (values * root)[:, :, np.newaxis])
+        ranks = np.linalg.matrix_rank(design)
+        # coefficients of scaled features are scaled back
+        solution[:, 0, 0] *= features[:, 0, 1]
+        return [(complexity, solution[i, :, 0] if ranks[i] == 2 and
+                 len(sizes) > complexity.parameters else None)
+                for i, complexity in enumerate(models)]
 
-            coefficients = np.vstack([
-                [complexity.get_n(n) for n in sizes],
-                np.ones(len(sizes))]).T
-            values = [complexity.get_t(t) for t in times]
-            regression = np.linalg.lstsq(coefficients, values)
-            fitted.append({'complexity': complexity,
-                           'regression': regression})
-
-        # sort by sum of residuals from leasts squares method
-        fitted = sorted(fitted,
-                        key=lambda fit: fit['regression'][1][0] if
-                        fit['regression'][1] else np.inf)
-
-        results = [(x['complexity'], x['regression']) for x in fitted]
-        factors = []
-        if fitted[0]['regression'][1][0] < 1e-8:
-            results.insert(0, (cp.Constant, None))
-            factors.append((cp.Constant, 0, sum(times) / len(times)))
+    @staticmethod
+    def get_features(complexity, sizes):
+        """Return array of pairs (scaled T(N), scale) for regression, T(N) is
+        divided by its largest value for conditioning, models overflowing
+        floats are computed in log space"""
+        import numpy as np
+        if not complexity.log_scale:
+            values = complexity.get_n_array(sizes)
+            largest = np.max(np.abs(values))
+            scale = 1.0 / largest if largest > 0 else 1.0
+            return np.stack([values * scale, np.full_like(sizes, scale)],
+                            axis=1)
+        log2_n = complexity.get_log2_n_array(sizes)
+        shift = np.max(log2_n)
+        return np.stack([np.exp2(log2_n - shift),
+                         np.full_like(sizes, np.exp2(-shift))], axis=1)
+
+    def score(self, rss, count, parameters):
+        """Return information criterion of fit with Gaussian errors, lower is
+        better"""
+        fit = count * log(max(rss / count, self.min_variance))
+        if self.criterion == 'aic':
+            return fit + 2 * parameters
+        return fit + parameters * log(count)
+
+    def verdict(self, replicates=0, jobs=None):
+        """Same as estimate_complexity, but does not print results, returns
+        tuple (complexity, coefficients) or None if there are not enough
+        data points"""
+        factors = [(complexity, tuple(float(value) for value in regression[0]))
+                   for complexity, regression in self.fit()
+                   if len(regression[1])]
+        if not factors:
+            return None
+        self.factors = factors
+        if replicates:
+            self.bootstrap(replicates, jobs)
+        return factors[0]
+
+    def estimate_complexity(self, replicates=0, jobs=None, pool=None):
+        """Returns estimated complexity and coefficients to generated
+        time(size) function, with replicates probabilities of complexities
+        are estimated by bootstrap, in pool if it is given"""
+        results = self.fit()
+        self.results = results
+        factors = [(complexity, tuple(float(value) for value in regression[0]))
+                   for complexity, regression in results
+                   if len(regression[1])]
+        if not factors:
+            raise err.BenchmarkRuntimeError(
+                "Not enough data points to estimate complexity")
+        self.factors = factors
+        if replicates:
+            self.bootstrap(replicates, jobs, pool=pool)
 
+        if self.quantity != 'time':
+            print("Estimating {} complexity".format(self.quantity))
         print("Printing complexities, from best fit to least")
-        for result in results:
-            if result[1] and result[1][1]:
-                print("Complexity: {}".format(result[0].get_description()))
-                factors.append((result[0], result[1][0][0], result[1][0][1]))
-                self.logger.log("Result: {} with a = {}, b = {}".format(
-                    result[0].get_description(), result[1][0][0],
-                    result[1][0][1]))
-            else:
+        for complexity, regression in results:
+            if not len(regression[1]):
                 print("Complexity: {}, no regression data".format(
-                    result[0].get_description()))
+                    complexity.get_description()))
+                continue
+            coefficients = tuple(float(value) for value in regression[0])
+            probability = self.get_probability(complexity)
+            print("Complexity: {}{}".format(
+                complexity.describe(coefficients),
+                '' if probability is None else
+                ', probability {:.1%}'.format(probability)))
+            self.logger.log("Result: {} with coefficients {}, {} {}".format(
+                complexity.describe(coefficients), coefficients,
+                self.criterion, self.scores[complexity]))
+
+        verdict = "verdict" if self.quantity == 'time' else \
+            "{} verdict".format(self.quantity)
+        description = factors[0][0].describe(factors[0][1])
+        probability = self.get_probability(factors[0][0])
+        if probability is None:
+            print("\nBenchMike's {}: I'm almost sure it's {}\n".format(
+                verdict, description))
+        else:
+            print("\nBenchMike's {}: I'm {:.0%} sure it's {}\n".format(
+                verdict, probability, description))
+        self.logger.log("{}: {}\n".format(verdict.capitalize(), description))
+        return factors[0]
+
+    def bootstrap(self, replicates=DEFAULT_BOOTSTRAP, jobs=None, seed=0,
+                  pool=None):
+        """Refit data points resampled with replacement, in given pool or in
+        parallel on jobs processes (all CPUs by default). Returns dict
+        description of complexity -> fraction of replicates it won,
+        coefficients of the verdict fitted to every replicate are kept in
+        samples"""
+        target = self.factors[0][0].get_description()
+        tasks = [(self.size_time_list, self.quantity, self.criterion,
+                  self.weighted, self.complexities, target, seed + start,
+                  min(BOOTSTRAP_CHUNK, replicates - start))
+                 for start in range(0, replicates, BOOTSTRAP_CHUNK)]
+        jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+        if pool is not None:
+            chunks = pool.starmap(bootstrap_replicates, tasks)
+        elif jobs > 1:
+            with Pool(jobs) as pool:
+                chunks = pool.starmap(bootstrap_replicates, tasks)
+        else:
+            chunks = [bootstrap_replicates(*task) for task in tasks]
+        wins = {}
+        self.samples = []
+        for chunk in chunks:
+            for winner, coefficients in chunk:
+                wins[winner] = wins.get(winner, 0) + 1
+                if coefficients is not None:
+                    self.samples.append(coefficients)
+        self.probabilities = {winner: count / replicates
+                              for winner, count in wins.items()
+                              if winner is not None}
+        self.logger.log("Bootstrap of {} replicates: {}".format(
+            replicates, self.probabilities))
+        return self.probabilities
+
+    def get_probability(self, complexity):
+        """Return bootstrap probability of complexity or None without
+        bootstrap"""
+        if self.probabilities is None:
+            return None
+        return self.probabilities.get(complexity.get_description(), 0.0)
+
+    def models(self):
+        """Return list of tuples (complexity, coefficients, rss, weight,
+        probability) of all models from the last estimation, all but
+        complexity are None if there was no regression data. Weight is
+        Akaike (or Schwarz for BIC) weight, relative likelihood of the model
+        among all, rss is weighted, probability comes from bootstrap"""
+        best = min(self.scores.values()) if self.scores else 0.0
+        likelihoods = {complexity: exp((best - value) / 2)
+                       for complexity, value in self.scores.items()}
+        total = sum(likelihoods.values())
+        models = []
+        for complexity, regression in self.results:
+            if complexity in likelihoods:
+                models.append((complexity,
+                               [float(value) for value in regression[0]],
+                               float(regression[1][0]),
+                               likelihoods[complexity] / total,
+                               self.get_probability(complexity)))
+            else:
+                models.append((complexity, None, None, None, None))
+        return models
+
+    def confidence(self):
+        """Return bootstrap probability of the verdict, its weight without
+        bootstrap or None if it is unknown"""
+        verdict = self.factors[0][0]
+        if self.probabilities is not None:
+            return self.get_probability(verdict)
+        for model in self.models():
+            if model[0] is verdict:
+                return model[3]
+        return None
+
+
+class OnlineComplexityEstimator:
+    """Class fitting all complexities incrementally, every data point updates
+    sufficient statistics of each model (means and co-moments of n and t) in
+    O(1), so current ranking is available after every measurement"""
+    logger = CustomLogger(LOGGER_NAME)
 
-        print("\nBenchMike's verdict: I'm almost sure it's {}\n".format(
-            factors[0][0].get_description()))
-        self.factors = factors
-        self.logger.log("Verdict: {}\n".format(
-            factors[0][0].get_description()))
-        return factors[0][0], factors[0][1], factors[0][2]
+    def __init__(self, statistic=DEFAULT_STATISTIC, threshold=EVIDENCE_LEAD,
+                 min_points=MIN_ONLINE_POINTS, callback=None,
+                 complexities=None):
+        self.statistic = statistic
+        self.threshold = threshold
+        self.min_points = min_points
+        self.callback = callback
+        self.count = 0
+        self.leader = None
+        self.streak = 0
+        # complexity -> [mean_n, mean_t, c_nn, c_nt, c_tt]
+        self.moments = {complexity: [0.0] * 5 for complexity in
+                        (complexities or cp.REGISTRY).values()
+                        if complexity.batched}
+
+    def add(self, size, time):
+        """Update statistics with single data point, returns ranking"""
+        self.count += 1
+        for complexity in list(self.moments):
+            try:
+                x = float(complexity.get_n(size))
+            except OverflowError:
+                del self.moments[complexity]
+                continue
+            y = float(complexity.get_t(time))
+            moments = self.moments[complexity]
+            dx = x - moments[0]
+            dy = y - moments[1]
+            moments[0] += dx / self.count
+            moments[1] += dy / self.count
+            moments[2] += dx * (x - moments[0])
+            moments[3] += dx * (y - moments[1])
+            moments[4] += dy * (y - moments[1])
+        ranking = self.ranking()
+        if self.lead() < self.threshold:
+            self.leader, self.streak = None, 0
+        elif ranking[0][0] == self.leader:
+            self.streak += 1
+        else:
+            self.leader, self.streak = ranking[0][0], 1
+        self.logger.log("Ranking after {} points: {}".format(
+            self.count, ', '.join(
+                '{} ({:.3g})'.format(fit[0].get_description(), fit[3])
+                for fit in ranking)))
+        if self.callback is not None:
+            self.callback(ranking)
+        return ranking
+
+    def add_measurement(self, measurement):
+        """Update statistics with chosen statistic of measurement"""
+        return self.add(measurement.size, measurement.get(self.statistic))
+
+    def regression(self, complexity):
+        """Return tuple (a, b, residual sum of squares) of complexity"""
+        mean_x, mean_y, c_xx, c_xy, c_yy = self.moments[complexity]
+        if c_xx <= 0:
+            return 0.0, mean_y, c_yy
+        a = c_xy / c_xx
+        return a, mean_y - a * mean_x, max(c_yy - a * c_xy, 0.0)
+
+    def ranking(self):
+        """Return list of tuples (complexity, a, b, residual sum of squares)
+        sorted from best fit to least"""
+        return sorted(((complexity,) + self.regression(complexity)
+                       for complexity in self.moments),
+                      key=lambda fit: fit[3])
+
+    def lead(self):
+        """Return Akaike information criterion difference between the best
+        and the second best complexity, models have the same number of
+        parameters so it is count * ln(rss_2 / rss_1)"""
+        ranking = self.ranking()
+        if len(ranking) < 2:
+            return 0.0
+        best, second = ranking[0][3], ranking[1][3]
+        if best <= 0:
+            return inf if second > 0 else 0.0
+        return self.count * log(second / best)
+
+    def is_significant(self):
+        """Check if the same complexity has led strongly enough for
+        EVIDENCE_PATIENCE consecutive points"""
+        return (self.count >= self.min_points and
+                self.streak >= EVIDENCE_PATIENCE)
 
 
 class EstimationPlotter:
-    """Class for plotting estimated complexity along with data points"""
+    """Class for plotting estimated complexity along with data points, plot
+    is shown in a window or saved to file (format taken from its extension,
+    e.g. .png or .svg) without a display"""
 
-    def __init__(self, xy_list):
+    def __init__(self, xy_list, filename=None):
         self.xy_list = xy_list
+        self.filename = filename
         self.plotted = []
         self.x_max = xy_list[len(xy_list) - 1][0]
-
-    def add_function_plot(self, name, function, a, b, x_max):
-        """Add function to main plot"""
+        self.plt = None
+
+    def get_pyplot(self):
+        """Import pyplot on first use, with non-interactive backend if plot
+        is saved to file"""
+        if self.plt is None:
+            import matplotlib
+            if self.filename is not None:
+                matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+            self.plt = plt
+        return self.plt
+
+    def add_function_plot(self, name, function, coefficients, x_max):
+        """Add function(size, *coefficients) to main plot"""
         self.plotted.append((name, function))
-        plt.plot(
-            *EstimationPlotter.eval_func(lambda x: a * function(x) + b, x_max),
+        self.get_pyplot().plot(
+            *EstimationPlotter.eval_func(
+                lambda x: function(x, *coefficients), x_max),
             label=name)
 
     def plot_fitted(self, factors, how_many):
         """Plot how_many complexities along with data points"""
         print("Plotting {} best fit complexities".format(how_many))
+        plt = self.get_pyplot()
         for i in range(min(len(factors), how_many)):
-            self.add_function_plot(factors[i][0].get_description(),
-                                   factors[i][0].get_n,
-                                   factors[i][1],
-                                   factors[i][2], self.x_max)
+            self.add_function_plot(factors[i][0].describe(factors[i][1]),
+                                   factors[i][0].get_time,
+                                   factors[i][1], self.x_max)
         plt.scatter(*zip(*self.xy_list), label='data')
         plt.legend(bbox_to_anchor=(0., 1.02, 1., .102), loc=3,
                    ncol=2, mode="expand", borderaxespad=0.)
-        plt.show()
+        if self.filename is None:
+            plt.show()
+            return
+        plt.savefig(self.filename, bbox_inches='tight')
+        plt.close()
+        print("Successfully written to {}".format(self.filename))
 
     @staticmethod
     def eval_func(func, x_max):
@@ -126,13 +485,17 @@ class EstimationPlotter:
 class CodeGenerator:
     """Class for generating result files containg code of methods for
     calculating max input size for specified time and time of execution for
-    specified input size
+    specified input size. Given bootstrap samples of coefficients, band
+    functions give predictions with confidence bands of chosen level
     """
 
-    def __init__(self, complexity, factors):
+    def __init__(self, complexity, coefficients, samples=(),
+                 level=DEFAULT_LEVEL):
         self.complexity = complexity
-        self.a_1, self.a_0 = factors
-        self.imports = 'from math import sqrt, log2, isclose\n'
+        self.coefficients = tuple(coefficients)
+        self.samples = list(samples)
+        self.level = level
+        self.imports = 'from math import exp, log, sqrt, log2\n'
 
     def save_execution_time_fun(self, filename):
         """Generate time(size) function code and save it to file"""
@@ -140,40 +503,87 @@ class CodeGenerator:
         file_contents += self.fun_to_str(self.complexity.get_time, 1)
 
         exec_time_fun = 'def time_fun(size):\n'
-        exec_time_fun += '\treturn get_time(size, {}, {})'.format(self.a_1,
-                                                                  self.a_0)
+        exec_time_fun += '\treturn get_time(size, {})'.format(
+            self.coefficients_to_str())
         file_contents += exec_time_fun + '\n'
         with open(filename, 'w+') as file:
             file.write(file_contents)
 
         print("Successfully written to {}".format(filename))
 
-    def save_max_input_size_fun(self, filename):
+    def save_max_input_size_fun(self, filename, fun_name='size_fun'):
         """Generate max_size(time) function code and save it to file"""
         file_contents = self.imports + '\n'
         file_contents += self.fun_to_str(self.complexity.get_max_size, 1)
 
-        if self.complexity == cp.Linearithmic:
-            file_contents += self.fun_to_str(cp.inverse, 0)
+        for helper in self.complexity.helpers:
+            file_contents += self.fun_to_str(helper, 0)
 
-        max_size_fun = 'def size_fun(size):\n'
-        max_size_fun += '\treturn get_max_size(size, {}, {})'.format(self.a_1,
-                                                                     self.a_0)
+        max_size_fun = 'def {}(size):\n'.format(fun_name)
+        max_size_fun += '\treturn get_max_size(size, {})'.format(
+            self.coefficients_to_str())
         file_contents += max_size_fun + '\n'
         with open(filename, 'w+') as file:
             file.write(file_contents)
 
         print("Successfully written to {}".format(filename))
 
+    def save_max_memory_size_fun(self, filename):
+        """Generate max_size_for_memory(bytes) function code and save it to
+        file, generator has to be created for space complexity"""
+        self.save_max_input_size_fun(filename, 'max_size_for_memory')
+
     def get_execution_time_fun(self):
         """Same as save_execution_time_fun, except returns result function as
         lambda expression"""
-        return lambda x: self.complexity.get_time(x, self.a_1, self.a_0)
+        return lambda x: self.complexity.get_time(x, *self.coefficients)
 
     def get_max_input_size_fun(self):
         """Same as save_max_size_fun, except returns result function as
         lambda expression"""
-        return lambda x: self.complexity.get_max_size(x, self.a_1, self.a_0)
+        return lambda x: self.complexity.get_max_size(x, *self.coefficients)
+
+    def get_execution_time_band_fun(self):
+        """Same as get_execution_time_fun, except result function gives
+        Prediction(estimate, low, high)"""
+        return lambda x: self.predict_band(self.complexity.get_time, x)
+
+    def get_max_input_size_band_fun(self):
+        """Same as get_max_input_size_fun, except result function gives
+        Prediction(estimate, low, high)"""
+        return lambda x: self.predict_band(self.complexity.get_max_size, x)
+
+    def predict(self, function, x):
+        """Return function(x, *coefficients)"""
+        return function(x, *self.coefficients)
+
+    def predict_band(self, function, x):
+        """Return Prediction of function(x, *coefficients), band spans
+        central level fraction of predictions of bootstrap samples, it is
+        empty without samples"""
+        estimate = self.predict(function, x)
+        values = []
+        for sample in self.samples:
+            try:
+                values.append(float(function(x, *sample)))
+            except (OverflowError, ValueError, ZeroDivisionError):
+                continue
+        if not values:
+            return Prediction(estimate, estimate, estimate)
+        values.sort()
+        tail = (1 - self.level) / 2 * (len(values) - 1)
+        return Prediction(estimate, values[int(tail)],
+                          values[int(round(len(values) - 1 - tail))])
+
+    def get_max_input_size_array_fun(self):
+        """Same as get_max_input_size_fun, except result function takes
+        numpy array of runtimes and returns array of sizes"""
+        return lambda times: self.complexity.get_max_size_array(
+            times, *self.coefficients)
+
+    def coefficients_to_str(self):
+        """Return coefficients as arguments of generated call"""
+        return ', '.join(repr(value) for value in self.coefficients)
 
     @staticmethod
     def fun_to_str(function, skip):
@@ -181,8 +591,14 @@ class CodeGenerator:
         result = ''
         fun_code = getsourcelines(function)[0][skip:]
         i = 0
+        docstring = False
         for line in fun_code:
             if '\"\"\"' in line:
+                # docstring spanning many lines is skipped as a whole
+                if line.count('\"\"\"') == 1:
+                    docstring = not docstring
+                continue
+            if docstring:
                 continue
             if "def" in line:
                 code = line.lstrip()
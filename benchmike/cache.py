@@ -0,0 +1,77 @@
+"""Module with persistent store of measurements, allows reusing data points
+of unchanged code between benchmike runs
+    Classes:
+    MeasurementCache
+"""
+import json
+import sqlite3
+from time import time
+
+from benchmike.measurement import Measurement
+
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+
+class MeasurementCache:
+    """SQLite store of measurements keyed by hash of compiled code, settings
+    of benchmark, environment fingerprint and size, entries older than
+    max_age seconds and oldest entries exceeding max_size bytes are evicted
+    when cache is opened"""
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE,
+                 max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_age = max_age
+        self.max_size = max_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS measurements ('
+            'code_hash TEXT, settings TEXT, environment TEXT, '
+            'size INTEGER, data TEXT, created REAL, '
+            'PRIMARY KEY (code_hash, settings, environment, size))')
+        self.evict()
+
+    def get(self, key, size):
+        """Return cached measurement of size or None, key is tuple
+        (code_hash, settings, environment)"""
+        row = self.connection.execute(
+            'SELECT data FROM measurements WHERE code_hash = ? AND '
+            'settings = ? AND environment = ? AND size = ?',
+            key + (size,)).fetchone()
+        if row is None:
+            return None
+        return Measurement.from_dict(json.loads(row[0]))
+
+    def put(self, key, measurement):
+        """Store measurement under key"""
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO measurements '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                key + (measurement.size, json.dumps(measurement.to_dict()),
+                       time()))
+
+    def evict(self):
+        """Remove entries older than max_age and oldest entries while total
+        size of data exceeds max_size"""
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM measurements WHERE created < ?',
+                (time() - self.max_age,))
+            total = self.connection.execute(
+                'SELECT COALESCE(SUM(LENGTH(data)), 0) FROM measurements'
+            ).fetchone()[0]
+            rows = self.connection.execute(
+                'SELECT rowid, LENGTH(data) FROM measurements '
+                'ORDER BY created').fetchall()
+            for rowid, length in rows:
+                if total <= self.max_size:
+                    break
+                self.connection.execute(
+                    'DELETE FROM measurements WHERE rowid = ?', (rowid,))
+                total -= length
+
+    def close(self):
+        """Close database connection"""
+        self.connection.close()
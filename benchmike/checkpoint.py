@@ -0,0 +1,89 @@
+"""Module for saving measurements of running benchmark incrementally, so an
+interrupted sweep can be resumed
+    Classes:
+    Checkpoint
+"""
+import json
+import os
+from time import monotonic
+
+from benchmike.measurement import Measurement
+
+# every line is flushed to the system at once, which survives interruption
+# of benchmike, forcing it to disk costs milliseconds, so it is done at most
+# once per SYNC_INTERVAL seconds and when checkpoint is closed
+SYNC_INTERVAL = 5.0
+
+
+class Checkpoint:
+    """JSON lines file, first line identifies benchmark by key, every next
+    line holds one measurement and time budget used until it was taken"""
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = list(key)
+        self.file = None
+        self.synced = None
+
+    def load(self):
+        """Return list of tuples (measurement, time_elapsed) saved for the
+        same key in order they were taken, empty if there is no matching
+        checkpoint"""
+        entries = []
+        try:
+            with open(self.path) as file:
+                header = json.loads(file.readline())
+                if header.get('key') != self.key:
+                    return entries
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # last line may be cut off by interruption
+                        break
+                    entries.append((
+                        Measurement.from_dict(entry['measurement']),
+                        entry['time_elapsed']))
+        except (OSError, ValueError):
+            pass
+        return entries
+
+    def open(self, resume=False):
+        """Open checkpoint for writing, returns list of tuples (measurement,
+        time_elapsed) to resume from, previous content is kept only when
+        resuming benchmark with the same key"""
+        entries = self.load() if resume else []
+        self.file = open(self.path, 'w')
+        self.synced = monotonic()
+        self.write({'key': self.key})
+        for measurement, time_elapsed in entries:
+            self.save(measurement, time_elapsed)
+        self.sync()
+        return entries
+
+    def save(self, measurement, time_elapsed):
+        """Append measurement, it is forced to disk with the next sync"""
+        self.write({'measurement': measurement.to_dict(),
+                    'time_elapsed': time_elapsed})
+        if monotonic() - self.synced >= SYNC_INTERVAL:
+            self.sync()
+
+    def write(self, entry):
+        """Write single line and flush it to the system"""
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+
+    def sync(self):
+        """Force written lines to disk"""
+        os.fsync(self.file.fileno())
+        self.synced = monotonic()
+
+    def close(self, finished=False):
+        """Close file, checkpoint of finished benchmark is removed"""
+        if self.file is not None:
+            if not finished:
+                self.sync()
+            self.file.close()
+            self.file = None
+        if finished and os.path.exists(self.path):
+            os.remove(self.path)
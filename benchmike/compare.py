@@ -0,0 +1,144 @@
+"""Module comparing benchmark of current code against stored baseline sweep
+    Classes:
+    Comparison
+"""
+from math import exp, log
+
+from benchmike import bigoestimator as bigoes
+from benchmike import measurement as mm
+
+DEFAULT_MAX_SLOWDOWN = 1.3
+DEFAULT_ALPHA = 0.05
+# with fewer trials per size Mann-Whitney p-value can not get below 0.05
+MIN_COMPARE_REPEAT = 5
+# complexity change is reported only if verdicts of both sweeps won at least
+# this fraction of bootstrap replicates
+MIN_VERDICT_PROBABILITY = 0.95
+VERDICT_BOOTSTRAP = 200
+
+
+class Comparison:
+    """Per-size ratios of current to baseline run time with Mann-Whitney
+    p-values of their trials, Holm-adjusted over all sizes, and complexity
+    verdicts of both sweeps with their bootstrap probabilities"""
+
+    def __init__(self, baseline, measurements, statistic=None,
+                 metric=mm.DEFAULT_METRIC, complexities=None):
+        self.baseline = baseline
+        self.measurements = measurements
+        self.statistic = statistic or baseline.statistic
+        self.metric = metric
+        current = {measurement.size: measurement
+                   for measurement in measurements}
+        self.missing = []
+        self.rows = []
+        self.complexities = complexities
+        self.cached_verdicts = None
+        for old in baseline.measurements:
+            new = current.get(old.size)
+            if new is None:
+                self.missing.append(old.size)
+                continue
+            old_value = old.get(self.statistic, metric)
+            new_value = new.get(self.statistic, metric)
+            self.rows.append({
+                'size': old.size, 'baseline': old_value,
+                'current': new_value,
+                'ratio': new_value / old_value if old_value > 0 else 1.0,
+                'p_value': mm.mann_whitney(old.values(metric),
+                                           new.values(metric))[1],
+                'trials': min(old.repeats, new.repeats)})
+        for row, p_value in zip(self.rows, mm.holm(
+                [row['p_value'] for row in self.rows])):
+            row['p_holm'] = p_value
+
+    def verdicts(self):
+        """Return tuples (description, bootstrap probability) of baseline
+        and current complexity, both estimated from sizes measured in both
+        sweeps, description is None if there are not enough of them"""
+        if self.cached_verdicts is not None:
+            return self.cached_verdicts
+        sizes = {row['size'] for row in self.rows}
+        verdicts = []
+        for measurements in self.baseline.measurements, self.measurements:
+            points = mm.to_points([measurement for measurement in
+                                   measurements if measurement.size in sizes],
+                                  self.statistic, self.metric)
+            estimator = bigoes.ComplexityEstimator(
+                points, complexities=self.complexities)
+            verdict = estimator.verdict(VERDICT_BOOTSTRAP, 1) if len(
+                points) > 2 else None
+            verdicts.append(
+                (verdict[0].get_description(),
+                 estimator.get_probability(verdict[0])) if verdict
+                else (None, None))
+        self.cached_verdicts = tuple(verdicts)
+        return self.cached_verdicts
+
+    def complexity_changed(self, min_probability=MIN_VERDICT_PROBABILITY):
+        """Return True if verdicts of baseline and current sweep differ and
+        both of them won at least min_probability of bootstrap replicates,
+        i.e. noise alone rarely makes them differ"""
+        (old, old_probability), (new, new_probability) = self.verdicts()
+        return old is not None and new is not None and old != new and \
+            min(old_probability, new_probability) >= min_probability
+
+    def mean_ratio(self):
+        """Return geometric mean of ratios over all sizes"""
+        if not self.rows:
+            return 1.0
+        return exp(sum(log(max(row['ratio'], 1e-12)) for row in self.rows) /
+                   len(self.rows))
+
+    def regressions(self, max_slowdown=DEFAULT_MAX_SLOWDOWN,
+                    alpha=DEFAULT_ALPHA, allow_complexity_change=False):
+        """Return list of messages describing breached thresholds: confident
+        change of complexity, slowdown at any size significant after Holm
+        correction over all sizes or mean slowdown over all sizes greater
+        than max_slowdown"""
+        messages = []
+        (old, _), (new, _) = self.verdicts()
+        if not allow_complexity_change and self.complexity_changed():
+            messages.append("Complexity changed from {} to {}".format(old,
+                                                                     new))
+        for row in self.rows:
+            if row['ratio'] > max_slowdown and row['p_holm'] < alpha:
+                messages.append(
+                    "Size {}: {:.2f}x slower (adjusted p = {:.3g})".format(
+                        row['size'], row['ratio'], row['p_holm']))
+        if self.mean_ratio() > max_slowdown:
+            messages.append("Mean slowdown {:.2f}x".format(self.mean_ratio()))
+        return messages
+
+    def print_report(self, max_slowdown=DEFAULT_MAX_SLOWDOWN,
+                     alpha=DEFAULT_ALPHA, allow_complexity_change=False):
+        """Print per-size comparison and breached thresholds, returns list of
+        regressions"""
+        print("{:>10} {:>12} {:>12} {:>7} {:>9} {:>9}".format(
+            'size', 'baseline', 'current', 'ratio', 'p-value', 'adjusted'))
+        for row in self.rows:
+            print("{:>10} {:>12.4g} {:>12.4g} {:>7.2f} {:>9.3g} {:>9.3g}"
+                  .format(row['size'], row['baseline'], row['current'],
+                          row['ratio'], row['p_value'], row['p_holm']))
+        if self.missing:
+            print("Sizes not measured: {}".format(
+                ', '.join(str(size) for size in self.missing)))
+        few = sum(row['trials'] < MIN_COMPARE_REPEAT for row in self.rows)
+        if few:
+            print("{} sizes have fewer than {} trials in a sweep, their "
+                  "slowdown can not be significant".format(
+                      few, MIN_COMPARE_REPEAT))
+        print()
+        for name, (description, probability) in zip(
+                ('Baseline', 'Current'), self.verdicts()):
+            print("{} complexity: {}{}".format(
+                name, description, '' if probability is None else
+                ', probability {:.1%}'.format(probability)))
+        print("Mean ratio: {:.3f}".format(self.mean_ratio()))
+        regressions = self.regressions(max_slowdown, alpha,
+                                       allow_complexity_change)
+        for message in regressions:
+            print("Regression: {}".format(message))
+        if not regressions:
+            print("No regressions found")
+        return regressions
@@ -4,29 +4,230 @@ and saving results to files.
     Complexity
         Constant
         Logarithmic
+        SquareRoot
         Linear
         Linearithmic
         Quadratic
+        QuadraticLogarithmic
         Polynomial
         SuperPolynomial
+        PowerLaw
+        Exponential
+        LinearQuadratic
+        LinearLinearithmic
+
+    Procedures:
+    get_complexities
+    register
+    lambert_w
+    lambert_w_array
+    inverse
+    inverse_array
 """
-from math import log2, sqrt, isclose
-
-
+from math import exp, log, log2, sqrt
+
+# relative tolerance of iterative solvers
+TOLERANCE = 1e-12
+MAX_ITERATIONS = 100
+MAX_DOUBLINGS = 1100
+
+# description -> complexity class, ComplexityEstimator fits all of them
+REGISTRY = {}
+
+
+def register(complexity):
+    """Class decorator adding complexity to REGISTRY, custom complexities
+    registered before estimation take part in model selection"""
+    REGISTRY[complexity.get_description()] = complexity
+    return complexity
+
+
+def lambert_w(x):
+    """Principal branch of Lambert W function for x >= 0, solves
+    w * exp(w) = x with Halley iteration, copied to generated code so it
+    does not use module constants"""
+    if x == 0:
+        return 0.0
+    if x < 3:
+        w = log(1 + x) * 0.75
+    else:
+        w = log(x) - log(log(x))
+    for _ in range(100):
+        e_w = exp(w)
+        f = w * e_w - x
+        step = f / (e_w * (w + 1) - (w + 2) * f / (2 * w + 2))
+        w -= step
+        if abs(step) <= 1e-12 * (1 + abs(w)):
+            break
+    return w
+
+
+def lambert_w_array(xs):
+    """Vectorized lambert_w for numpy array of non-negative values"""
+    import numpy as np
+    xs = np.asarray(xs, dtype=float)
+    safe = np.maximum(xs, np.finfo(float).tiny)
+    small = xs < 3
+    w = np.where(small, np.log1p(xs) * 0.75,
+                 np.log(safe) - np.log(np.log(np.maximum(safe, 3))))
+    for _ in range(MAX_ITERATIONS):
+        e_w = np.exp(w)
+        f = w * e_w - xs
+        step = f / (e_w * (w + 1) - (w + 2) * f / (2 * w + 2))
+        w -= step
+        if np.all(np.abs(step) <= TOLERANCE * (1 + np.abs(w))):
+            break
+    return w
+
+
+def inverse(fun, value, derivative=None, low=1.0):
+    """Calculate argument of increasing fun given its value, root is
+    bracketed by doubling upper end and refined with Newton steps, which
+    fall back to bisection whenever they leave the bracket. Without
+    derivative secant of the bracket is used, copied to generated code so it
+    does not use module constants"""
+    if fun(low) >= value:
+        return low
+    high = 2 * low
+    for _ in range(1100):
+        if fun(high) >= value:
+            break
+        low, high = high, high * 2
+    else:
+        return float('inf')
+    x = high
+    for _ in range(100):
+        f = fun(x) - value
+        if f == 0:
+            return x
+        if f < 0:
+            low = x
+        else:
+            high = x
+        if high - low <= 1e-12 * high:
+            break
+        if derivative is not None:
+            slope = derivative(x)
+        else:
+            slope = (fun(high) - fun(low)) / (high - low)
+        candidate = x - f / slope if slope > 0 else low
+        x = candidate if low < candidate < high else (low + high) / 2
+    return x
+
+
+def inverse_array(fun, values, derivative, low=1.0):
+    """Vectorized inverse for numpy array of values, fun and derivative
+    have to accept arrays"""
+    import numpy as np
+    values = np.asarray(values, dtype=float)
+    start = low = np.full_like(values, low)
+    below = fun(low) >= values
+    high = low * 2
+    for _ in range(MAX_DOUBLINGS):
+        short = fun(high) < values
+        if not np.any(short):
+            break
+        low = np.where(short, high, low)
+        high = np.where(short, high * 2, high)
+    x = high.copy()
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(MAX_ITERATIONS):
+            f = fun(x) - values
+            low = np.where(f < 0, x, low)
+            high = np.where(f > 0, x, high)
+            done = (f == 0) | (high - low <= TOLERANCE * high)
+            if np.all(done):
+                break
+            candidate = x - f / derivative(x)
+            inside = (low < candidate) & (candidate < high)
+            x = np.where(done, x, np.where(inside, candidate,
+                                            (low + high) / 2))
+    return np.where(below, start, x)
+
+
+@register
 class Linear:
-    """Base complexity class"""
-    requires_inverse = False
+    """Base complexity class, model a_1 * T(N) + a_0"""
+    # functions generated code of get_max_size depends on
+    helpers = ()
+    # values of T(N) overflow floats, regression uses get_log2_n_array
+    log_scale = False
+    # number of fitted parameters, penalized by information criteria
+    parameters = 2
+    # fitted together with other single term models, otherwise by fit()
+    batched = True
 
     @staticmethod
     def get_n(size):
         """Return T(N) for scaling used in linear regression"""
         return size
 
+    @staticmethod
+    def get_n_array(sizes):
+        """Vectorized get_n for numpy array of sizes"""
+        return sizes
+
+    @classmethod
+    def get_log2_n_array(cls, sizes):
+        """Return log2 of T(N) for array of sizes"""
+        import numpy as np
+        return np.log2(cls.get_n_array(sizes))
+
+    @classmethod
+    def get_terms_array(cls, sizes):
+        """Return list of arrays of terms multiplied by fitted coefficients,
+        constant term is always added"""
+        return [cls.get_n_array(sizes)]
+
+    @classmethod
+    def fit(cls, sizes, times, weights=None):
+        """Fit coefficients to numpy arrays of sizes and times by weighted
+        least squares, returns None if the fit is underdetermined"""
+        import numpy as np
+        terms = cls.get_terms_array(sizes)
+        scales = [1.0 / max(np.max(np.abs(term)), np.finfo(float).tiny)
+                  for term in terms]
+        design = np.stack([term * scale for term, scale in zip(terms, scales)]
+                          + [np.ones_like(sizes)], axis=1)
+        if (len(sizes) <= cls.parameters or
+                np.linalg.matrix_rank(design) < design.shape[1]):
+            return None
+        root = np.ones_like(times) if weights is None else np.sqrt(weights)
+        solution = np.linalg.lstsq(design * root[:, np.newaxis],
+                                   times * root, rcond=None)[0]
+        coefficients = np.concatenate([solution[:-1] * scales,
+                                       solution[-1:]])
+        if len(terms) > 1 and (solution[0] < 0 or np.any(np.diff(
+                cls.get_time_array(np.unique(sizes), *coefficients)) < 0)):
+            # negative leading term or time decreasing with size means it
+            # only bends a simpler model to the noise, lower terms may be
+            # negative, e.g. n * log n - n
+            return None
+        return coefficients
+
+    @classmethod
+    def get_time_array(cls, sizes, *coefficients):
+        """Vectorized get_time for numpy array of sizes"""
+        terms = cls.get_terms_array(sizes)
+        return sum(coefficient * term for coefficient, term in
+                   zip(coefficients, terms)) + coefficients[-1]
+
+    @classmethod
+    def describe(cls, coefficients):
+        """Return description of fitted model, models with fitted exponent
+        include it"""
+        return cls.get_description()
+
     @staticmethod
     def get_t(time):
         """Return N(T) for scaling used in linear regression"""
         return time
 
+    @staticmethod
+    def get_t_array(times):
+        """Vectorized get_t for numpy array of times"""
+        return times
+
     @staticmethod
     def get_time(size, a_1=1, a_0=0):
         """Return estimated code runtime"""
@@ -37,19 +238,45 @@ class Linear:
         """Return max input size for specified runtime"""
         return int((time - a_0) / a_1)
 
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        """Vectorized get_max_size for numpy array of runtimes, sizes are
+        floats as they may be infinite"""
+        import numpy as np
+        return np.floor((np.asarray(times, dtype=float) - a_0) / a_1)
+
     @staticmethod
     def get_description():
         """Returns description of complexity class, e.g. O(1)"""
         return 'O(n) - linear'
 
 
+@register
 class Constant(Linear):
-    """O(1) complexity class"""
+    """O(1) complexity class, coefficients are (0, mean time)"""
+    parameters = 1
+    batched = False
 
     @staticmethod
     def get_n(size):
         return 1
 
+    @staticmethod
+    def get_n_array(sizes):
+        import numpy as np
+        return np.ones_like(sizes)
+
+    @staticmethod
+    def get_terms_array(sizes):
+        return []
+
+    @classmethod
+    def fit(cls, sizes, times, weights=None):
+        import numpy as np
+        if len(sizes) <= cls.parameters:
+            return None
+        return np.array([0.0, np.average(times, weights=weights)])
+
     @staticmethod
     def get_description():
         return 'O(1) - constant'
@@ -64,7 +291,13 @@ class Constant(Linear):
             return 0
         return "inf"
 
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        return np.where(np.asarray(times) < a_0, 0.0, np.inf)
 
+
+@register
 class Logarithmic(Linear):
     """O(log n) complexity class"""
 
@@ -72,6 +305,11 @@ class Logarithmic(Linear):
     def get_n(size):
         return log2(size)
 
+    @staticmethod
+    def get_n_array(sizes):
+        import numpy as np
+        return np.log2(sizes)
+
     @staticmethod
     def get_description():
         return 'O(log n) - logarithmic'
@@ -84,14 +322,57 @@ class Logarithmic(Linear):
     def get_max_size(time, a_1, a_0):
         return int(2 ** ((time - a_0) / a_1))
 
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        return np.floor(np.exp2((np.asarray(times, dtype=float) - a_0) / a_1))
+
+
+@register
+class SquareRoot(Linear):
+    """O(sqrt n) complexity class"""
+
+    @staticmethod
+    def get_n(size):
+        return sqrt(size)
+
+    @staticmethod
+    def get_n_array(sizes):
+        import numpy as np
+        return np.sqrt(sizes)
+
+    @staticmethod
+    def get_description():
+        return 'O(sqrt n) - square root'
 
+    @staticmethod
+    def get_time(size, a_1=0, a_0=0):
+        return a_1 * sqrt(size) + a_0
+
+    @staticmethod
+    def get_max_size(time, a_1, a_0):
+        return int(((time - a_0) / a_1) ** 2)
+
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        return np.floor(((np.asarray(times, dtype=float) - a_0) / a_1) ** 2)
+
+
+@register
 class Linearithmic(Linear):
     """O(n*log n) complexity class"""
+    helpers = (lambert_w,)
 
     @staticmethod
     def get_n(size):
         return size * log2(size)
 
+    @staticmethod
+    def get_n_array(sizes):
+        import numpy as np
+        return sizes * np.log2(sizes)
+
     @staticmethod
     def get_description():
         return 'O(n * log n) - linearithmic'
@@ -103,9 +384,22 @@ class Linearithmic(Linear):
 
     @staticmethod
     def get_max_size(time, a_1, a_0):
-        return int(inverse(lambda x: a_1 * x * log2(x) + a_0, time))
+        # n * log2(n) = t is ln(n) * exp(ln(n)) = t * ln(2)
+        budget = (time - a_0) / a_1 * log(2)
+        if budget <= 0:
+            return 0
+        return int(budget / lambert_w(budget))
+
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        budgets = (np.asarray(times, dtype=float) - a_0) / a_1 * log(2)
+        positive = budgets > 0
+        safe = np.where(positive, budgets, 1.0)
+        return np.where(positive, np.floor(safe / lambert_w_array(safe)), 0.0)
 
 
+@register
 class Quadratic(Linear):
     """O(n^2) complexity class"""
 
@@ -113,6 +407,10 @@ class Quadratic(Linear):
     def get_n(size):
         return size * size
 
+    @staticmethod
+    def get_n_array(sizes):
+        return sizes * sizes
+
     @staticmethod
     def get_description():
         return 'O(n^2) - quadratic'
@@ -125,17 +423,68 @@ class Quadratic(Linear):
     def get_max_size(time, a_1, a_0):
         return int(sqrt((time - a_0) / a_1))
 
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        return np.floor(np.sqrt((np.asarray(times, dtype=float) - a_0) / a_1))
+
+
+@register
+class QuadraticLogarithmic(Linear):
+    """O(n^2*log n) complexity class"""
+    helpers = (lambert_w,)
+
+    @staticmethod
+    def get_n(size):
+        return size * size * log2(size)
 
+    @staticmethod
+    def get_n_array(sizes):
+        import numpy as np
+        return sizes * sizes * np.log2(sizes)
+
+    @staticmethod
+    def get_description():
+        return 'O(n^2 * log n) - quadratic logarithmic'
+
+    @staticmethod
+    def get_time(size, a_1=0, a_0=0):
+        time = a_1 * size * size * log2(size) + a_0
+        return 0.0 if time < 0.0 else time
+
+    @staticmethod
+    def get_max_size(time, a_1, a_0):
+        # with u = n^2 it is u * log2(u) = 2 * t, solved as for n * log n
+        budget = 2 * (time - a_0) / a_1 * log(2)
+        if budget <= 0:
+            return 0
+        return int(sqrt(budget / lambert_w(budget)))
+
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        budgets = 2 * (np.asarray(times, dtype=float) - a_0) / a_1 * log(2)
+        positive = budgets > 0
+        safe = np.where(positive, budgets, 1.0)
+        return np.where(positive,
+                        np.floor(np.sqrt(safe / lambert_w_array(safe))), 0.0)
+
+
+@register
 class Polynomial(Linear):
-    """O(n^k) complexity class"""
+    """O(n^3) complexity class"""
 
     @staticmethod
     def get_n(size):
         return int(size ** 3)
 
+    @staticmethod
+    def get_n_array(sizes):
+        return sizes ** 3
+
     @staticmethod
     def get_description():
-        return 'O(n^k) - O(n^3) or worse polynomial'
+        return 'O(n^3) - cubic'
 
     @staticmethod
     def get_time(size, a_1=0, a_0=0):
@@ -145,14 +494,37 @@ class Polynomial(Linear):
     def get_max_size(time, a_1, a_0):
         return int(((time - a_0) / a_1) ** (1. / 3))
 
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        return np.floor(np.cbrt((np.asarray(times, dtype=float) - a_0) / a_1))
+
 
+@register
 class SuperPolynomial(Linear):
     """O(2^n) complexity class"""
+    log_scale = True
 
     @staticmethod
     def get_n(size):
         return int(2 ** size)
 
+    @staticmethod
+    def get_n_array(sizes):
+        import numpy as np
+        return np.exp2(sizes)
+
+    @staticmethod
+    def get_log2_n_array(sizes):
+        return sizes
+
+    @staticmethod
+    def get_time_array(sizes, a_1, a_0):
+        import numpy as np
+        if a_1 == 0:
+            return np.full_like(sizes, a_0)
+        return np.sign(a_1) * np.exp2(sizes + np.log2(abs(a_1))) + a_0
+
     @staticmethod
     def get_description():
         return 'O(2^n) - superpolynomial'
@@ -165,18 +537,198 @@ class SuperPolynomial(Linear):
     def get_max_size(time, a_1, a_0):
         return int(log2((time - a_0) / a_1))
 
+    @staticmethod
+    def get_max_size_array(times, a_1, a_0):
+        import numpy as np
+        return np.floor(np.log2((np.asarray(times, dtype=float) - a_0) / a_1))
+
+
+@register
+class PowerLaw(Linear):
+    """O(n^k) complexity class with exponent fitted by log-log regression,
+    coefficients are (a, k) of a * n^k"""
+    # a and k, there is no constant term
+    parameters = 2
+    batched = False
+
+    @classmethod
+    def fit(cls, sizes, times, weights=None):
+        # residuals of log times are already relative, weights are not used
+        import numpy as np
+        positive = times > 0
+        if (np.count_nonzero(positive) <= cls.parameters or
+                np.ptp(sizes[positive]) == 0):
+            return None
+        k, log_a = np.polyfit(np.log(sizes[positive]),
+                              np.log(times[positive]), 1)
+        return np.array([np.exp(log_a), k])
 
-def inverse(fun, value):
-    """Calculate argument of f given its value"""
-    epsilon = 1e-09
-    start = middle = 1e-09
-    end = 1e9
-    while abs(end - start) > epsilon:
-        middle = (start + end) / 2
-        if isclose(fun(middle) - value, 0.0):
-            break
-        elif fun(middle) - value > 0 and fun(start) < value:
-            end = middle
-        else:
-            start = middle
-    return middle
+    @staticmethod
+    def get_time_array(sizes, a, k):
+        return a * sizes ** k
+
+    @classmethod
+    def describe(cls, coefficients):
+        return 'O(n^{:.2f}) - polynomial'.format(coefficients[1])
+
+    @staticmethod
+    def get_description():
+        return 'O(n^k) - polynomial'
+
+    @staticmethod
+    def get_time(size, a=1, k=1):
+        return a * size ** k
+
+    @staticmethod
+    def get_max_size(time, a, k):
+        if time <= 0:
+            return 0
+        return int((time / a) ** (1. / k))
+
+    @staticmethod
+    def get_max_size_array(times, a, k):
+        import numpy as np
+        times = np.maximum(np.asarray(times, dtype=float), 0.0)
+        return np.floor((times / a) ** (1. / k))
+
+
+@register
+class Exponential(Linear):
+    """O(k^n) complexity class with base fitted by regression of log time,
+    coefficients are (a, k) of a * k^n"""
+    # a and k, like PowerLaw
+    parameters = 2
+    batched = False
+
+    @classmethod
+    def fit(cls, sizes, times, weights=None):
+        # residuals of log times are already relative, weights are not used
+        import numpy as np
+        positive = times > 0
+        if (np.count_nonzero(positive) <= cls.parameters or
+                np.ptp(sizes[positive]) == 0):
+            return None
+        log_k, log_a = np.polyfit(sizes[positive], np.log(times[positive]),
+                                  1)
+        return np.array([np.exp(log_a), np.exp(log_k)])
+
+    @staticmethod
+    def get_time_array(sizes, a, k):
+        import numpy as np
+        return a * np.exp(sizes * log(k))
+
+    @classmethod
+    def describe(cls, coefficients):
+        return 'O({:.6g}^n) - exponential'.format(coefficients[1])
+
+    @staticmethod
+    def get_description():
+        return 'O(k^n) - exponential'
+
+    @staticmethod
+    def get_time(size, a=1, k=2):
+        return a * k ** size
+
+    @staticmethod
+    def get_max_size(time, a, k):
+        if time <= 0:
+            return 0
+        return int(log(time / a) / log(k))
+
+    @staticmethod
+    def get_max_size_array(times, a, k):
+        import numpy as np
+        times = np.maximum(np.asarray(times, dtype=float), 0.0)
+        with np.errstate(divide='ignore'):
+            return np.maximum(np.floor(np.log(times / a) / log(k)), 0.0)
+
+
+class LinearQuadratic(Linear):
+    """O(n^2) complexity class with linear term, for linear code with
+    quadratic tail, coefficients are (a_2, a_1, a_0), fitted only if asked
+    by get_complexities"""
+    parameters = 3
+    batched = False
+
+    @staticmethod
+    def get_terms_array(sizes):
+        return [sizes * sizes, sizes]
+
+    @staticmethod
+    def get_description():
+        return 'O(n^2 + n) - quadratic with linear term'
+
+    @staticmethod
+    def get_time(size, a_2=0, a_1=0, a_0=0):
+        return a_2 * size ** 2 + a_1 * size + a_0
+
+    @staticmethod
+    def get_max_size(time, a_2, a_1, a_0):
+        # larger root of a_2 * n^2 + a_1 * n + (a_0 - t), in stable form
+        constant = a_0 - time
+        if constant >= 0:
+            return 0
+        if a_2 == 0:
+            return int(-constant / a_1)
+        discriminant = a_1 * a_1 - 4 * a_2 * constant
+        if discriminant < 0 or a_1 + sqrt(discriminant) <= 0:
+            return 0
+        return int(-2 * constant / (a_1 + sqrt(discriminant)))
+
+    @staticmethod
+    def get_max_size_array(times, a_2, a_1, a_0):
+        import numpy as np
+        constants = np.minimum(a_0 - np.asarray(times, dtype=float), 0.0)
+        roots = np.sqrt(np.maximum(a_1 * a_1 - 4 * a_2 * constants, 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sizes = -2 * constants / (a_1 + roots)
+        return np.floor(np.where(np.isfinite(sizes) & (sizes > 0), sizes,
+                                 0.0))
+
+
+class LinearLinearithmic(Linear):
+    """O(n*log n) complexity class with linear term, coefficients are
+    (a_2, a_1, a_0), fitted only if asked by get_complexities"""
+    parameters = 3
+    batched = False
+    helpers = (inverse,)
+
+    @staticmethod
+    def get_terms_array(sizes):
+        import numpy as np
+        return [sizes * np.log2(sizes), sizes]
+
+    @staticmethod
+    def get_description():
+        return 'O(n * log n + n) - linearithmic with linear term'
+
+    @staticmethod
+    def get_time(size, a_2=0, a_1=0, a_0=0):
+        return a_2 * size * log2(size) + a_1 * size + a_0
+
+    @staticmethod
+    def get_max_size(time, a_2, a_1, a_0):
+        return int(inverse(lambda n: a_2 * n * log2(n) + a_1 * n + a_0, time,
+                           lambda n: a_2 * (log2(n) + 1 / log(2)) + a_1))
+
+    @staticmethod
+    def get_max_size_array(times, a_2, a_1, a_0):
+        import numpy as np
+        return np.floor(inverse_array(
+            lambda n: a_2 * n * np.log2(n) + a_1 * n + a_0, times,
+            lambda n: a_2 * (np.log2(n) + 1 / log(2)) + a_1))
+
+
+# models with two terms, they fit noise of single term data too well to be
+# compared by default
+TWO_TERM = (LinearQuadratic, LinearLinearithmic)
+
+
+def get_complexities(two_term=False):
+    """Return dict description -> complexity of registered complexities,
+    with two_term two term ones as well, REGISTRY is left as it is"""
+    complexities = dict(REGISTRY)
+    if two_term:
+        complexities.update((complexity.get_description(), complexity)
+                            for complexity in TWO_TERM)
+    return complexities
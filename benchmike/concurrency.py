@@ -0,0 +1,201 @@
+"""Module for measuring how throughput and latency of coroutine run(size)
+scale with number of concurrent tasks at fixed problem size
+    Classes:
+    ConcurrencyBenchmark
+
+    Procedures:
+    get_levels
+    percentile
+"""
+import csv
+from inspect import iscoroutinefunction
+from multiprocessing import Process, Queue
+from queue import Empty
+from signal import signal, alarm, SIGALRM
+from statistics import mean, quantiles
+from time import perf_counter
+
+from benchmike import bigoestimator as bigoes
+from benchmike import exceptions as err
+from benchmike.benchmark import (CodeBenchmark, CODE_MODULE_NAME,
+                                 WORKER_GRACE_PERIOD, new_event_loop,
+                                 no_set_up, run_on_loop)
+from benchmike.customlogger import CustomLogger, LOGGER_NAME
+
+DEFAULT_MAX_CONCURRENCY = 64
+LEVEL_FACTOR = 2
+PERCENTILES = (50, 90, 99)
+REPORT_FIELDS = ('concurrency', 'requests', 'throughput', 'efficiency',
+                 'mean_latency') + tuple('p{}_latency'.format(percent)
+                                         for percent in PERCENTILES)
+
+
+def get_levels(max_concurrency, factor=LEVEL_FACTOR):
+    """Return concurrency levels 1, factor, factor^2, ... ending with
+    max_concurrency"""
+    levels = [1]
+    while levels[-1] < max_concurrency:
+        levels.append(min(levels[-1] * factor, max_concurrency))
+    return levels
+
+
+def percentile(values, percent):
+    """Return percentile of values interpolated between closest ranks"""
+    if len(values) < 2:
+        return values[0]
+    return quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+class ConcurrencyBenchmark:
+    """Class measuring throughput and latency percentiles of coroutine
+    run(size) at fixed size while number of concurrent run tasks grows
+
+    set_up(size) is called once, then every concurrency level gets equal
+    share of remaining time budget. Each of its tasks calls run(size) again
+    and again until the share is used, so every task completes at least one
+    call. Whole benchmark runs on one event loop in separate process.
+    """
+
+    logger = CustomLogger(LOGGER_NAME)
+
+    def __init__(self, path, timeout, size, levels, set_up_name='set_up',
+                 run_name='run'):
+        self.timeout = timeout
+        self.size = size
+        self.levels = levels
+        self.set_up_name = set_up_name
+        self.run_name = run_name
+        self.queue = Queue()
+        self.rows = []
+        with open(path) as file:
+            self.code = compile(file.read(), path, 'exec')
+        self.logger.log(
+            "Started concurrency benchmark with path {}, size {}, "
+            "levels {}".format(path, size, levels))
+
+    async def measure_level(self, run, concurrency, duration):
+        """Run concurrency tasks calling run(size) for duration seconds,
+        returns dict with throughput and latencies"""
+        import asyncio
+        latencies = []
+        deadline = perf_counter() + duration
+
+        async def client():
+            while True:
+                start = perf_counter()
+                await run(self.size)
+                end = perf_counter()
+                latencies.append(end - start)
+                if end >= deadline:
+                    return
+
+        start_time = perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = perf_counter() - start_time
+        row = {'concurrency': concurrency,
+               'requests': len(latencies),
+               'throughput': len(latencies) / elapsed,
+               'mean_latency': mean(latencies)}
+        for percent in PERCENTILES:
+            row['p{}_latency'.format(percent)] = percentile(latencies,
+                                                            percent)
+        return row
+
+    def measure(self):
+        """Measure all levels, returns list of rows, levels which did not
+        fit in time budget are missing"""
+        namespace = {'__name__': CODE_MODULE_NAME}
+        exec(self.code, namespace)
+        set_up = namespace.get(self.set_up_name) if self.set_up_name else \
+            no_set_up
+        run = namespace.get(self.run_name)
+        if not callable(set_up) or not iscoroutinefunction(run):
+            raise err.FunctionsNotFoundError(
+                "Could not find {}() method or coroutine function {}() in "
+                "input file".format(self.set_up_name, self.run_name))
+        deadline = perf_counter() + self.timeout
+        rows = []
+        loop = new_event_loop()
+        alarm(self.timeout + WORKER_GRACE_PERIOD)
+        try:
+            run_on_loop(set_up, loop)(self.size)
+            for index, concurrency in enumerate(self.levels):
+                duration = (deadline - perf_counter()) / (len(self.levels) -
+                                                          index)
+                if duration <= 0:
+                    break
+                rows.append(loop.run_until_complete(
+                    self.measure_level(run, concurrency, duration)))
+        except err.FunTimeoutError:
+            pass
+        finally:
+            alarm(0)
+            loop.close()
+        return rows
+
+    def run_code(self):
+        """Runs in separate process, puts list of rows or exception to
+        queue"""
+        signal(SIGALRM, CodeBenchmark.signal_handler)
+        try:
+            self.queue.put(self.measure())
+        except err.FunctionsNotFoundError as ex:
+            self.queue.put(ex)
+        except Exception as ex:
+            self.queue.put(RuntimeError(repr(ex)))
+
+    def run(self):
+        """Run benchmark, returns list of dicts with REPORT_FIELDS for every
+        measured concurrency level"""
+        process = Process(target=self.run_code)
+        process.start()
+        try:
+            result = self.queue.get(
+                timeout=self.timeout + 2 * WORKER_GRACE_PERIOD)
+        except Empty:
+            process.terminate()
+            result = RuntimeError("Process did not finish in time")
+        process.join()
+        if isinstance(result, Exception):
+            raise err.BenchmarkRuntimeError(str(result))
+        if not result:
+            raise err.BenchmarkRuntimeError(
+                "No concurrency level finished in time")
+        for row in result:
+            row['efficiency'] = row['throughput'] / (
+                row['concurrency'] * result[0]['throughput'])
+        self.rows = result
+        self.logger.log("Finished concurrency benchmark with {} levels".format(
+            len(result)))
+        return result
+
+    def latency_verdict(self, field='p50_latency'):
+        """Return description of complexity of latency percentile as a
+        function of concurrency, None if there are not enough levels"""
+        points = [(row['concurrency'], row[field]) for row in self.rows]
+        verdict = bigoes.ComplexityEstimator(points, 'latency').verdict()
+        if verdict is None:
+            return None
+        return verdict[0].describe(verdict[1])
+
+    def save_report(self, filename):
+        """Print table of levels and save it as CSV file"""
+        print("Concurrency report, size {}".format(self.size))
+        print("{:>11} {:>9} {:>12} {:>10} {:>12} {:>12} {:>12}".format(
+            'concurrency', 'requests', 'throughput', 'efficiency',
+            'p50 latency', 'p90 latency', 'p99 latency'))
+        for row in self.rows:
+            print("{:>11} {:>9} {:>10.1f}/s {:>10.2f} {:>12.3g} {:>12.3g} "
+                  "{:>12.3g}".format(row['concurrency'], row['requests'],
+                                     row['throughput'], row['efficiency'],
+                                     row['p50_latency'], row['p90_latency'],
+                                     row['p99_latency']))
+        verdict = self.latency_verdict()
+        if verdict is not None:
+            print("Median latency as function of concurrency n: {}".format(
+                verdict))
+        with open(filename, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        print("Successfully written to {}".format(filename))
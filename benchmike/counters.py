@@ -0,0 +1,139 @@
+"""Module reading event counters of the measuring process: hardware and
+software events of perf_event_open on Linux, context switches reported by
+getrusage and memory blocks allocated by Python
+    Classes:
+    Counters
+    PerfEvent
+    PerfEventAttr
+
+    Procedures:
+    available_events
+    perf_event_open
+"""
+import ctypes
+import os
+import platform
+import struct
+import sys
+from resource import getrusage, RUSAGE_SELF
+
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_SOFTWARE = 1
+# name -> (type, config) of events, configs are from linux/perf_event.h
+PERF_EVENTS = {'cycles': (PERF_TYPE_HARDWARE, 0),
+               'instructions': (PERF_TYPE_HARDWARE, 1),
+               'cache_misses': (PERF_TYPE_HARDWARE, 3),
+               'page_faults': (PERF_TYPE_SOFTWARE, 2)}
+RUSAGE_COUNTERS = ('voluntary_switches', 'involuntary_switches')
+COUNTERS = tuple(PERF_EVENTS) + RUSAGE_COUNTERS + ('allocated_blocks',)
+SYSCALL_NUMBERS = {'x86_64': 298, 'i386': 336, 'i686': 336, 'aarch64': 241,
+                   'armv7l': 364, 'ppc64le': 319, 's390x': 331}
+# counts user space events only, which unprivileged processes may do with
+# default perf_event_paranoid
+EXCLUDE_KERNEL = 1 << 5
+EXCLUDE_HV = 1 << 6
+# time enabled and time running are read with value, they differ when
+# kernel multiplexes more events than there are hardware counters
+READ_FORMAT = 1 | 2
+PERF_FLAG_FD_CLOEXEC = 1 << 3
+
+
+class PerfEventAttr(ctypes.Structure):
+    """First version (64 bytes) of struct perf_event_attr, flags bitfield is
+    kept as single integer"""
+    _fields_ = [('type', ctypes.c_uint32),
+                ('size', ctypes.c_uint32),
+                ('config', ctypes.c_uint64),
+                ('sample_period', ctypes.c_uint64),
+                ('sample_type', ctypes.c_uint64),
+                ('read_format', ctypes.c_uint64),
+                ('flags', ctypes.c_uint64),
+                ('wakeup_events', ctypes.c_uint32),
+                ('bp_type', ctypes.c_uint32),
+                ('config1', ctypes.c_uint64)]
+
+
+def perf_event_open(event_type, config):
+    """Open counter of event counting calling thread on any CPU, returns
+    file descriptor, raises OSError when it is not supported or permitted"""
+    number = SYSCALL_NUMBERS.get(platform.machine())
+    if not sys.platform.startswith('linux') or number is None:
+        raise OSError("perf_event_open is not supported on {} {}".format(
+            sys.platform, platform.machine()))
+    attr = PerfEventAttr(type=event_type, size=ctypes.sizeof(PerfEventAttr),
+                         config=config, read_format=READ_FORMAT,
+                         flags=EXCLUDE_KERNEL | EXCLUDE_HV)
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.syscall(ctypes.c_long(number), ctypes.byref(attr),
+                      ctypes.c_int(0), ctypes.c_int(-1), ctypes.c_int(-1),
+                      ctypes.c_ulong(PERF_FLAG_FD_CLOEXEC))
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return fd
+
+
+class PerfEvent:
+    """Open perf_event_open counter, counts from the moment it is opened"""
+
+    def __init__(self, name):
+        self.name = name
+        self.fd = perf_event_open(*PERF_EVENTS[name])
+
+    def read(self):
+        """Return count of events, scaled up if event was multiplexed"""
+        value, enabled, running = struct.unpack('QQQ', os.read(self.fd, 24))
+        return value * enabled / running if running else 0.0
+
+    def close(self):
+        """Close file descriptor of counter"""
+        os.close(self.fd)
+
+
+def available_events():
+    """Return tuple (names of perf events which can be opened, error of the
+    first one which can not or None)"""
+    names = []
+    error = None
+    for name in PERF_EVENTS:
+        try:
+            PerfEvent(name).close()
+            names.append(name)
+        except OSError as ex:
+            error = error or ex
+    return tuple(names), error
+
+
+class Counters:
+    """Reads perf events given by names, context switches and allocated
+    blocks of the process, perf events are opened within with statement.
+    read before and after run gives deltas of all COUNTERS but unavailable
+    perf events"""
+
+    def __init__(self, names):
+        self.names = names
+        self.events = []
+
+    def __enter__(self):
+        self.events = [PerfEvent(name) for name in self.names]
+        return self
+
+    def __exit__(self, *exc_info):
+        for event in self.events:
+            event.close()
+        self.events = []
+
+    def read(self):
+        """Return dict counter -> current value"""
+        values = {event.name: event.read() for event in self.events}
+        usage = getrusage(RUSAGE_SELF)
+        values.update(voluntary_switches=usage.ru_nvcsw,
+                      involuntary_switches=usage.ru_nivcsw,
+                      allocated_blocks=sys.getallocatedblocks())
+        return values
+
+    @staticmethod
+    def deltas(start, end, number=1):
+        """Return dict counter -> its change between two readings divided by
+        number of run calls"""
+        return {name: (end[name] - start[name]) / number for name in start}
@@ -1,30 +1,128 @@
+"""Module with logger writing structured events of benchmike as JSON lines
+    Classes:
+    CustomLogger
+    JsonFormatter
+
+    Procedures:
+    reset_listeners
+    start_listener
+    stop_listener
+"""
+import json
 import logging
+import os
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.util import Finalize
+from queue import SimpleQueue
+from time import perf_counter_ns, time_ns
 
 LOGGER_NAME = 'benchmike_log'
 
+# one background writer per log file, shared by all CustomLogger instances
+# of the process, every process has its own writer appending to the file
+listeners = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats record as single JSON object with wall clock time in
+    nanoseconds, pid, level, message and fields of event"""
+
+    def format(self, record):
+        event = {'time_ns': getattr(record, 'time_ns',
+                                    int(record.created * 1e9)),
+                 'pid': record.process,
+                 'level': record.levelname,
+                 'message': record.getMessage()}
+        event.update(getattr(record, 'event', {}))
+        return json.dumps(event, default=str)
+
+
+def start_listener(log_name):
+    """Attach queue handler to logger log_name and start background thread
+    writing its records to file of the same name, returns the logger"""
+    logger = logging.getLogger(log_name)
+    if log_name in listeners:
+        return logger
+    queue = SimpleQueue()
+    handler = logging.FileHandler(log_name, delay=True)
+    handler.setFormatter(JsonFormatter())
+    listener = QueueListener(queue, handler)
+    listener.start()
+    listeners[log_name] = listener
+    logger.addHandler(QueueHandler(queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    # finalizers run at exit of main process and of multiprocessing children
+    Finalize(None, stop_listener, args=(log_name,), exitpriority=0)
+    return logger
+
+
+def stop_listener(log_name):
+    """Write all queued records and stop background writer of log_name"""
+    listener = listeners.pop(log_name, None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def reset_listeners():
+    """Forget writers inherited by forked process, their threads do not
+    exist in it, so it starts its own on first record"""
+    for log_name in listeners:
+        logging.getLogger(log_name).handlers.clear()
+    listeners.clear()
+
+
+os.register_at_fork(after_in_child=reset_listeners)
+
 
 class CustomLogger:
-    """Custom class for loggin function activity and simple messages"""
+    """Custom class for logging messages and spans of benchmark phases
+
+    Records are put to a queue and written to file as JSON lines by
+    background thread, so logging never blocks on I/O. Nothing is written
+    until the first record, the file is appended to. Every process has its
+    own queue and writer, so a measuring process killed after timeout cannot
+    block others. Span timestamps are taken from perf_counter_ns, a
+    monotonic clock shared by processes on the same machine.
+    """
 
     def __init__(self, log_name):
         self.log_name = log_name
-        logging.basicConfig(level=logging.DEBUG, filename=log_name)
-        self.clear_log()
 
-    def log(self, msg):
-        """Log message"""
-        logging.info(msg)
+    def get_logger(self):
+        """Return logger, background writer is started on first use in
+        every process"""
+        return start_listener(self.log_name)
+
+    def log(self, msg, **fields):
+        """Log message with optional event fields"""
+        self.get_logger().info(msg, extra={'time_ns': time_ns(),
+                                           'event': fields})
+
+    def span(self, name, start_ns, end_ns, **fields):
+        """Log span of phase name between two perf_counter_ns readings"""
+        self.log(name, event='span', span=name, start_ns=start_ns,
+                 end_ns=end_ns, duration_ns=end_ns - start_ns, **fields)
+
+    def timed(self, name):
+        """Decorator logging every call of function as span name"""
+
+        def decorator(function):
 
-    def log_fun(self, f):
-        """Log function application result"""
+            def wrapper(*args):
+                start_ns = perf_counter_ns()
+                result = function(*args)
+                self.span(name, start_ns, perf_counter_ns(),
+                          function=function.__name__)
+                return result
 
-        def tmp(*args):
-            result = f(*args)
-            self.log(f.__name__ + str(args) + " = " + str(result))
-            return result
+            return wrapper
 
-        return tmp
+        return decorator
 
     def clear_log(self):
+        """Remove events written so far"""
         with open(self.log_name, "w"):
             pass
@@ -0,0 +1,51 @@
+"""Module describing machine and interpreter benchmarks are run on
+    Procedures:
+    get_environment
+    get_fingerprint
+"""
+import json
+import platform
+from hashlib import sha256
+
+CPU_INFO_FILE = '/proc/cpuinfo'
+GOVERNOR_FILE = '/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor'
+
+
+def read_cpu_model():
+    """Return CPU model name, falls back to platform.processor()"""
+    try:
+        with open(CPU_INFO_FILE) as file:
+            for line in file:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def read_governor():
+    """Return CPU frequency scaling governor or None if unknown"""
+    try:
+        with open(GOVERNOR_FILE) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def get_environment():
+    """Return dict describing interpreter, CPU model and governor"""
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'system': platform.system(),
+            'cpu': read_cpu_model(),
+            'governor': read_governor()}
+
+
+def get_fingerprint(environment=None):
+    """Return short hash of environment, measurements are comparable only
+    between equal fingerprints"""
+    if environment is None:
+        environment = get_environment()
+    dump = json.dumps(environment, sort_keys=True)
+    return sha256(dump.encode()).hexdigest()[:16]
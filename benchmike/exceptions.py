@@ -11,7 +11,7 @@ class FunTimeoutError(Exception):
      specified runtime"""
 
     def __init__(self, message):
-        super().__init__()
+        super().__init__(message)
         self.message = "Error: " + message
 
 
@@ -19,7 +19,7 @@ class FunctionsNotFoundError(Exception):
     """Exception raised when file does not contain required functions"""
 
     def __init__(self, message):
-        super().__init__()
+        super().__init__(message)
         self.message = "Error: " + message
 
 
@@ -28,7 +28,7 @@ class BenchmarkRuntimeError(Exception):
      benchmark pass"""
 
     def __init__(self, message):
-        super().__init__()
+        super().__init__(message)
         self.message = "Error: " + message
 
 
@@ -36,5 +36,5 @@ class InvalidArgumentError(Exception):
     """Exception raised when invalid argument was entered as input"""
 
     def __init__(self, message):
-        super().__init__()
+        super().__init__(message)
         self.message = "Error: " + message
@@ -0,0 +1,128 @@
+"""Module generating inputs of benchmarked code with make_input(size, seed)
+and caching them on disk, numpy arrays and bytes are memory mapped so that
+all measuring processes share single copy of input in page cache
+    Classes:
+    InputCache
+"""
+import mmap
+import os
+import pickle
+from os.path import isfile, join
+from tempfile import NamedTemporaryFile
+
+MAKE_INPUT_NAME = 'make_input'
+DEFAULT_INPUT_DIR = 'benchmike_inputs'
+DEFAULT_SEED = 0
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+# numpy arrays, raw bytes and any other picklable value
+EXTENSIONS = ('.npy', '.bin', '.pickle')
+
+
+class InputCache:
+    """Class keeping inputs in directory, one file per size and seed named
+    after key, which should change whenever code generating them changes
+
+    Inputs are saved through temporary file renamed at the end, so input of
+    process killed after timeout is never half written. numpy arrays are
+    loaded as memory maps and bytes-like values as mmap objects, both
+    read-only, so they are handed to processes without copying and code
+    writing to them fails. With copy, private copy-on-write mapping is made,
+    pages are copied only when written to. Other values are unpickled, with
+    copy every load gives new objects.
+
+    Modification time of input is updated whenever it is found, after new
+    input is saved least recently used ones are evicted while inputs in
+    directory exceed max_size bytes.
+    """
+
+    def __init__(self, directory=DEFAULT_INPUT_DIR, key='', seed=DEFAULT_SEED,
+                 max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.key = key
+        self.seed = seed
+        self.max_size = max_size
+
+    def path(self, size, extension):
+        """Return path of input of size with extension"""
+        return join(self.directory, '{}_{}_{}{}'.format(
+            self.key[:16], size, self.seed, extension))
+
+    def find(self, size):
+        """Return path of cached input of size, None if it was not made"""
+        for extension in EXTENSIONS:
+            path = self.path(size, extension)
+            if isfile(path):
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return path
+        return None
+
+    def save(self, size, value):
+        """Save input of size, returns its path"""
+        if type(value).__module__ == 'numpy' and hasattr(value, 'dtype'):
+            import numpy
+            extension, write = '.npy', lambda file: numpy.save(file, value)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            extension, write = '.bin', lambda file: file.write(value)
+        else:
+            extension, write = '.pickle', lambda file: pickle.dump(
+                value, file, pickle.HIGHEST_PROTOCOL)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(size, extension)
+        with NamedTemporaryFile(dir=self.directory, delete=False) as file:
+            try:
+                write(file)
+            except BaseException:
+                os.unlink(file.name)
+                raise
+        os.replace(file.name, path)
+        self.evict(path)
+        return path
+
+    def evict(self, keep=None):
+        """Remove least recently used inputs, except path keep, while total
+        size of inputs in directory exceeds max_size"""
+        inputs = []
+        for entry in os.scandir(self.directory):
+            if entry.path != keep and entry.name.endswith(EXTENSIONS):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                inputs.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in inputs)
+        if keep is not None:
+            total += os.path.getsize(keep)
+        for _, size, path in sorted(inputs):
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @staticmethod
+    def load(path, copy=False):
+        """Return input saved in path, memory mapped if possible"""
+        if path.endswith('.npy'):
+            import numpy
+            return numpy.load(path, mmap_mode='c' if copy else 'r')
+        if path.endswith('.bin'):
+            with open(path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return bytearray() if copy else b''
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY
+                                 if copy else mmap.ACCESS_READ)
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+
+    def get(self, make_input, size):
+        """Return path of input of size, make_input(size, seed) is called
+        only if it is not cached yet"""
+        path = self.find(size)
+        if path is None:
+            path = self.save(size, make_input(size, self.seed))
+        return path
@@ -0,0 +1,70 @@
+"""Module with reference kernels of known complexity used by selftest, every
+kernel is a run_<name>(size) function with optional set_up_<name>(size)
+    Procedures:
+    run_noop
+    set_up_sum
+    run_sum
+    set_up_sort
+    run_sort
+    run_nested
+    set_up_bisect
+    run_bisect
+"""
+from bisect import bisect_left
+from random import Random
+
+SEED = 0
+
+data = []
+
+
+def run_noop(size):
+    """Constant, does nothing"""
+
+
+def set_up_sum(size):
+    """Prepare list of size ones"""
+    global data
+    data = [1.0] * size
+
+
+def run_sum(size):
+    """Linear, sums list in Python loop, floats are summed as adding ints
+    beyond small int cache allocates new objects"""
+    total = 0.0
+    for value in data:
+        total += value
+    return total
+
+
+def set_up_sort(size):
+    """Prepare list of size random floats, they lie in memory in the order of
+    the list, so sorting does not chase pointers all over the heap"""
+    global data
+    generator = Random(SEED)
+    data = [generator.random() for _ in range(size)]
+
+
+def run_sort(size):
+    """Linearithmic, sorts list of random numbers"""
+    return sorted(data)
+
+
+def run_nested(size):
+    """Quadratic, iterates over pairs in nested Python loops, list of None
+    is iterated instead of range so that no int objects are allocated"""
+    row = [None] * size
+    for _ in row:
+        for _ in row:
+            pass
+
+
+def set_up_bisect(size):
+    """Prepare sorted list of size numbers"""
+    global data
+    data = list(range(size))
+
+
+def run_bisect(size):
+    """Logarithmic, finds position of a value in sorted list"""
+    return bisect_left(data, size // 3)
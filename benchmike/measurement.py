@@ -0,0 +1,207 @@
+"""Module with containers for benchmark results of repeated trials
+    Classes:
+    Measurement
+
+    Procedures:
+    holm
+    relative_standard_error
+    mann_whitney
+    time_breakdown
+    to_points
+"""
+from math import comb, erfc, sqrt
+from statistics import mean, median, quantiles, stdev
+
+STATISTICS = ('min', 'median', 'mean')
+DEFAULT_STATISTIC = 'min'
+DEFAULT_METRIC = 'run_time'
+# largest total sample size for which exact Mann-Whitney p-value is computed
+EXACT_TEST_LIMIT = 30
+
+
+def relative_standard_error(values):
+    """Return standard error of mean divided by mean, inf for less than two
+    values"""
+    if len(values) < 2:
+        return float('inf')
+    average = mean(values)
+    if average == 0:
+        return 0.0
+    return stdev(values) / sqrt(len(values)) / abs(average)
+
+
+def get_ranks(values):
+    """Return ranks of values starting from 1, ties get average rank, and
+    list of sizes of tied groups"""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    ties = []
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        ties.append(j - i + 1)
+        i = j + 1
+    return ranks, ties
+
+
+def count_u(n_1, n_2):
+    """Return list of numbers of orderings of two samples without ties for
+    which U statistic of the first one equals index"""
+    # counts[m][u] for first sample of size m, second grows one by one
+    counts = [[1] for _ in range(n_1 + 1)]
+    for n in range(1, n_2 + 1):
+        updated = [[1]]
+        for m in range(1, n_1 + 1):
+            row = [0] * (m * n + 1)
+            for u, value in enumerate(updated[m - 1]):
+                row[u + n] += value
+            for u, value in enumerate(counts[m]):
+                row[u] += value
+            updated.append(row)
+        counts = updated
+    return counts[n_1]
+
+
+def mann_whitney(xs, ys):
+    """Two-sided Mann-Whitney U test of xs and ys, returns tuple (U of xs,
+    p-value). p-value is exact for small samples without ties, otherwise
+    normal approximation with tie and continuity correction is used"""
+    n_1, n_2 = len(xs), len(ys)
+    if not n_1 or not n_2:
+        return 0.0, 1.0
+    ranks, ties = get_ranks(list(xs) + list(ys))
+    u_1 = sum(ranks[:n_1]) - n_1 * (n_1 + 1) / 2
+    mean_u = n_1 * n_2 / 2
+    if n_1 + n_2 <= EXACT_TEST_LIMIT and max(ties) == 1:
+        counts = count_u(n_1, n_2)
+        extreme = min(u_1, n_1 * n_2 - u_1)
+        tail = sum(counts[:int(extreme) + 1]) / comb(n_1 + n_2, n_1)
+        return u_1, min(1.0, 2 * tail)
+    n = n_1 + n_2
+    variance = n_1 * n_2 / 12 * (
+        n + 1 - sum(t ** 3 - t for t in ties) / (n * (n - 1)))
+    if variance <= 0:
+        return u_1, 1.0
+    z = max(abs(u_1 - mean_u) - 0.5, 0.0) / sqrt(variance)
+    return u_1, min(1.0, erfc(z / sqrt(2)))
+
+
+def holm(p_values):
+    """Return Holm-Bonferroni adjusted p-values in the same order, family
+    wise error rate of rejecting those below alpha is at most alpha"""
+    order = sorted(range(len(p_values)), key=lambda i: p_values[i])
+    adjusted = [1.0] * len(p_values)
+    running = 0.0
+    for rank, i in enumerate(order):
+        running = max(running, min(1.0, (len(p_values) - rank) * p_values[i]))
+        adjusted[i] = running
+    return adjusted
+
+
+class Measurement:
+    """Data point for single problem size, keeps metrics of every trial"""
+
+    def __init__(self, size):
+        self.size = size
+        self.trials = []
+
+    def __repr__(self):
+        return 'Measurement(size={}, repeats={}, min={}, median={})'.format(
+            self.size, self.repeats, self.min(), self.median())
+
+    @property
+    def repeats(self):
+        """Number of trials made for this size"""
+        return len(self.trials)
+
+    def add_trial(self, **metrics):
+        """Add results of single trial, e.g. add_trial(run_time=0.1)"""
+        self.trials.append(metrics)
+
+    def values(self, metric=DEFAULT_METRIC):
+        """Return list of metric values from all trials"""
+        return [trial[metric] for trial in self.trials if metric in trial]
+
+    def min(self, metric=DEFAULT_METRIC):
+        """Minimal value of metric"""
+        return min(self.values(metric))
+
+    def median(self, metric=DEFAULT_METRIC):
+        """Median value of metric"""
+        return median(self.values(metric))
+
+    def mean(self, metric=DEFAULT_METRIC):
+        """Mean value of metric"""
+        return mean(self.values(metric))
+
+    def stdev(self, metric=DEFAULT_METRIC):
+        """Sample standard deviation of metric, 0 for single trial"""
+        values = self.values(metric)
+        return stdev(values) if len(values) > 1 else 0.0
+
+    def iqr(self, metric=DEFAULT_METRIC):
+        """Interquartile range of metric, 0 for single trial"""
+        values = self.values(metric)
+        if len(values) < 2:
+            return 0.0
+        lower, _, upper = quantiles(values, n=4)
+        return upper - lower
+
+    def relative_standard_error(self, metric=DEFAULT_METRIC):
+        """Relative standard error of mean of metric"""
+        return relative_standard_error(self.values(metric))
+
+    def get(self, statistic=DEFAULT_STATISTIC, metric=DEFAULT_METRIC):
+        """Return statistic (one of STATISTICS) of metric"""
+        if statistic not in STATISTICS:
+            raise ValueError('Unknown statistic {}'.format(statistic))
+        return getattr(self, statistic)(metric)
+
+    def to_dict(self):
+        """Return JSON serializable representation of measurement"""
+        return {'size': self.size, 'trials': self.trials}
+
+    @staticmethod
+    def from_dict(data):
+        """Create measurement from to_dict representation"""
+        measurement = Measurement(data['size'])
+        measurement.trials = [dict(trial) for trial in data['trials']]
+        return measurement
+
+    def summary(self, metric=DEFAULT_METRIC):
+        """Return dict with min, median, mean, stdev, iqr and repeats"""
+        return {'size': self.size,
+                'min': self.min(metric),
+                'median': self.median(metric),
+                'mean': self.mean(metric),
+                'stdev': self.stdev(metric),
+                'iqr': self.iqr(metric),
+                'repeats': self.repeats}
+
+
+def to_points(measurements, statistic=DEFAULT_STATISTIC,
+              metric=DEFAULT_METRIC):
+    """Convert measurements to list of (size, value) tuples used by
+    ComplexityEstimator"""
+    return [(measurement.size, measurement.get(statistic, metric))
+            for measurement in measurements]
+
+
+def time_breakdown(measurements):
+    """Return dict with total time in seconds spent in set_up, run and
+    garbage collection by recorded trials, collections are not counted in
+    set_up and run times"""
+    totals = {'set_up': 0.0, 'run': 0.0, 'gc': 0.0}
+    for measurement in measurements:
+        for trial in measurement.trials:
+            number = trial.get('number', 1)
+            set_up_gc_time = trial.get('set_up_gc_time', 0.0)
+            gc_time = trial.get('gc_time', 0.0)
+            totals['set_up'] += trial.get('set_up_time', 0.0) - set_up_gc_time
+            totals['run'] += (trial[DEFAULT_METRIC] - gc_time) * number
+            totals['gc'] += set_up_gc_time + gc_time * number
+    return totals
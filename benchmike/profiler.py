@@ -0,0 +1,213 @@
+"""Module profiling run(size) at the largest sizes with cProfile or sampling
+profiler and comparing shares of hot functions across sizes
+    Classes:
+    ProfileComparison
+    SamplingProfiler
+
+    Procedures:
+    choose_sizes
+    cprofile_shares
+    function_label
+    profile_run
+"""
+from collections import Counter
+from math import log
+from os.path import basename
+from signal import signal, setitimer, ITIMER_PROF, SIGPROF
+from time import perf_counter
+
+PROFILERS = ('cprofile', 'sampling')
+DEFAULT_PROFILE_SIZES = 2
+DEFAULT_INTERVAL = 0.001
+# second profiled size is the measured one closest to the largest divided by
+# this ratio, neighbouring sizes are too close for shares to change
+PROFILE_SIZE_RATIO = 4
+# run is repeated until profiled this long, so sampler gets enough samples
+MIN_PROFILE_TIME = 0.5
+# timeout of profiling is this many times the time of measured trial
+PROFILE_SLOWDOWN = 10
+# functions with smaller share of self time at every size are not reported
+MIN_SHARE = 0.01
+# self time of function growing with exponent above this is superlinear
+SUPERLINEAR_EXPONENT = 1.1
+TOP_FUNCTIONS = 10
+
+
+def function_label(filename, lineno, name):
+    """Return label of function used in reports and collapsed stacks"""
+    return '{} ({}:{})'.format(name, basename(filename), lineno)
+
+
+def choose_sizes(sizes, count):
+    """Return largest of sizes and, for count of two, the one closest to it
+    divided by PROFILE_SIZE_RATIO, sorted ascending"""
+    sizes = sorted(set(sizes))
+    if not sizes:
+        return []
+    largest = sizes[-1]
+    if count < 2 or len(sizes) < 2:
+        return [largest]
+    smaller = min(sizes[:-1],
+                  key=lambda size: abs(size - largest / PROFILE_SIZE_RATIO))
+    return [smaller, largest]
+
+
+class SamplingProfiler:
+    """Statistical profiler recording stack of interrupted frame whenever
+    SIGPROF timer fires, after every interval seconds of CPU time of the
+    process. Frames below the first frame of target code are dropped, so
+    stacks start at run, samples taken outside of it are ignored"""
+
+    def __init__(self, interval, target=None):
+        self.interval = interval
+        self.target = target
+        self.stacks = Counter()
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = signal(SIGPROF, self.handler)
+        setitimer(ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc_info):
+        setitimer(ITIMER_PROF, 0)
+        signal(SIGPROF, self.previous)
+
+    def handler(self, signum, frame):
+        """Signal handler, counts stack of frame"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(function_label(code.co_filename, code.co_firstlineno,
+                                        code.co_name))
+            if code is self.target:
+                break
+            frame = frame.f_back
+        else:
+            if self.target is not None:
+                return
+        self.stacks[tuple(reversed(stack))] += 1
+
+    def shares(self):
+        """Return dict function -> share of samples in which it was on top
+        of stack"""
+        total = sum(self.stacks.values())
+        if not total:
+            return {}
+        self_samples = Counter()
+        for stack, count in self.stacks.items():
+            self_samples[stack[-1]] += count
+        return {function: count / total
+                for function, count in self_samples.items()}
+
+    def save_collapsed(self, filename):
+        """Save stacks in collapsed format of flamegraph.pl and speedscope,
+        one line of frames separated by semicolons and count per stack"""
+        with open(filename, 'w') as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write('{} {}\n'.format(';'.join(stack), count))
+
+
+def cprofile_shares(profile):
+    """Return dict function -> share of self time from cProfile profile"""
+    import pstats
+    stats = pstats.Stats(profile).stats
+    total = sum(entry[2] for entry in stats.values())
+    if not total:
+        return {}
+    return {function_label(*function): entry[2] / total
+            for function, entry in stats.items() if entry[2]}
+
+
+def profile_run(run, size, profiler, interval, prefix, target=None,
+                args=()):
+    """Call run(size, *args) repeatedly for at least MIN_PROFILE_TIME under
+    profiler, save pstats or collapsed stacks file named after prefix and
+    size, returns tuple (shares of functions, number of calls, filename)"""
+    if profiler == 'cprofile':
+        import cProfile
+        collector = cProfile.Profile()
+    else:
+        collector = SamplingProfiler(interval, target)
+    number = 0
+    start_time = perf_counter()
+    with collector:
+        while not number or perf_counter() - start_time < MIN_PROFILE_TIME:
+            run(size, *args)
+            number += 1
+    if profiler == 'cprofile':
+        filename = '{}_{}.pstats'.format(prefix, size)
+        collector.dump_stats(filename)
+        return cprofile_shares(collector), number, filename
+    filename = '{}_{}.collapsed'.format(prefix, size)
+    collector.save_collapsed(filename)
+    return collector.shares(), number, filename
+
+
+class ProfileComparison:
+    """Class comparing shares of self time of functions profiled at
+    different sizes
+
+    Self time of function at size n is its share times run time measured
+    at n, its growth exponent between the smallest and the largest profiled
+    size is log(time ratio) / log(size ratio). Function whose share grows
+    and whose exponent exceeds SUPERLINEAR_EXPONENT grows superlinearly and
+    will dominate run time at larger sizes.
+    """
+
+    def __init__(self, profiles, times):
+        self.profiles = profiles
+        self.times = times
+        self.sizes = sorted(profiles)
+        self.rows = []
+
+    def compare(self):
+        """Compute rows with shares of every function at every size, growth
+        exponent and superlinear flag, returns them sorted by share at the
+        largest size"""
+        functions = {function for size in self.sizes
+                     for function, share in self.profiles[size].items()
+                     if share >= MIN_SHARE}
+        first, last = self.sizes[0], self.sizes[-1]
+        self.rows = []
+        for function in functions:
+            shares = {size: self.profiles[size].get(function, 0.0)
+                      for size in self.sizes}
+            exponent = None
+            if first != last and shares[first] and shares[last]:
+                exponent = log(shares[last] * self.times[last] /
+                               (shares[first] * self.times[first])) / log(
+                    last / first)
+            growing = shares[last] > shares[first]
+            self.rows.append({
+                'function': function, 'shares': shares,
+                'exponent': exponent,
+                'superlinear': first != last and growing and (
+                    exponent is None or exponent > SUPERLINEAR_EXPONENT)})
+        self.rows.sort(key=lambda row: row['shares'][last], reverse=True)
+        return self.rows
+
+    def superlinear(self):
+        """Return labels of functions flagged as superlinear"""
+        return [row['function'] for row in self.rows if row['superlinear']]
+
+    def to_dict(self):
+        """Return JSON serializable representation of comparison"""
+        return {'sizes': self.sizes,
+                'functions': [dict(row, shares={
+                    str(size): share for size, share in row['shares'].items()})
+                    for row in self.rows]}
+
+    def print_report(self):
+        """Print hot functions with their shares at every profiled size"""
+        print("Hot functions, share of self time at size {}".format(
+            ', '.join(str(size) for size in self.sizes)))
+        for row in self.rows[:TOP_FUNCTIONS]:
+            print("{} {:>8} {}{}".format(
+                ' '.join('{:>7.1%}'.format(row['shares'][size])
+                         for size in self.sizes),
+                'n/a' if row['exponent'] is None else
+                'n^{:.2f}'.format(row['exponent']), row['function'],
+                ' SUPERLINEAR' if row['superlinear'] else ''))
+        for function in self.superlinear():
+            print("Share of {} grows superlinearly".format(function))
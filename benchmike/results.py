@@ -0,0 +1,179 @@
+"""Module with structured results of benchmark and their export to JSON
+Lines, CSV and Arrow/Parquet files
+    Classes:
+    BenchmarkResult
+
+    Procedures:
+    export
+    load
+"""
+import csv
+import json
+from os.path import getsize, isfile
+from time import time
+
+from benchmike import exceptions as err
+from benchmike.complexities import Constant
+from benchmike.measurement import Measurement
+
+FORMATS = ('jsonl', 'csv', 'parquet')
+# columns describing whole run, repeated in every row of tabular formats
+RUN_COLUMNS = ('created', 'code', 'code_hash', 'fingerprint', 'statistic',
+               'verdict', 'coefficients', 'confidence')
+SAMPLE_COLUMNS = ('size', 'trial', 'metric', 'value')
+
+
+class BenchmarkResult:
+    """Result of single benchmark: raw samples, coefficients and residuals of
+    every model, verdict with its confidence, comparison of profiles of the
+    largest sizes if they were taken and environment metadata"""
+
+    def __init__(self, code, code_hash, fingerprint, environment, settings,
+                 measurements, statistic):
+        self.created = time()
+        self.code = code
+        self.code_hash = code_hash
+        self.fingerprint = fingerprint
+        self.environment = environment
+        self.settings = settings
+        self.measurements = measurements
+        self.statistic = statistic
+        self.models = {}
+        self.verdicts = {}
+        self.profile = {}
+        # wall time in seconds from start of process to main
+        self.startup_time = None
+
+    def add_estimate(self, quantity, estimator):
+        """Save models and verdict of estimator which already estimated
+        complexity of quantity"""
+        self.models[quantity] = [
+            {'complexity': complexity.get_description(),
+             'coefficients': coefficients, 'rss': rss, 'weight': weight,
+             'probability': probability}
+            for complexity, coefficients, rss, weight, probability in
+            estimator.models()]
+        complexity, coefficients = estimator.factors[0]
+        self.verdicts[quantity] = {
+            'complexity': complexity.get_description(),
+            'description': complexity.describe(coefficients),
+            'coefficients': list(coefficients),
+            'confidence': estimator.confidence()}
+
+    def add_constant(self, quantity, value):
+        """Save verdict of quantity which has the same value at every size,
+        no model is fitted to it"""
+        self.models[quantity] = []
+        self.verdicts[quantity] = {
+            'complexity': Constant.get_description(),
+            'description': Constant.get_description(),
+            'coefficients': [0.0, float(value)],
+            'confidence': None}
+
+    @property
+    def verdict(self):
+        """Verdict of time complexity"""
+        return self.verdicts.get('time')
+
+    def to_dict(self):
+        """Return JSON serializable representation of result"""
+        return {'created': self.created, 'code': self.code,
+                'code_hash': self.code_hash,
+                'fingerprint': self.fingerprint,
+                'environment': self.environment, 'settings': self.settings,
+                'statistic': self.statistic, 'verdicts': self.verdicts,
+                'models': self.models, 'profile': self.profile,
+                'startup_time': self.startup_time,
+                'measurements': [measurement.to_dict()
+                                 for measurement in self.measurements]}
+
+    @staticmethod
+    def from_dict(data):
+        """Create result from to_dict representation"""
+        result = BenchmarkResult(
+            data['code'], data['code_hash'], data['fingerprint'],
+            data['environment'], data['settings'],
+            [Measurement.from_dict(measurement)
+             for measurement in data['measurements']], data['statistic'])
+        result.created = data['created']
+        result.models = data['models']
+        result.verdicts = data['verdicts']
+        result.profile = data.get('profile', {})
+        result.startup_time = data.get('startup_time')
+        return result
+
+    def to_rows(self):
+        """Return list of flat dicts, one per sample of every metric, with
+        columns of RUN_COLUMNS and SAMPLE_COLUMNS, metrics which were not
+        measured in a trial (None) are left out"""
+        verdict = self.verdict or {}
+        run = {'created': self.created, 'code': self.code,
+               'code_hash': self.code_hash, 'fingerprint': self.fingerprint,
+               'statistic': self.statistic,
+               'verdict': verdict.get('description'),
+               'coefficients': json.dumps(verdict.get('coefficients')),
+               'confidence': verdict.get('confidence')}
+        rows = []
+        for measurement in self.measurements:
+            for trial, metrics in enumerate(measurement.trials):
+                for metric, value in sorted(metrics.items()):
+                    if value is None:
+                        continue
+                    row = dict(run)
+                    row.update(size=measurement.size, trial=trial,
+                               metric=metric, value=float(value))
+                    rows.append(row)
+        return rows
+
+    def export(self, filename, output_format):
+        """Save result to file in one of FORMATS, JSON Lines and CSV files
+        are appended to so many runs can be collected in one file"""
+        export(self, filename, output_format)
+        print("Successfully written to {}".format(filename))
+
+
+def load(filename):
+    """Return the last result saved in JSON Lines file"""
+    try:
+        with open(filename) as file:
+            lines = [line for line in file if line.strip()]
+    except OSError:
+        raise err.InvalidArgumentError(
+            "Could not read results from {}".format(filename))
+    if not lines:
+        raise err.InvalidArgumentError("No results in {}".format(filename))
+    try:
+        return BenchmarkResult.from_dict(json.loads(lines[-1]))
+    except (ValueError, KeyError):
+        raise err.InvalidArgumentError(
+            "Invalid result in {}".format(filename))
+
+
+def export(result, filename, output_format):
+    """Save result to file in one of FORMATS"""
+    if output_format == 'jsonl':
+        with open(filename, 'a') as file:
+            file.write(json.dumps(result.to_dict()) + '\n')
+    elif output_format == 'csv':
+        header = not isfile(filename) or getsize(filename) == 0
+        with open(filename, 'a', newline='') as file:
+            writer = csv.DictWriter(file,
+                                    fieldnames=RUN_COLUMNS + SAMPLE_COLUMNS)
+            if header:
+                writer.writeheader()
+            writer.writerows(result.to_rows())
+    elif output_format == 'parquet':
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise err.BenchmarkRuntimeError(
+                "Parquet export requires pyarrow to be installed")
+        rows = result.to_rows()
+        table = pyarrow.Table.from_pydict(
+            {column: [row[column] for row in rows]
+             for column in RUN_COLUMNS + SAMPLE_COLUMNS})
+        pyarrow.parquet.write_table(table, filename)
+    else:
+        raise err.InvalidArgumentError(
+            "Unknown format {}".format(output_format))
@@ -0,0 +1,175 @@
+"""Module estimating parallel speedup of run(size, workers) from grid of
+measurements over problem sizes and worker counts
+    Classes:
+    ScalingEstimator
+    HeatmapPlotter
+
+    Procedures:
+    fit_amdahl
+"""
+import csv
+
+from benchmike import bigoestimator as bigoes
+
+# knee of speedup curve is the smallest worker count reaching this fraction
+# of the best speedup
+KNEE_FRACTION = 0.9
+REPORT_FIELDS = ('size', 'serial_time', 'parallel_time', 'serial_fraction',
+                 'amdahl_limit', 'best_workers', 'best_speedup',
+                 'efficiency', 'knee_workers')
+
+
+def fit_amdahl(points):
+    """Fit time(p) = serial + parallel / p to list of (workers, time) by
+    least squares of relative errors, returns tuple (serial, parallel) of
+    non-negative times or None for less than two worker counts"""
+    if len({workers for workers, _ in points}) < 2:
+        return None
+    sums = [0.0] * 5
+    for workers, time in points:
+        weight = 1 / max(time, bigoes.MIN_VARIANCE) ** 2
+        x = 1 / workers
+        for i, value in enumerate((1, x, x * x, time, x * time)):
+            sums[i] += weight * value
+    total, x_sum, x2_sum, t_sum, xt_sum = sums
+    determinant = total * x2_sum - x_sum ** 2
+    serial = (x2_sum * t_sum - x_sum * xt_sum) / determinant
+    parallel = (total * xt_sum - x_sum * t_sum) / determinant
+    if serial < 0:
+        return 0.0, xt_sum / x2_sum
+    if parallel < 0:
+        return t_sum / total, 0.0
+    return serial, parallel
+
+
+class ScalingEstimator:
+    """Class fitting combined model time(n, p) = A(n) + B(n) / p to grid of
+    measurements, dict (size, workers) -> measurement
+
+    For every size A is the serial and B the parallel part of run time,
+    Amdahl's serial fraction is A / (A + B) and 1 / fraction is the limit
+    of speedup. Complexities of A and B in n tell how the fraction changes
+    with size: when B grows faster, larger problems scale better, as
+    Gustafson's law expects. Speedups are measured against the smallest
+    worker count in grid.
+    """
+
+    def __init__(self, grid, statistic='min'):
+        self.times = {cell: measurement.get(statistic)
+                      for cell, measurement in grid.items()}
+        self.sizes = sorted({size for size, _ in self.times})
+        self.workers = sorted({workers for _, workers in self.times})
+        self.rows = []
+
+    def speedups(self, size):
+        """Return dict workers -> speedup of size against smallest worker
+        count, empty if it was not measured"""
+        base = self.times.get((size, self.workers[0]))
+        if not base:
+            return {}
+        return {workers: base / self.times[size, workers]
+                for workers in self.workers
+                if self.times.get((size, workers))}
+
+    def estimate(self):
+        """Fit model for every size, returns list of dicts with
+        REPORT_FIELDS, sizes measured with single worker count are
+        skipped"""
+        self.rows = []
+        for size in self.sizes:
+            points = [(workers, self.times[size, workers])
+                      for workers in self.workers
+                      if (size, workers) in self.times]
+            fitted = fit_amdahl(points)
+            speedups = self.speedups(size)
+            if fitted is None or not speedups:
+                continue
+            serial, parallel = fitted
+            fraction = serial / (serial + parallel) if serial + parallel \
+                else 1.0
+            best = max(speedups, key=speedups.get)
+            knee = min(workers for workers, speedup in speedups.items()
+                       if speedup >= KNEE_FRACTION * speedups[best])
+            self.rows.append({
+                'size': size, 'serial_time': serial,
+                'parallel_time': parallel, 'serial_fraction': fraction,
+                'amdahl_limit': 1 / fraction if fraction else float('inf'),
+                'best_workers': best, 'best_speedup': speedups[best],
+                'efficiency': speedups[best] * self.workers[0] / best,
+                'knee_workers': knee})
+        return self.rows
+
+    def verdict(self, field):
+        """Return description of complexity of field of rows in n, None if
+        there are not enough sizes"""
+        points = [(row['size'], row[field]) for row in self.rows
+                  if row[field] > 0]
+        if len(points) < 2:
+            return None
+        verdict = bigoes.ComplexityEstimator(points, field).verdict()
+        if verdict is None:
+            return None
+        return verdict[0].describe(verdict[1])
+
+    def save_report(self, filename):
+        """Print optimal worker count for every size and save rows as CSV
+        file"""
+        print("Scaling report, workers {}".format(self.workers))
+        print("{:>10} {:>8} {:>8} {:>8} {:>10} {:>10} {:>5}".format(
+            'size', 'serial', 'limit', 'best p', 'speedup', 'efficiency',
+            'knee'))
+        for row in self.rows:
+            print("{:>10} {:>8.1%} {:>8.3g} {:>8} {:>10.2f} {:>10.1%} "
+                  "{:>5}".format(row['size'], row['serial_fraction'],
+                                 row['amdahl_limit'], row['best_workers'],
+                                 row['best_speedup'], row['efficiency'],
+                                 row['knee_workers']))
+        for field, name in (('serial_time', 'Serial part'),
+                            ('parallel_time', 'Parallel part')):
+            verdict = self.verdict(field)
+            if verdict is not None:
+                print("{} of run time: {}".format(name, verdict))
+        with open(filename, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        print("Successfully written to {}".format(filename))
+
+
+class HeatmapPlotter:
+    """Class saving heat map of speedup over sizes and worker counts to
+    file, format is taken from its extension"""
+
+    def __init__(self, estimator, filename):
+        self.estimator = estimator
+        self.filename = filename
+
+    def plot(self):
+        """Plot speedups, cells which were not measured are left blank"""
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import numpy as np
+        sizes = self.estimator.sizes
+        workers = self.estimator.workers
+        values = np.full((len(sizes), len(workers)), np.nan)
+        for i, size in enumerate(sizes):
+            for workers_count, speedup in self.estimator.speedups(
+                    size).items():
+                values[i, workers.index(workers_count)] = speedup
+        figure, axes = plt.subplots()
+        image = axes.imshow(values, aspect='auto', origin='lower',
+                            cmap='viridis')
+        axes.set_xticks(range(len(workers)), labels=workers)
+        axes.set_yticks(range(len(sizes)), labels=sizes)
+        axes.set_xlabel('workers')
+        axes.set_ylabel('size')
+        for i in range(len(sizes)):
+            for j in range(len(workers)):
+                if not np.isnan(values[i, j]):
+                    axes.text(j, i, '{:.2f}'.format(values[i, j]),
+                              ha='center', va='center', color='w')
+        figure.colorbar(image, label='speedup')
+        figure.savefig(self.filename, bbox_inches='tight')
+        plt.close(figure)
+        print("Successfully written to {}".format(self.filename))
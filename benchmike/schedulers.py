@@ -0,0 +1,155 @@
+"""Module with strategies choosing problem sizes measured by CodeBenchmark
+    Classes:
+    LinearScheduler
+        GeometricScheduler
+        AdaptiveScheduler
+        FixedScheduler
+
+    Procedures:
+    get_scheduler
+"""
+from math import log
+
+from benchmike import bigoestimator as bigoes
+from benchmike.measurement import DEFAULT_STATISTIC
+
+SCHEDULES = ('linear', 'geometric', 'adaptive')
+DEFAULT_SCHEDULE = 'linear'
+DEFAULT_FACTOR = 2.0
+INITIAL_POINTS = 4
+CANDIDATE_POINTS = 16
+STABLE_VERDICTS = 5
+# fraction of remaining time a single measurement may be expected to take
+MAX_TIME_SHARE = 0.25
+MIN_TIME = 1e-9
+
+
+class LinearScheduler:
+    """Base scheduler, yields sizes start, start + step, start + 2 * step..."""
+
+    def __init__(self, start, step, count):
+        self.start = start
+        self.step = step
+        self.count = count
+        self.index = 0
+
+    def get_size(self, index):
+        """Return index-th size of schedule"""
+        return self.start + self.step * index
+
+    def next_size(self, measurements, time_left):
+        """Return next size to be measured or None if benchmark should stop,
+        measurements are data points collected so far"""
+        if self.index >= self.count:
+            return None
+        size = self.get_size(self.index)
+        self.index += 1
+        return size
+
+
+class GeometricScheduler(LinearScheduler):
+    """Scheduler multiplying size by factor, gives the fit wide range of
+    sizes in few steps"""
+
+    def __init__(self, start, count, factor=DEFAULT_FACTOR):
+        super().__init__(start, 0, count)
+        self.factor = factor
+        self.last_size = None
+
+    def get_size(self, index):
+        size = max(1, int(round(self.start * self.factor ** index)))
+        if self.last_size is not None and size <= self.last_size:
+            size = self.last_size + 1
+        self.last_size = size
+        return size
+
+
+class AdaptiveScheduler(GeometricScheduler):
+    """Scheduler choosing size at which two best fitting complexities
+    disagree most, among sizes expected to fit in remaining time, stops when
+    verdict does not change for STABLE_VERDICTS measurements"""
+
+    def __init__(self, start, count, factor=DEFAULT_FACTOR,
+                 statistic=DEFAULT_STATISTIC):
+        super().__init__(start, count, factor)
+        self.statistic = statistic
+        self.verdicts = []
+
+    def next_size(self, measurements, time_left):
+        if self.index >= self.count:
+            return None
+        if len(measurements) < INITIAL_POINTS:
+            return super().next_size(measurements, time_left)
+        points = sorted((measurement.size, measurement.get(self.statistic))
+                        for measurement in measurements)
+        results = [result for result in
+                   bigoes.ComplexityEstimator(points).fit()
+                   if len(result[1][1])]
+        if len(results) < 2:
+            return super().next_size(measurements, time_left)
+        self.verdicts.append(results[0][0])
+        if (len(self.verdicts) >= STABLE_VERDICTS and
+                len(set(self.verdicts[-STABLE_VERDICTS:])) == 1):
+            return None
+        size = self.most_disagreeing_size(points, results[0], results[1],
+                                          time_left)
+        if size is None:
+            return None
+        self.index += 1
+        return size
+
+    def most_disagreeing_size(self, points, best, second, time_left):
+        """Return not yet measured size with largest ratio of predictions of
+        two complexities, predictions shorter than shortest measured time are
+        not trusted"""
+        measured = {point[0] for point in points}
+        shortest = max(min(point[1] for point in points), MIN_TIME)
+        smallest, largest = points[0][0], points[-1][0] * self.factor
+        ratio = (largest / smallest) ** (1 / (CANDIDATE_POINTS - 1))
+        candidates = {int(round(smallest * ratio ** i))
+                      for i in range(CANDIDATE_POINTS)} - measured
+        best_size, best_score = None, 0.0
+        for size in candidates:
+            first = predict(best, size)
+            other = predict(second, size)
+            if first is None or other is None:
+                continue
+            if first > MAX_TIME_SHARE * time_left:
+                continue
+            score = abs(log(max(first, shortest)) -
+                        log(max(other, shortest)))
+            if score > best_score:
+                best_size, best_score = size, score
+        return best_size
+
+
+def predict(result, size):
+    """Return time predicted by fitted complexity, None on overflow"""
+    complexity, regression = result
+    try:
+        return complexity.get_time(size, *regression[0])
+    except (OverflowError, ValueError):
+        return None
+
+
+class FixedScheduler(LinearScheduler):
+    """Scheduler yielding given sizes, used to repeat sweep of baseline"""
+
+    def __init__(self, sizes):
+        super().__init__(min(sizes), 0, len(sizes))
+        self.sizes = sorted(sizes)
+
+    def get_size(self, index):
+        return self.sizes[index]
+
+
+def get_scheduler(schedule, start, step, count, factor=DEFAULT_FACTOR,
+                  statistic=DEFAULT_STATISTIC):
+    """Create scheduler by name, one of SCHEDULES"""
+    if schedule == 'linear':
+        return LinearScheduler(start, step, count)
+    if schedule == 'geometric':
+        return GeometricScheduler(start, count, factor)
+    if schedule == 'adaptive':
+        return AdaptiveScheduler(start, count, factor, statistic)
+    raise ValueError('Unknown schedule {}'.format(schedule))
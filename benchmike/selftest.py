@@ -0,0 +1,174 @@
+"""Module benchmarking benchmike itself: harness overhead on current machine
+and classification of reference kernels of known complexity
+    Classes:
+    SelfTest
+
+    Procedures:
+    get_version
+"""
+import json
+from importlib.metadata import version, PackageNotFoundError
+from math import inf
+from statistics import median
+from time import perf_counter, time
+
+from benchmike import bigoestimator as bigoes
+from benchmike import complexities as cp
+from benchmike import environment as env
+from benchmike import kernels
+from benchmike import measurement as mm
+from benchmike.benchmark import BenchmarkOptions, CodeBenchmark
+from benchmike.customlogger import CustomLogger, LOGGER_NAME
+from benchmike.schedulers import GeometricScheduler
+
+HARNESS_SAMPLES = 5
+HARNESS_TIMEOUT = 10
+KERNEL_REPEAT = 5
+KERNEL_MAX_RSE = 0.01
+KERNEL_MAX_REPEAT = 30
+KERNEL_WARMUP = 1
+# name, accepted complexities, first size, growth factor, number of sizes
+KERNELS = (
+    ('noop', (cp.Constant,), 128, 4, 8),
+    ('sum', (cp.Linear,), 1000, 2, 10),
+    ('sort', (cp.Linearithmic,), 1000, 2, 8),
+    ('nested', (cp.Quadratic,), 100, 1.4, 14),
+    ('bisect', (cp.Logarithmic,), 128, 4, 7),
+)
+
+
+def get_version():
+    """Return installed version of benchmike, None when run from source"""
+    try:
+        return version('benchmike')
+    except PackageNotFoundError:
+        return None
+
+
+class SelfTest:
+    """Class measuring cost of benchmike harness and checking that reference
+    kernels are classified correctly
+
+    Harness floor is the cost of reading clocks and of calling empty run in
+    the inner loop, it is subtracted from run_time of every measurement.
+    Process and worker overheads are the parts of a round trip of single
+    measurement spent outside the measuring code: spawn, exec of module,
+    signal set up and pickling through queue or pipe. Every kernel gets
+    equal share of time budget.
+
+    Kernel passes when information criterion of its complexity is worse
+    than the one of the verdict by less than EVIDENCE_LEAD, i.e. data do not
+    reject it. noop is measured without harness floor subtracted, as it is
+    the floor itself.
+    """
+
+    logger = CustomLogger(LOGGER_NAME)
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.path = kernels.__file__
+        self.harness = {}
+        self.kernels = []
+
+    def round_trip_overhead(self, persistent):
+        """Return median time in seconds of measurement of empty run in
+        separate process or persistent worker, not spent measuring"""
+        benchmark = CodeBenchmark(self.path, HARNESS_TIMEOUT,
+                                  BenchmarkOptions(persistent=persistent),
+                                  set_up_name=None, run_name='run_noop')
+        overheads = []
+        try:
+            for _ in range(HARNESS_SAMPLES):
+                start_time = perf_counter()
+                full_time = benchmark.make_measurement(0, HARNESS_TIMEOUT)[2]
+                overheads.append(perf_counter() - start_time - full_time)
+        finally:
+            if benchmark.worker is not None:
+                benchmark.worker.stop()
+        return median(overheads)
+
+    def measure_harness(self):
+        """Measure harness overheads, returns dict of them in seconds"""
+        benchmark = CodeBenchmark(self.path, HARNESS_TIMEOUT,
+                                  set_up_name=None, run_name='run_noop')
+        self.harness = {
+            'timer_overhead': benchmark.timer.overhead,
+            'call_floor': benchmark.call_floor,
+            'process_overhead': self.round_trip_overhead(False),
+            'worker_overhead': self.round_trip_overhead(True)}
+        self.logger.log("Harness overheads {}".format(self.harness))
+        return self.harness
+
+    def check_kernel(self, name, expected, start, factor, count, timeout):
+        """Benchmark kernel and compare its complexity with expected ones,
+        returns dict with result of check"""
+        set_up_name = 'set_up_' + name
+        options = BenchmarkOptions(
+            persistent=True, repeat=KERNEL_REPEAT, max_rse=KERNEL_MAX_RSE,
+            max_repeat=KERNEL_MAX_REPEAT, warmup=KERNEL_WARMUP,
+            subtract_floor=name != 'noop')
+        benchmark = CodeBenchmark(
+            self.path, timeout, options,
+            set_up_name=set_up_name if hasattr(kernels, set_up_name)
+            else None, run_name='run_' + name)
+        measurements = benchmark.run_benchmark(
+            0, start, count, GeometricScheduler(start, count, factor))
+        result = {'kernel': name,
+                  'expected': [complexity.get_description()
+                               for complexity in expected],
+                  'points': len(measurements),
+                  'verdict': None,
+                  'gap': None,
+                  'passed': False}
+        estimator = bigoes.ComplexityEstimator(mm.to_points(measurements))
+        verdict = estimator.verdict()
+        if verdict is not None:
+            best = estimator.scores[verdict[0]]
+            gap = min(estimator.scores.get(complexity, inf)
+                      for complexity in expected) - best
+            result.update(verdict=verdict[0].describe(verdict[1]),
+                          gap=gap if gap < inf else None,
+                          passed=gap < bigoes.EVIDENCE_LEAD)
+        self.logger.log("Kernel {}: {}".format(name, result))
+        return result
+
+    def run(self):
+        """Measure harness and check all kernels, returns True if every
+        kernel was classified correctly"""
+        deadline = perf_counter() + self.timeout
+        self.measure_harness()
+        self.kernels = []
+        for index, kernel in enumerate(KERNELS):
+            share = int((deadline - perf_counter()) / (len(KERNELS) - index))
+            self.kernels.append(self.check_kernel(*kernel, max(share, 1)))
+        return all(result['passed'] for result in self.kernels)
+
+    def to_dict(self):
+        """Return JSON serializable report"""
+        environment = env.get_environment()
+        return {'created': time(),
+                'version': get_version(),
+                'fingerprint': env.get_fingerprint(environment),
+                'environment': environment,
+                'harness': self.harness,
+                'kernels': self.kernels,
+                'passed': all(result['passed'] for result in self.kernels)}
+
+    def save_report(self, filename):
+        """Print report and append it to JSON Lines file, so it can be
+        tracked across releases"""
+        print("Harness floor: clocks {:.3g} s, call {:.3g} s".format(
+            self.harness['timer_overhead'], self.harness['call_floor']))
+        print("Round trip overhead: process {:.3g} s, worker {:.3g} s".format(
+            self.harness['process_overhead'],
+            self.harness['worker_overhead']))
+        for result in self.kernels:
+            print("{:<8} {:<6} {} (expected {}, criterion gap {})".format(
+                result['kernel'], 'ok' if result['passed'] else 'FAILED',
+                result['verdict'] or 'not enough data points',
+                ' or '.join(result['expected']),
+                'n/a' if result['gap'] is None else
+                '{:.1f}'.format(result['gap'])))
+        with open(filename, 'a') as file:
+            file.write(json.dumps(self.to_dict()) + '\n')
+        print("Successfully written to {}".format(filename))
@@ -0,0 +1,66 @@
+"""Module with clocks used for timing benchmarked code
+    Classes:
+    Timer
+"""
+from time import (get_clock_info, perf_counter_ns, process_time_ns,
+                  thread_time_ns, time_ns)
+
+CLOCKS = {
+    'perf_counter': (perf_counter_ns, 'perf_counter'),
+    'process_time': (process_time_ns, 'process_time'),
+    'thread_time': (thread_time_ns, 'thread_time'),
+    'wall': (time_ns, 'time'),
+}
+DEFAULT_CLOCK = 'perf_counter'
+DEFAULT_EXTRA_CLOCKS = ('process_time',)
+# measured interval has to be this many times longer than clock resolution
+# or the cost of reading the clocks, whichever is greater
+CALIBRATION_FACTOR = 1000
+OVERHEAD_SAMPLES = 100
+MAX_INNER_LOOP = 10 ** 7
+
+
+class Timer:
+    """Reads several clocks at once, the first one is the primary clock used
+    for run_time, all of them are reported as <clock>_run_time
+
+    Intervals shorter than min_time are too short to be measured reliably,
+    min_time depends on the resolution of clocks and cost of reading them.
+    """
+
+    def __init__(self, clock=DEFAULT_CLOCK, extra_clocks=DEFAULT_EXTRA_CLOCKS):
+        self.names = [clock] + [name for name in extra_clocks
+                                if name != clock]
+        self.clocks = [CLOCKS[name][0] for name in self.names]
+        self.resolution = max(get_clock_info(CLOCKS[name][1]).resolution
+                              for name in self.names)
+        self.overhead = self.measure_overhead()
+        self.min_time = CALIBRATION_FACTOR * max(self.resolution,
+                                                 self.overhead)
+
+    def start(self):
+        """Read clocks at the beginning of interval, primary clock last"""
+        return [clock() for clock in reversed(self.clocks)][::-1]
+
+    def stop(self):
+        """Read clocks at the end of interval, primary clock first"""
+        return [clock() for clock in self.clocks]
+
+    def measure_overhead(self):
+        """Return minimal time in seconds of empty start/stop interval"""
+        return min(self.seconds(self.start(), self.stop())
+                   for _ in range(OVERHEAD_SAMPLES))
+
+    @staticmethod
+    def seconds(start, end, number=1):
+        """Return primary clock interval in seconds per single call"""
+        return (end[0] - start[0]) / 1e9 / number
+
+    def elapsed(self, start, end, number=1):
+        """Return dict clock name -> interval in seconds per single call"""
+        return {'{}_run_time'.format(name): (stop - begin) / 1e9 / number
+                for name, begin, stop in zip(self.names, start, end)}
+
+    def needs_calibration(self, seconds):
+        """Check if interval is too short for the resolution of clocks"""
+        return seconds < self.min_time
@@ -10,6 +10,9 @@ setup(
     author_email='mkg.grabowski@gmail.com',
     packages=['benchmike'],
     install_requires=['numpy', 'argparse', 'matplotlib'],
+    extras_require={
+        'parquet': ['pyarrow']
+    },
     entry_points={
         'console_scripts': [
             'benchmike = benchmike.benchmike:main'
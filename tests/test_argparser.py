@@ -0,0 +1,53 @@
+"""Validation of command line arguments"""
+import pytest
+
+from benchmike import argparser as parser
+from benchmike import exceptions as err
+from benchmike.benchmark import (BenchmarkOptions, CodeBenchmark,
+                                 available_cpus)
+
+
+def test_jobs_above_available_cpus_are_rejected():
+    cpus = len(available_cpus())
+    parser.validate_sweep_args(parser.parse_batch(['.', '-j', str(cpus)]))
+    with pytest.raises(err.InvalidArgumentError):
+        parser.validate_sweep_args(
+            parser.parse_batch(['.', '-j', str(cpus + 1)]))
+
+
+def test_options_are_taken_from_arguments():
+    args = parser.parse(['code.py', '-r', '3', '--persistent', '--gc',
+                         'disable', '--clocks', 'thread_time'])
+    options = parser.get_options(args, jobs=2)
+    assert options.repeat == 3 and options.persistent
+    assert options.gc_mode == 'disable' and options.jobs == 2
+    assert list(options.extra_clocks) == ['thread_time']
+    assert parser.get_options(parser.parse_selftest([])) == \
+        BenchmarkOptions()
+
+
+def test_jobs_are_capped_at_available_cpus(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'code.py'
+    path.write_text('def set_up(size):\n    pass\n\n\n'
+                    'def run(size):\n    pass\n')
+    benchmark = CodeBenchmark(
+        str(path), 10, BenchmarkOptions(jobs=len(available_cpus()) + 3))
+    assert benchmark.jobs == len(available_cpus())
+
+
+def test_default_worker_counts_allow_scaling(tmp_path):
+    path = tmp_path / 'code.py'
+    path.write_text('def run(size, workers):\n    pass\n')
+    args = parser.parse_scaling([str(path)])
+    assert len(set(args.workers)) >= 2 and min(args.workers) == 1
+    parser.validate_scaling_args(args)
+    with pytest.raises(err.InvalidArgumentError):
+        parser.validate_scaling_args(
+            parser.parse_scaling([str(path), '--workers', '2', '2']))
+
+
+def test_negative_input_cache_limit_is_rejected():
+    with pytest.raises(err.InvalidArgumentError):
+        parser.validate_args(parser.parse(
+            [__file__, '--input-max-size', '-1']))
@@ -0,0 +1,93 @@
+"""Discovery and benchmarking of batch targets"""
+from benchmike import batch as bt
+from benchmike import exceptions as err
+from benchmike.measurement import Measurement
+
+DECORATED = """
+import benchmike.batch as bt
+from benchmike.batch import target
+
+raise SystemExit('code must not be executed')
+
+
+def make(size):
+    pass
+
+
+@target(name='first', set_up=make)
+def first(size):
+    pass
+
+
+@bt.target(None, 'make')
+def second(size):
+    pass
+
+
+@target()
+def third(size):
+    pass
+
+
+def run_ignored(size):
+    pass
+"""
+
+PAIRS = """
+def set_up(size):
+    pass
+
+
+def set_up_sum(size):
+    global data
+    data = list(range(size))
+
+
+def run_sum(size):
+    sum(data)
+
+
+def run_crash(size):
+    import os
+    os._exit(1)
+"""
+
+
+def test_decorated_targets_are_found_without_executing_code(tmp_path):
+    path = str(tmp_path / 'decorated.py')
+    with open(path, 'w') as file:
+        file.write(DECORATED)
+    targets = [(target.name, target.set_up_name, target.run_name)
+               for target in bt.find_targets(path)]
+    assert targets == [('first', 'make', 'first'),
+                       ('{}:second'.format(path), 'make', 'second'),
+                       ('{}:third'.format(path), None, 'third')]
+
+
+def test_run_targets_in_pool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'pairs.py')
+    with open(path, 'w') as file:
+        file.write(PAIRS)
+    targets = bt.discover_targets([str(tmp_path)])
+    assert [(target.set_up_name, target.run_name) for target in targets] \
+        == [('set_up_sum', 'run_sum'), ('set_up', 'run_crash')]
+    results = bt.BatchBenchmark(targets, 4, count=5).run()
+    measurements = results['{}:sum'.format(path)]
+    assert [measurement.size for measurement in measurements] == \
+        [100, 200, 300, 400, 500]
+    assert all(isinstance(measurement, Measurement)
+               for measurement in measurements)
+    assert isinstance(results['{}:crash'.format(path)],
+                      err.BenchmarkRuntimeError)
+
+
+def test_budget_shares_are_not_truncated(monkeypatch):
+    budgets = []
+    monkeypatch.setattr(bt.BatchBenchmark, 'start_target',
+                        lambda self, index, cpu, budget: budgets.append(
+                            budget))
+    targets = [bt.Target('first', 'code.py', None, 'first'),
+               bt.Target('second', 'code.py', None, 'second')]
+    bt.BatchBenchmark(targets, 3.0).run()
+    assert 1.4 < budgets[0] <= 1.5 and 2.9 < budgets[1] <= 3.0
@@ -0,0 +1,112 @@
+"""Measuring code in separate processes"""
+import asyncio
+import gc
+import time
+
+import pytest
+
+from benchmike import benchmark as benchmark_module
+from benchmike.benchmark import (BenchmarkOptions, CodeBenchmark,
+                                 new_event_loop, reset_peak_rss, run_on_loop)
+
+ASYNC_GRID_CODE = """
+import asyncio
+
+
+async def run(size, workers):
+    await asyncio.sleep(0)
+    return size * workers
+"""
+
+
+def test_run_on_loop_forwards_arguments():
+
+    async def run(size, workers, scale=1):
+        await asyncio.sleep(0)
+        return size * workers * scale
+
+    loop = new_event_loop()
+    try:
+        assert run_on_loop(run, loop)(3, 2, scale=5) == 30
+    finally:
+        loop.close()
+
+
+def test_run_grid_async_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'code.py'
+    path.write_text(ASYNC_GRID_CODE)
+    benchmark = CodeBenchmark(str(path), 20, set_up_name=None)
+    grid = benchmark.run_grid([10, 20], [1, 2])
+    assert sorted(grid) == [(10, 1), (10, 2), (20, 1), (20, 2)]
+    assert all(measurement.repeats for measurement in grid.values())
+
+
+MEMORY_CODE = """
+data = None
+
+
+def set_up(size):
+    pass
+
+
+def run(size):
+    global data
+    data = bytearray(size * 1024 * 1024)
+    data = None
+"""
+
+
+def measure_sizes(tmp_path, sizes):
+    """Measure sizes in this order in one persistent worker, returns dict
+    size -> measurement"""
+    path = tmp_path / 'memory.py'
+    path.write_text(MEMORY_CODE)
+    benchmark = CodeBenchmark(
+        str(path), 20, BenchmarkOptions(persistent=True, calibrate=False))
+    try:
+        return {size: benchmark.make_measurement(size, 10)[1]
+                for size in sizes}
+    finally:
+        benchmark.worker.stop()
+
+
+@pytest.mark.skipif(not reset_peak_rss(),
+                    reason='peak RSS can not be reset on this system')
+def test_peak_rss_per_trial_in_persistent_worker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    measurements = measure_sizes(tmp_path, [64, 8])
+    large = measurements[64].min('peak_rss')
+    small = measurements[8].min('peak_rss')
+    assert large - small > 32 * 1024 * 1024
+
+
+def test_no_peak_rss_without_reset_in_persistent_worker(tmp_path,
+                                                        monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(benchmark_module, 'reset_peak_rss', lambda: False)
+    measurements = measure_sizes(tmp_path, [8])
+    assert measurements[8].values('peak_rss') == []
+
+
+def test_gc_metrics_of_run_are_per_call_in_seconds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'code.py'
+    path.write_text('def run(size):\n    pass\n')
+    benchmark = CodeBenchmark(str(path), 10,
+                              BenchmarkOptions(calibrate=False))
+
+    def set_up(size):
+        gc.collect()
+        gc.collect()
+
+    def run(size):
+        time.sleep(0.001)
+        gc.collect()
+
+    with benchmark.gc_monitor:
+        trial = benchmark.run_trial(set_up, run, 10, 4)
+    assert trial['set_up_gc_collections'] == 2
+    assert trial['gc_collections'] == 1.0
+    assert 0 < trial['gc_time'] < trial['run_time'] < 0.1
+    assert 0 < trial['set_up_gc_time'] <= trial['set_up_time'] < 0.1
@@ -0,0 +1,112 @@
+"""Complexity estimation and predictions of generated functions"""
+from benchmike import complexities as cp
+from benchmike.benchmark import CodeBenchmark
+from benchmike.bigoestimator import (CodeGenerator, ComplexityEstimator,
+                                     OnlineComplexityEstimator, Prediction,
+                                     bootstrap_pool, MIN_ONLINE_POINTS)
+from benchmike.measurement import Measurement
+
+
+def test_predict_returns_point_estimate():
+    generator = CodeGenerator(cp.Linear, (2.0, 1.0),
+                              samples=[(1.0, 1.0), (3.0, 1.0)])
+    time_fun = generator.get_execution_time_fun()
+    assert time_fun(10) == 21.0
+    assert isinstance(generator.get_max_input_size_fun()(21.0), (int, float))
+    assert generator.predict(cp.Linear.get_time, 10) == 21.0
+
+
+def test_band_functions_give_prediction():
+    generator = CodeGenerator(cp.Linear, (2.0, 1.0),
+                              samples=[(1.0, 1.0), (3.0, 1.0)], level=0.5)
+    band = generator.get_execution_time_band_fun()(10)
+    assert isinstance(band, Prediction)
+    assert band == Prediction(21.0, 11.0, 31.0)
+    no_samples = CodeGenerator(cp.Linear, (2.0, 1.0))
+    assert no_samples.get_max_input_size_band_fun()(21.0).low == \
+        no_samples.get_max_input_size_fun()(21.0)
+
+
+def test_weights_fall_back_to_ones_without_positive_values():
+    import numpy as np
+    estimator = ComplexityEstimator([])
+    weights = estimator.get_weights(np.array([0.0, 1.0, 2.0]))
+    assert list(weights) == [1.0, 1.0, 1.0]
+    assert list(estimator.get_weights(np.zeros(3))) == [1.0, 1.0, 1.0]
+    estimator = ComplexityEstimator([(size, 2.0 * size - 2.0)
+                                     for size in range(1, 9)])
+    assert estimator.estimate_complexity()[0] == cp.Linear
+
+
+def test_bootstrap_in_shared_pool_matches_own_processes():
+    points = [(size, 3.0 * size + 1.0 + (size % 3) * 0.1)
+              for size in range(10, 200, 10)]
+    pool = bootstrap_pool(100, 2)
+    try:
+        shared = ComplexityEstimator(points)
+        shared.estimate_complexity(100, pool=pool)
+    finally:
+        pool.terminate()
+    own = ComplexityEstimator(points)
+    own.estimate_complexity(100, jobs=1)
+    assert shared.probabilities == own.probabilities
+    assert shared.samples == own.samples
+
+
+def test_online_fit_matches_least_squares():
+    import numpy as np
+    points = [(size, 3.0 * size + 5.0 + (size % 7) * 0.5)
+              for size in range(10, 300, 10)]
+    estimator = OnlineComplexityEstimator()
+    for size, time in points:
+        estimator.add(size, time)
+    slope, intercept, rss = estimator.regression(cp.Linear)
+    sizes, times = (np.array(values) for values in zip(*points))
+    expected = np.polyfit(sizes, times, 1)
+    assert np.allclose((slope, intercept), expected)
+    assert np.isclose(rss, np.sum((np.polyval(expected, sizes) - times) ** 2))
+
+
+def test_online_estimator_stops_after_decisive_lead():
+    estimator = OnlineComplexityEstimator()
+    significant = []
+    for size in range(100, 2001, 100):
+        ranking = estimator.add(size, 1e-8 * size * size + 1e-4)
+        significant.append(estimator.is_significant())
+    assert ranking[0][0] == cp.Quadratic
+    assert not any(significant[:MIN_ONLINE_POINTS - 1])
+    assert significant[-1]
+
+
+def test_stop_early_updates_estimator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'code.py'
+    path.write_text('def set_up(size):\n    pass\n\n\n'
+                    'def run(size):\n    pass\n')
+    benchmark = CodeBenchmark(str(path), 10)
+    estimator = OnlineComplexityEstimator(min_points=1)
+    stops = []
+    for size in range(100, 1001, 100):
+        measurement = Measurement(size)
+        measurement.add_trial(run_time=2e-6 * size)
+        assert not benchmark.stop_early(None, measurement)
+        stops.append(benchmark.stop_early(estimator, measurement))
+    assert estimator.count == 10
+    assert stops.index(True) == stops.count(False)
+
+
+def test_batched_fit_matches_fit_of_each_model():
+    import numpy as np
+    sizes = np.arange(10.0, 400.0, 15.0)
+    times = 2e-3 * sizes * np.log2(sizes) + 0.5 + np.sin(sizes) * 1e-2
+    estimator = ComplexityEstimator(list(zip(sizes, times)))
+    weights = estimator.get_weights(times)
+    fitted = estimator.fit_batched(sizes, times, weights)
+    assert len(fitted) > 1
+    for complexity, coefficients in fitted:
+        expected = complexity.fit(sizes, complexity.get_t_array(times),
+                                  weights)
+        assert np.allclose(coefficients, expected, rtol=1e-6), complexity
+    underdetermined = estimator.fit_batched(sizes[:2], times[:2],
+                                            weights[:2])
+    assert all(coefficients is None for _, coefficients in underdetermined)
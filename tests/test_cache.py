@@ -0,0 +1,82 @@
+"""Measurement cache between benchmike runs"""
+import json
+
+from benchmike import cache as ch
+from benchmike.benchmark import BenchmarkOptions, CodeBenchmark
+from benchmike.measurement import Measurement
+
+CODE = """
+def set_up(size):
+    pass
+
+
+def run(size):
+    pass
+
+
+def run_other(size):
+    pass
+"""
+
+
+def make_benchmark(tmp_path, options=None, run_name='run', cache=None):
+    """Return benchmark of CODE with options"""
+    path = tmp_path / 'code.py'
+    path.write_text(CODE)
+    return CodeBenchmark(str(path), 10, options or BenchmarkOptions(
+        subtract_floor=False), cache, run_name=run_name)
+
+
+def make_measurement(size):
+    """Return measurement of size with single trial"""
+    measurement = Measurement(size)
+    measurement.add_trial(run_time=float(size))
+    return measurement
+
+
+def test_cache_key_depends_on_how_code_is_measured(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    options = BenchmarkOptions(subtract_floor=False)
+    key = make_benchmark(tmp_path, options).cache_key()
+    assert make_benchmark(tmp_path, options).cache_key() == key
+    for other in (options._replace(persistent=True),
+                  options._replace(input_dir=str(tmp_path / 'inputs'))):
+        assert make_benchmark(tmp_path, other).cache_key() != key
+    assert make_benchmark(tmp_path, options,
+                          'run_other').cache_key() != key
+
+
+def test_measured_sizes_are_reused(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ch.MeasurementCache(str(tmp_path / 'cache.db'))
+    benchmark = make_benchmark(tmp_path, cache=cache)
+    assert benchmark.cached_measurement(100, 0.0) is None
+    benchmark.store_measurement(make_measurement(100), 0.0)
+    size, measurement, full_time = make_benchmark(
+        tmp_path, cache=cache).cached_measurement(100, 0.0)
+    assert (size, full_time) == (100, 0.0)
+    assert measurement.to_dict() == make_measurement(100).to_dict()
+    assert make_benchmark(tmp_path, run_name='run_other', cache=cache
+                          ).cached_measurement(100, 0.0) is None
+    cache.close()
+
+
+def test_old_and_oldest_entries_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ch, 'time', lambda: now[0])
+    path = str(tmp_path / 'cache.db')
+    cache = ch.MeasurementCache(path)
+    for size in range(1, 6):
+        now[0] += 1
+        cache.put(('code', 'settings', 'env'), make_measurement(size))
+    cache.close()
+    length = len(json.dumps(make_measurement(1).to_dict()))
+    cache = ch.MeasurementCache(path, max_size=3 * length)
+    assert [size for size in range(1, 6)
+            if cache.get(('code', 'settings', 'env'), size)] == [3, 4, 5]
+    cache.close()
+    now[0] += 100
+    cache = ch.MeasurementCache(path, max_age=100.5)
+    assert [size for size in range(1, 6)
+            if cache.get(('code', 'settings', 'env'), size)] == [5]
+    cache.close()
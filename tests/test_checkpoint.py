@@ -0,0 +1,116 @@
+"""Checkpoints of running benchmark and resuming from them"""
+import pytest
+
+from benchmike import checkpoint as cpt
+from benchmike.benchmark import BenchmarkOptions, CodeBenchmark
+from benchmike.measurement import Measurement
+from benchmike.schedulers import AdaptiveScheduler
+
+CODE = """
+def set_up(size):
+    pass
+
+
+def run(size):
+    sum(range(size))
+"""
+
+
+class RecordingScheduler(AdaptiveScheduler):
+    """Adaptive scheduler recording sizes it chose, interrupts benchmark
+    after stop_after of them"""
+
+    def __init__(self, stop_after=None):
+        super().__init__(100, 8, 2.0)
+        self.sizes = []
+        self.stop_after = stop_after
+
+    def next_size(self, measurements, time_left):
+        if len(self.sizes) == self.stop_after:
+            raise KeyboardInterrupt
+        size = super().next_size(measurements, time_left)
+        self.sizes.append(size)
+        return size
+
+
+def make_benchmark(tmp_path, resume=False):
+    path = tmp_path / 'code.py'
+    path.write_text(CODE)
+    return CodeBenchmark(str(path), 30, BenchmarkOptions(
+        subtract_floor=False, checkpoint=str(tmp_path / 'checkpoint.jsonl'),
+        resume=resume))
+
+
+def test_resume_replays_adaptive_schedule(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    interrupted = RecordingScheduler(stop_after=6)
+    with pytest.raises(KeyboardInterrupt):
+        make_benchmark(tmp_path).run_benchmark(0, 100, 8, interrupted)
+    benchmark = make_benchmark(tmp_path, resume=True)
+    resumed = RecordingScheduler()
+    measurements = benchmark.run_benchmark(0, 100, 8, resumed)
+    assert resumed.sizes[:6] == interrupted.sizes
+    assert benchmark.resumed == {}
+    assert {measurement.size for measurement in measurements} >= \
+        set(interrupted.sizes)
+    assert not (tmp_path / 'checkpoint.jsonl').exists()
+
+
+def test_measurements_are_synced_in_batches(tmp_path, monkeypatch):
+    syncs = []
+    monkeypatch.setattr(cpt.os, 'fsync', syncs.append)
+    checkpoint = cpt.Checkpoint(str(tmp_path / 'checkpoint.jsonl'), ['key'])
+    checkpoint.open()
+    for size in range(10):
+        measurement = Measurement(size)
+        measurement.add_trial(run_time=0.1)
+        checkpoint.save(measurement, 0.1 * size)
+    assert len(syncs) == 1
+    checkpoint.close()
+    assert len(syncs) == 2
+    entries = cpt.Checkpoint(str(tmp_path / 'checkpoint.jsonl'),
+                             ['key']).load()
+    assert [(entry[0].size, entry[1]) for entry in entries] == \
+        [(size, 0.1 * size) for size in range(10)]
+
+
+def test_cut_off_line_and_other_key_are_not_resumed(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = cpt.Checkpoint(path, ['key'])
+    checkpoint.open()
+    for size in (100, 200):
+        measurement = Measurement(size)
+        measurement.add_trial(run_time=0.5)
+        checkpoint.save(measurement, size / 100)
+    checkpoint.close()
+    with open(path, 'a') as file:
+        file.write('{"measurement": {"size": 3')
+    assert cpt.Checkpoint(path, ['other']).open(resume=True) == []
+    checkpoint = cpt.Checkpoint(path, ['key'])
+    assert checkpoint.load() == []
+    with open(path, 'w') as file:
+        file.write('{"key": ["key"]}\n{"measurement": {"size": 1, '
+                   '"trials": []}, "time_elapsed": 0.5}\n{"measur')
+    entries = checkpoint.open(resume=True)
+    checkpoint.close()
+    assert [(entry[0].size, entry[1]) for entry in entries] == [(1, 0.5)]
+    assert len(checkpoint.load()) == 1
+
+
+def test_resumed_sizes_are_not_measured_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    checkpoint = cpt.Checkpoint(str(tmp_path / 'checkpoint.jsonl'),
+                                make_benchmark(tmp_path).cache_key())
+    checkpoint.open()
+    for size in (100, 200):
+        measurement = Measurement(size)
+        measurement.add_trial(run_time=123.0)
+        checkpoint.save(measurement, 1.0)
+    checkpoint.close()
+    measurements = make_benchmark(tmp_path, resume=True).run_benchmark(
+        100, 100, 3)
+    assert [measurement.size for measurement in measurements] == \
+        [100, 200, 300]
+    assert [measurement.min() for measurement in measurements[:2]] == \
+        [123.0, 123.0]
+    assert measurements[2].min() < 1.0
@@ -0,0 +1,80 @@
+"""Regression checks of compare mode"""
+import itertools
+import math
+import random
+
+from benchmike import compare as cmp
+from benchmike import measurement as mm
+from benchmike.results import BenchmarkResult
+
+
+def make_measurements(seed, slowdown=1.0, repeat=cmp.MIN_COMPARE_REPEAT):
+    """Return measurements of linear run time with 10% of noise"""
+    rng = random.Random(seed)
+    measurements = []
+    for size in range(100, 2001, 100):
+        measurement = mm.Measurement(size)
+        for _ in range(repeat):
+            measurement.add_trial(run_time=slowdown * 1e-6 * size * (
+                1 + 0.1 * rng.random()))
+        measurements.append(measurement)
+    return measurements
+
+
+def make_comparison(seed, slowdown=1.0, repeat=cmp.MIN_COMPARE_REPEAT):
+    """Compare sweep of seed against sweep of seed 0"""
+    baseline = BenchmarkResult('code.py', '', '', {}, {},
+                               make_measurements(0, repeat=repeat), 'min')
+    return cmp.Comparison(baseline,
+                          make_measurements(seed, slowdown, repeat))
+
+
+def test_holm_adjusts_smallest_p_value_most():
+    assert mm.holm([0.01, 0.04, 0.03]) == [0.03, 0.06, 0.06]
+    assert mm.holm([0.5, 0.9]) == [1.0, 1.0]
+    assert mm.holm([]) == []
+
+
+def test_noise_is_not_regression():
+    for seed in range(1, 7):
+        assert make_comparison(seed).regressions() == []
+
+
+def test_slowdown_is_regression():
+    regressions = make_comparison(1, slowdown=2.0).regressions()
+    assert regressions[-1].startswith("Mean slowdown")
+    regressions = make_comparison(1, slowdown=2.0, repeat=10).regressions()
+    assert len(regressions) == 21 and regressions[0].startswith("Size 100")
+
+
+def test_single_trials_never_give_significant_slowdown():
+    comparison = make_comparison(1, slowdown=2.0, repeat=1)
+    assert all(row['p_value'] == 1.0 for row in comparison.rows)
+
+
+def test_exact_u_distribution_matches_enumeration():
+    for n_1, n_2 in ((1, 1), (2, 3), (4, 4), (3, 6)):
+        counts = [0] * (n_1 * n_2 + 1)
+        for first in itertools.combinations(range(n_1 + n_2), n_1):
+            counts[sum(first) - n_1 * (n_1 - 1) // 2] += 1
+        assert mm.count_u(n_1, n_2) == counts
+
+
+def test_exact_p_values():
+    # p-values of exact two-sided test from tables of U
+    assert mm.mann_whitney([1, 2, 3], [4, 5, 6]) == (0.0, 0.1)
+    u, p = mm.mann_whitney([6, 7, 8, 9, 10], [1, 2, 3, 4, 5])
+    assert u == 25.0 and abs(p - 2 / 252) < 1e-12
+    u, p = mm.mann_whitney([1, 2, 4, 8], [3, 5, 6, 7, 9])
+    assert u == 5.0 and abs(p - 2 * 18 / 126) < 1e-12
+    assert mm.mann_whitney([1, 3, 5], [2, 4, 6])[1] == 0.7
+
+
+def test_ties_use_normal_approximation():
+    assert mm.mann_whitney([1, 1, 1], [1, 1, 1]) == (4.5, 1.0)
+    u, p = mm.mann_whitney([1, 2, 2, 3], [3, 4, 4, 5])
+    # U = 0.5, mean 8, variance 16 / 12 * (9 - 18 / 56), continuity
+    # corrected
+    assert u == 0.5
+    assert abs(p - math.erfc(7 / math.sqrt(
+        16 / 12 * (9 - 18 / 56)) / math.sqrt(2))) < 1e-12
@@ -0,0 +1,87 @@
+"""Registered complexities, their inverses and model selection"""
+import inspect
+
+import numpy as np
+import pytest
+
+from benchmike import complexities as cp
+from benchmike.bigoestimator import ComplexityEstimator
+
+SIZES = np.array([2.0 ** power for power in range(6, 20)])
+
+
+def noisy(times, seed):
+    return times * np.random.default_rng(seed).normal(1, 0.03, len(times))
+
+
+def test_linear_kernel_gets_linear_verdict():
+    for seed in range(20):
+        times = noisy(1e-8 * SIZES + 1e-5, seed)
+        verdict = ComplexityEstimator(list(zip(SIZES, times))).verdict()
+        assert verdict[0] is cp.Linear
+
+
+def test_parameters_are_counts_of_coefficients():
+    for complexity in (cp.Linear, cp.PowerLaw, cp.Exponential):
+        assert complexity.parameters == 2
+    for complexity in cp.TWO_TERM:
+        assert complexity.parameters == 3
+
+
+def test_two_term_complexities_are_opt_in():
+    for complexity in cp.TWO_TERM:
+        assert complexity.get_description() not in cp.REGISTRY
+    registry = dict(cp.REGISTRY)
+    complexities = cp.get_complexities(two_term=True)
+    assert set(complexities.values()) == \
+        set(registry.values()) | set(cp.TWO_TERM)
+    assert cp.REGISTRY == registry
+    assert cp.get_complexities() == registry
+
+
+def test_estimators_choose_from_given_complexities():
+    times = noisy(1e-9 * SIZES ** 2 + 1e-6 * SIZES + 1e-4, 0)
+    points = list(zip(SIZES, times))
+    estimator = ComplexityEstimator(
+        points, complexities=cp.get_complexities(two_term=True))
+    estimator.fit()
+    assert cp.LinearQuadratic in estimator.scores
+    plain = ComplexityEstimator(points)
+    plain.fit()
+    assert cp.LinearQuadratic not in plain.scores
+
+
+def test_linearithmic_with_negative_linear_term_fits():
+    times = noisy(1e-8 * SIZES * np.log2(SIZES) - 5e-8 * SIZES + 1e-4, 0)
+    weights = ComplexityEstimator([]).get_weights(times)
+    coefficients = cp.LinearLinearithmic.fit(SIZES, times, weights)
+    assert coefficients is not None
+    assert coefficients[0] > 0 > coefficients[1]
+
+
+def test_lambert_w_solves_its_equation():
+    values = [0.0, 1e-8, 0.5, np.e, 3.0, 1e6, 1e300]
+    for x, w in zip(values, cp.lambert_w_array(values)):
+        assert cp.lambert_w(x) == pytest.approx(w, rel=1e-12, abs=1e-300)
+        assert w * np.exp(w) == pytest.approx(x, rel=1e-12)
+
+
+@pytest.mark.parametrize('complexity', [
+    complexity for complexity in cp.get_complexities(two_term=True).values()
+    if complexity is not cp.Constant])
+def test_max_size_is_largest_size_within_time(complexity):
+    coefficients = {2: (1e-6, 1e-3), 3: (1e-6, 1e-4, 1e-3)}[
+        len(inspect.signature(complexity.get_max_size).parameters) - 1]
+    if complexity in (cp.PowerLaw, cp.Exponential):
+        coefficients = (1e-6, 1.5)
+    elif complexity is cp.Logarithmic:
+        coefficients = (1e-1, 1e-3)
+    times = [0.01, 1.0, 10.0]
+    sizes = [complexity.get_max_size(time, *coefficients) for time in times]
+    # one more is too large, up to rounding of floats
+    for time, size in zip(times, sizes):
+        assert complexity.get_time(size, *coefficients) <= time * (1 + 1e-9)
+        assert complexity.get_time(size + 1, *coefficients) > \
+            time * (1 - 1e-9)
+    assert list(complexity.get_max_size_array(
+        np.array(times), *coefficients)) == sizes
@@ -0,0 +1,56 @@
+"""Throughput and latency of coroutines at growing concurrency"""
+import pytest
+
+from benchmike import concurrency as cc
+from benchmike import exceptions as err
+
+SLEEP_CODE = """
+import asyncio
+
+
+def set_up(size):
+    pass
+
+
+async def run(size):
+    await asyncio.sleep(size / 1000)
+
+
+def run_blocking(size):
+    pass
+"""
+
+
+def test_levels_end_with_max_concurrency():
+    assert cc.get_levels(1) == [1]
+    assert cc.get_levels(6) == [1, 2, 4, 6]
+    assert cc.get_levels(27, 3) == [1, 3, 9, 27]
+
+
+def test_percentile_interpolates_between_ranks():
+    assert cc.percentile([5.0], 99) == 5.0
+    assert cc.percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert cc.percentile([0.0, 10.0], 90) == pytest.approx(9.0)
+
+
+def test_waiting_tasks_scale_throughput(tmp_path):
+    path = tmp_path / 'code.py'
+    path.write_text(SLEEP_CODE)
+    benchmark = cc.ConcurrencyBenchmark(str(path), 3, 10, [1, 4, 16])
+    rows = benchmark.run()
+    assert [row['concurrency'] for row in rows] == [1, 4, 16]
+    assert all(set(row) == set(cc.REPORT_FIELDS) for row in rows)
+    assert rows[0]['efficiency'] == 1.0
+    assert rows[-1]['throughput'] > 8 * rows[0]['throughput']
+    assert all(0.01 <= row['p50_latency'] < 0.05 for row in rows)
+    report = tmp_path / 'report.csv'
+    benchmark.save_report(str(report))
+    assert report.read_text().count('\n') == 4
+
+
+def test_run_must_be_coroutine_function(tmp_path):
+    path = tmp_path / 'code.py'
+    path.write_text(SLEEP_CODE)
+    with pytest.raises(err.BenchmarkRuntimeError):
+        cc.ConcurrencyBenchmark(str(path), 2, 10, [1],
+                                run_name='run_blocking').run()
@@ -0,0 +1,66 @@
+"""Event counters per trial and estimation of their complexity"""
+import pytest
+
+from benchmike import benchmike as bm
+from benchmike import counters as cn
+from benchmike.benchmark import BenchmarkOptions, CodeBenchmark
+from benchmike.measurement import Measurement
+from benchmike.results import BenchmarkResult
+
+
+def make_measurements(**counters):
+    """Return measurements of sizes 100..1000 with run_time and counters
+    given as functions of size"""
+    measurements = []
+    for size in range(100, 1001, 100):
+        measurement = Measurement(size)
+        measurement.add_trial(run_time=1e-6 * size, **{
+            metric: fun(size) for metric, fun in counters.items()})
+        measurements.append(measurement)
+    return measurements
+
+
+def test_all_zero_counter_is_constant_without_fit():
+    measurements = make_measurements(page_faults=lambda size: 0,
+                                     cycles=lambda size: 50 * size + 7)
+    benchmike = bm.BenchMike()
+    benchmike.result = BenchmarkResult('code.py', '', '', {}, {},
+                                       measurements, 'min')
+    benchmike.estimate_counters(measurements, 'min', bootstrap=0)
+    assert set(benchmike.counter_estimators) == {'cycles'}
+    verdicts = benchmike.result.verdicts
+    assert verdicts['page_faults']['complexity'] == 'O(1) - constant'
+    assert verdicts['page_faults']['coefficients'] == [0.0, 0.0]
+    assert verdicts['cycles']['complexity'] == 'O(n) - linear'
+
+
+def test_deltas_are_per_run_call():
+    counters = cn.Counters(())
+    with counters:
+        start = counters.read()
+        blocks = [object() for _ in range(10000)]
+        end = counters.read()
+    deltas = counters.deltas(start, end, 10)
+    assert set(deltas) == set(cn.RUSAGE_COUNTERS + ('allocated_blocks',))
+    assert 1000 <= deltas['allocated_blocks'] < 2000 and blocks
+
+
+def test_perf_events_need_known_syscall(monkeypatch):
+    monkeypatch.setattr(cn.platform, 'machine', lambda: 'unknown')
+    with pytest.raises(OSError):
+        cn.perf_event_open(*cn.PERF_EVENTS['cycles'])
+    assert cn.available_events()[0] == ()
+
+
+def test_trials_record_counters(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'code.py'
+    path.write_text('def set_up(size):\n    pass\n\n\n'
+                    'def run(size):\n    return [[] for _ in range(size)]\n')
+    benchmark = CodeBenchmark(str(path), 20, BenchmarkOptions(
+        repeat=3, counters=True, calibrate=False))
+    events = cn.available_events()[0]
+    _, measurement, _ = benchmark.make_measurement(1000, 20)
+    for metric in events + cn.RUSAGE_COUNTERS + ('allocated_blocks',):
+        assert len(measurement.values(metric)) == 3, metric
+    assert min(measurement.values('voluntary_switches')) >= 0
@@ -0,0 +1,128 @@
+"""Inputs made by make_input(size, seed) and their cache"""
+import os
+
+import pytest
+
+from benchmike.benchmark import BenchmarkOptions, CodeBenchmark
+from benchmike.inputs import InputCache
+
+ASYNC_INPUT_CODE = """
+import asyncio
+
+
+def make_input(size, seed):
+    return bytes(range(size % 256)) * 4
+
+
+async def run(size, data):
+    await asyncio.sleep(0)
+    return len(data)
+"""
+
+
+def test_bytes_input_is_mapped(tmp_path):
+    cache = InputCache(str(tmp_path), 'key', 1)
+    calls = []
+
+    def make_input(size, seed):
+        calls.append((size, seed))
+        return b'abc'
+
+    path = cache.get(make_input, 3)
+    assert cache.get(make_input, 3) == path
+    assert calls == [(3, 1)]
+    copy = cache.load(path, copy=True)
+    copy[0] = ord('x')
+    assert bytes(cache.load(path)[:]) == b'abc'
+
+
+def test_pickled_input_copy_is_new_object(tmp_path):
+    cache = InputCache(str(tmp_path))
+    path = cache.get(lambda size, seed: list(range(size)), 5)
+    first = cache.load(path, copy=True)
+    first.append(5)
+    assert cache.load(path, copy=True) == [0, 1, 2, 3, 4]
+
+
+def test_async_run_with_make_input(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'code.py'
+    path.write_text(ASYNC_INPUT_CODE)
+    benchmark = CodeBenchmark(
+        str(path), 20, BenchmarkOptions(input_dir=str(tmp_path / 'inputs')))
+    size, measurement, _ = benchmark.make_measurement(10, 10)
+    assert size == 10 and measurement.repeats == 1
+    benchmark.measurements = [measurement]
+    profiles = benchmark.run_profiles([10], 'cprofile', 0.001,
+                                      str(tmp_path / 'profile'))
+    assert list(profiles) == [10]
+    assert (tmp_path / 'profile_10.pstats').exists()
+
+
+def test_least_recently_used_inputs_are_evicted(tmp_path):
+    cache = InputCache(str(tmp_path), 'key', max_size=250)
+
+    def make_input(size, seed):
+        return bytes(size)
+
+    first = cache.get(make_input, 100)
+    second = cache.get(make_input, 101)
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+    assert cache.get(make_input, 100) == first
+    third = cache.get(make_input, 102)
+    assert os.path.exists(first) and os.path.exists(third)
+    assert not os.path.exists(second)
+    assert cache.find(101) is None
+
+
+def test_input_larger_than_limit_is_kept(tmp_path):
+    cache = InputCache(str(tmp_path), max_size=10)
+    path = cache.get(lambda size, seed: bytes(size), 100)
+    assert os.path.exists(path)
+
+
+def test_numpy_input_is_read_only_map(tmp_path):
+    import numpy as np
+    cache = InputCache(str(tmp_path))
+    path = cache.get(lambda size, seed: np.arange(size), 4)
+    assert path.endswith('.npy')
+    shared = cache.load(path)
+    assert isinstance(shared, np.memmap)
+    with pytest.raises(ValueError):
+        shared[0] = 10
+    copy = cache.load(path, copy=True)
+    copy[0] = 10
+    assert list(cache.load(path)) == [0, 1, 2, 3]
+
+
+def test_inputs_differ_by_key_and_seed(tmp_path):
+    def make_input(size, seed):
+        return [size, seed]
+
+    paths = {InputCache(str(tmp_path), key, seed).get(make_input, 3)
+             for key in ('first', 'second') for seed in (0, 1)}
+    assert len(paths) == 4
+    assert InputCache.load(InputCache(str(tmp_path), 'first', 1).find(3)) \
+        == [3, 1]
+
+
+class LazyValue:
+    """Value whose pickling calls fun, fails like input too large to
+    save"""
+
+    def __init__(self, fun):
+        self.fun = fun
+
+    def __reduce__(self):
+        return self.fun(0, 0)
+
+
+def test_failed_input_leaves_no_file(tmp_path):
+    def make_input(size, seed):
+        raise MemoryError
+
+    cache = InputCache(str(tmp_path))
+    with pytest.raises(MemoryError):
+        cache.save(3, LazyValue(make_input))
+    assert cache.find(3) is None and os.listdir(str(tmp_path)) == []
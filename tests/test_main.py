@@ -0,0 +1,93 @@
+"""Exit codes of benchmike command line"""
+import sys
+
+import pytest
+
+from benchmike import benchmike as bm
+from benchmike import exceptions as err
+
+CODE = """
+def set_up(size):
+    pass
+
+
+def run(size):
+    pass
+"""
+
+
+def run_main(monkeypatch, *argv):
+    """Run main with argv, returns its exit code"""
+    monkeypatch.setattr(sys, 'argv', ['benchmike'] + list(argv))
+    with pytest.raises(SystemExit) as info:
+        bm.main()
+    return info.value.code
+
+
+@pytest.fixture
+def code(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'code.py'
+    path.write_text(CODE)
+    return str(path)
+
+
+def test_compare_missing_baseline(code, monkeypatch):
+    assert run_main(monkeypatch, 'compare', code,
+                    'missing.jsonl') == bm.ERROR_EXIT_CODE
+
+
+def test_compare_invalid_baseline(code, tmp_path, monkeypatch):
+    baseline = tmp_path / 'baseline.jsonl'
+    baseline.write_text('not json\n')
+    assert run_main(monkeypatch, 'compare', code,
+                    str(baseline)) == bm.ERROR_EXIT_CODE
+
+
+def test_compare_sweep_error(code, tmp_path, monkeypatch):
+    baseline = tmp_path / 'baseline.jsonl'
+    baseline.write_text('{}\n')
+
+    def fail(*args):
+        raise err.BenchmarkRuntimeError("sweep failed")
+
+    monkeypatch.setattr(bm.BenchMike, 'run_compare', fail)
+    assert run_main(monkeypatch, 'compare', code,
+                    str(baseline)) == bm.ERROR_EXIT_CODE
+
+
+def test_compare_regression(code, tmp_path, monkeypatch):
+    baseline = tmp_path / 'baseline.jsonl'
+    baseline.write_text('{}\n')
+    monkeypatch.setattr(bm.BenchMike, 'run_compare',
+                        lambda *args: ['regression'])
+    assert run_main(monkeypatch, 'compare', code,
+                    str(baseline)) == bm.REGRESSION_EXIT_CODE
+
+
+def test_selftest_error(code, monkeypatch):
+
+    def fail(*args):
+        raise RuntimeError("selftest crashed")
+
+    monkeypatch.setattr(bm.BenchMike, 'run_selftest', fail)
+    assert run_main(monkeypatch, 'selftest') == bm.ERROR_EXIT_CODE
+
+
+def test_selftest_failure(code, monkeypatch):
+    monkeypatch.setattr(bm.BenchMike, 'run_selftest', lambda *args: False)
+    assert run_main(monkeypatch, 'selftest') == \
+        bm.SELFTEST_FAILURE_EXIT_CODE
+
+
+def test_invalid_code_path(code, monkeypatch):
+    assert run_main(monkeypatch, 'missing.py') == bm.ERROR_EXIT_CODE
+
+
+def test_startup_time_is_passed_to_benchmark(code, monkeypatch):
+    startup_times = []
+    monkeypatch.setattr(bm.BenchMike, 'run', lambda self, *args:
+                        startup_times.append(self.startup_time))
+    monkeypatch.setattr(sys, 'argv', ['benchmike', code])
+    bm.main()
+    assert len(startup_times) == 1 and startup_times[0] > 0
@@ -0,0 +1,63 @@
+"""Profiling of run at the largest sizes"""
+import pstats
+
+from benchmike import profiler as pr
+
+
+def quadratic(size):
+    return sum(i * j for i in range(size) for j in range(size))
+
+
+def linear(size):
+    return sum(range(size))
+
+
+def run(size):
+    quadratic(size)
+    linear(size)
+
+
+def test_choose_sizes():
+    assert pr.choose_sizes([], 2) == []
+    assert pr.choose_sizes([100, 400, 300, 1000], 1) == [1000]
+    assert pr.choose_sizes([100, 400, 300, 1000], 2) == [300, 1000]
+    assert pr.choose_sizes([1000, 1000], 2) == [1000]
+
+
+def test_sampling_profile_is_collapsed_from_target(tmp_path):
+    shares, number, filename = pr.profile_run(
+        run, 300, 'sampling', 0.001, str(tmp_path / 'profile'),
+        run.__code__)
+    assert number >= 1 and filename == str(tmp_path / 'profile_300.collapsed')
+    assert abs(sum(shares.values()) - 1.0) < 1e-9
+    root = pr.function_label(__file__, run.__code__.co_firstlineno, 'run')
+    with open(filename) as file:
+        lines = file.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(' ', 1)
+        assert stack.split(';')[0] == root and int(count) > 0
+    assert max(shares, key=shares.get).startswith('<genexpr>')
+
+
+def test_cprofile_shares_are_self_time(tmp_path):
+    shares, _, filename = pr.profile_run(
+        run, 300, 'cprofile', 0.001, str(tmp_path / 'profile'))
+    assert filename.endswith('profile_300.pstats')
+    assert pstats.Stats(filename).total_calls > 0
+    label = pr.function_label(__file__, quadratic.__code__.co_firstlineno,
+                              'quadratic')
+    assert label in shares
+    assert abs(sum(shares.values()) - 1.0) < 1e-9
+
+
+def test_superlinear_function_is_flagged():
+    profiles = {100: {'quadratic': 0.5, 'linear': 0.5},
+                400: {'quadratic': 0.8, 'linear': 0.2}}
+    comparison = pr.ProfileComparison(profiles, {100: 1.0, 400: 10.0})
+    rows = comparison.compare()
+    assert [row['function'] for row in rows] == ['quadratic', 'linear']
+    assert comparison.superlinear() == ['quadratic']
+    assert abs(rows[0]['exponent'] - 2.0) < 0.01
+    assert comparison.to_dict()['functions'][1]['shares'] == \
+        {'100': 0.5, '400': 0.2}
@@ -0,0 +1,25 @@
+"""Serialization of benchmark results"""
+from benchmike.measurement import Measurement
+from benchmike.results import BenchmarkResult
+
+
+def test_startup_time_round_trip():
+    result = BenchmarkResult('code.py', 'hash', 'fingerprint', {}, {}, [],
+                             'median')
+    result.startup_time = 0.125
+    assert BenchmarkResult.from_dict(
+        result.to_dict()).startup_time == 0.125
+    data = result.to_dict()
+    del data['startup_time']
+    assert BenchmarkResult.from_dict(data).startup_time is None
+
+
+def test_rows_leave_out_metrics_not_measured(tmp_path):
+    measurement = Measurement(100)
+    measurement.add_trial(run_time=0.5, peak_rss=None)
+    result = BenchmarkResult('code.py', 'hash', 'fingerprint', {}, {},
+                             [measurement], 'min')
+    assert [(row['metric'], row['value']) for row in result.to_rows()] == \
+        [('run_time', 0.5)]
+    result.export(str(tmp_path / 'result.csv'), 'csv')
+    assert 'peak_rss' not in (tmp_path / 'result.csv').read_text()
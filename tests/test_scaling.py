@@ -0,0 +1,67 @@
+"""Estimation of parallel speedup"""
+from benchmike.measurement import Measurement
+from benchmike.scaling import ScalingEstimator, fit_amdahl
+
+
+def make_grid(times):
+    """Return grid of measurements with single trial of given run times"""
+    grid = {}
+    for cell, run_time in times.items():
+        grid[cell] = Measurement(cell[0])
+        grid[cell].add_trial(run_time=run_time)
+    return grid
+
+
+def test_fit_amdahl():
+    serial, parallel = fit_amdahl([(1, 3.0), (2, 2.0), (4, 1.5)])
+    assert abs(serial - 1.0) < 1e-9
+    assert abs(parallel - 2.0) < 1e-9
+
+
+def test_verdict_of_serial_workload():
+    # time does not drop with workers, parallel part is zero for every size
+    estimator = ScalingEstimator(make_grid(
+        {(size, workers): size * 1e-3 for size in (100, 200, 300)
+         for workers in (1, 2, 4)}))
+    rows = estimator.estimate()
+    assert all(row['parallel_time'] == 0 for row in rows)
+    assert estimator.verdict('parallel_time') is None
+    assert estimator.verdict('serial_time') is not None
+
+
+def test_save_report_of_serial_workload(tmp_path):
+    estimator = ScalingEstimator(make_grid(
+        {(size, workers): size * 1e-3 for size in (100, 200)
+         for workers in (1, 2)}))
+    estimator.estimate()
+    report = tmp_path / 'report.csv'
+    estimator.save_report(str(report))
+    assert report.read_text().count('\n') == 3
+
+
+def test_parts_of_run_time_are_separated():
+    # serial part linear and parallel part quadratic in size
+    estimator = ScalingEstimator(make_grid(
+        {(size, workers): 1e-3 * size + 1e-5 * size ** 2 / workers
+         for size in range(100, 1001, 100) for workers in (1, 2, 4, 8)}))
+    rows = estimator.estimate()
+    for row in rows:
+        size = row['size']
+        assert abs(row['serial_time'] - 1e-3 * size) < 1e-9
+        assert abs(row['parallel_time'] - 1e-5 * size ** 2) < 1e-9
+        assert row['best_workers'] == 8
+        assert abs(row['amdahl_limit'] - (1 + 1e-2 * size)) < 1e-6
+    fractions = [row['serial_fraction'] for row in rows]
+    assert fractions == sorted(fractions, reverse=True)
+    assert rows[0]['knee_workers'] == 4 and rows[-1]['knee_workers'] == 8
+    assert estimator.verdict('serial_time') == 'O(n) - linear'
+    assert estimator.verdict('parallel_time') == 'O(n^2) - quadratic'
+
+
+def test_knee_is_first_worker_count_near_best_speedup():
+    estimator = ScalingEstimator(make_grid(
+        {(100, 1): 8.0, (100, 2): 4.0, (100, 4): 2.1, (100, 8): 2.0}))
+    row = estimator.estimate()[0]
+    assert row['best_workers'] == 8 and row['knee_workers'] == 4
+    assert abs(row['efficiency'] - 0.5) < 1e-9
+    assert fit_amdahl([(1, 1.0), (1, 2.0)]) is None
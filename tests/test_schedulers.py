@@ -0,0 +1,53 @@
+"""Strategies choosing problem sizes"""
+import pytest
+
+from benchmike import schedulers as sch
+from benchmike.measurement import Measurement
+
+
+def sweep(scheduler, fun, time_left=100.0):
+    """Return sizes chosen by scheduler when size n takes fun(n) seconds"""
+    measurements = []
+    while True:
+        size = scheduler.next_size(measurements, time_left)
+        if size is None:
+            return [measurement.size for measurement in measurements]
+        measurement = Measurement(size)
+        measurement.add_trial(run_time=fun(size))
+        measurements.append(measurement)
+
+
+def test_linear_and_fixed_sizes():
+    assert sweep(sch.LinearScheduler(100, 50, 4), float) == \
+        [100, 150, 200, 250]
+    assert sweep(sch.FixedScheduler([30, 10, 20]), float) == [10, 20, 30]
+
+
+def test_geometric_sizes_always_grow():
+    assert sweep(sch.GeometricScheduler(100, 4, 2.0), float) == \
+        [100, 200, 400, 800]
+    sizes = sweep(sch.GeometricScheduler(1, 6, 1.1), float)
+    assert sizes == [1, 2, 3, 4, 5, 6]
+
+
+def test_adaptive_sizes_fit_in_time_left():
+    sizes = sweep(sch.AdaptiveScheduler(100, 30),
+                  lambda size: 1e-8 * size * size, time_left=1.0)
+    assert sizes[:sch.INITIAL_POINTS] == [100, 200, 400, 800]
+    assert len(sizes) == len(set(sizes))
+    assert all(1e-8 * size * size <= sch.MAX_TIME_SHARE * 1.0 * 1.01
+               for size in sizes[sch.INITIAL_POINTS:])
+
+
+def test_adaptive_stops_on_stable_verdict():
+    scheduler = sch.AdaptiveScheduler(100, 100)
+    sizes = sweep(scheduler, lambda size: 1e-6 * size)
+    assert len(sizes) < 100
+    assert len(set(scheduler.verdicts[-sch.STABLE_VERDICTS:])) == 1
+
+
+def test_unknown_schedule_is_rejected():
+    assert isinstance(sch.get_scheduler('geometric', 1, 1, 3),
+                      sch.GeometricScheduler)
+    with pytest.raises(ValueError):
+        sch.get_scheduler('random', 1, 1, 3)